@@ -1,85 +1,92 @@
+import argparse
 import json
-from datetime import datetime
+import sys
 
-# Load forecast data
-with open("seedable_forecast.json", "r") as f:
-    all_forecasts = json.load(f)
+from forecast_columns import load_forecast_fields
+from instrumentation import METRICS
+from irrigation_planner import DAYS, plan_forecast_week, plan_record
 
-# Load user config
-with open("user_input_config.json", "r") as f:
-    user_config = json.load(f)
 
-# Extract user crop and irrigation data
-crop = user_config["crop"]["type"].capitalize()
-growth_stage = user_config["crop"]["growth_stage"]
-weekly_requirement = user_config["crop"]["water_requirement_mm_per_week"]
-max_per_day = user_config["irrigation"]["max_capacity_mm_per_day"]
+def print_plan(plan, config, datetimes):
+    """Print a plan from plan_forecast_week(); `datetimes` are the forecast hours it was built on"""
+    # Extract user crop and irrigation data
+    crop = config["crop"]["type"].capitalize()
+    growth_stage = config["crop"]["growth_stage"]
+    weekly_requirement = config["crop"]["water_requirement_mm_per_week"]
+    max_per_day = config["irrigation"]["max_capacity_mm_per_day"]
+    expected_rain, window = plan["expected_rain"], plan["window"]
+    seeding_days = [d for d in range(7) if plan["seeding"][d]]
 
-# Days of the week and empty plan
-days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-plan = {day: 0 for day in days}
+    if (window < 0).all():
+        print("❌ No seedable clouds available. Showing full irrigation plan instead.")
+    else:
+        print("\n🌥️ Best Seedable Cloud Window per Day:\n")
+        for d in range(7):
+            if window[d] >= 0:
+                marker = "✔" if plan["seeding"][d] else " "
+                print(f"{marker} {datetimes[window[d]]} ({DAYS[d]}) - "
+                      f"Expected rainfall: {round(expected_rain[d], 2)}mm")
 
-# Filter seedable cloud options
-seedable_options = [
-    {
-        "datetime": item["datetime"],
-        "day": datetime.strptime(item["datetime"], "%Y-%m-%dT%H:%M").strftime("%A"),
-        "rainfall_mm": item["precipitation_potential_mm"]
-    }
-    for item in all_forecasts if item.get("is_seedable", False)
-]
+    # Final output
+    print(f"\n📋 AI Optimized Irrigation Plan for Crop: {crop} ({growth_stage} stage)")
+    print(f"💧 Weekly Requirement: {weekly_requirement}mm | 🚿 Max/Day: {max_per_day}mm")
+    if seeding_days:
+        print(f"🌧️ Cloud Seeding on {', '.join(DAYS[d] for d in seeding_days)}: "
+              f"{round(plan['rainfall'], 2)}mm expected\n")
+    else:
+        print("⚠️ No Rainfall Included\n")
 
-if not seedable_options:
-    print("❌ No seedable clouds available. Showing full irrigation plan instead.")
-    # Distribute full requirement equally under max_per_day
-    remaining = weekly_requirement
-    i = 0
-    while remaining > 0:
-        day = days[i % 7]
-        water = min(remaining, max_per_day)
-        plan[day] += water
-        remaining -= water
-        i += 1
-else:
-    # Show seedable options to user
-    print("\n🌥️ Available Seedable Cloud Options:\n")
-    for i, option in enumerate(seedable_options):
-        print(f"{i + 1}. {option['datetime']} ({option['day']}) - Rainfall: {option['rainfall_mm']}mm")
+    for d, day in enumerate(DAYS):
+        if plan["irrigation"][d] > 0 and plan["seeding"][d]:
+            print(f"✅ {day}: Irrigate {round(plan['irrigation'][d], 2)}mm + "
+                  f"rainfall expected ({round(expected_rain[d], 2)}mm)")
+        elif plan["irrigation"][d] > 0:
+            print(f"✅ {day}: Irrigate {round(plan['irrigation'][d], 2)}mm")
+        elif plan["seeding"][d]:
+            print(f"🌧️ {day}: Rainfall expected ({round(expected_rain[d], 2)}mm) - No irrigation")
+        else:
+            print(f"➖ {day}: No irrigation needed")
 
-    # Get user choice
-    selected_index = int(input("\nSelect a cloud seeding option (enter number): ")) - 1
-    selected = seedable_options[selected_index]
+    print(f"\n🚿 Total pumped: {round(plan['pumped'], 2)}mm")
+    if plan["shortfall"] > 0:
+        print(f"⚠️ Capacity cannot cover the week: {round(plan['shortfall'], 2)}mm short")
 
-    rain_day = selected["day"]
-    rainfall_mm = selected["rainfall_mm"]
-    plan[rain_day] = 0  # No irrigation on rainfall day
 
-    # Calculate remaining water needed
-    remaining = weekly_requirement - rainfall_mm
-    remaining = max(0, remaining)
+def main():
+    parser = argparse.ArgumentParser(description="Weekly irrigation plan combined with cloud seeding")
+    parser.add_argument("--max-seeding-days", type=int, help="Seed clouds on at most this many days")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Record stage timings and counters to PATH (.prom for Prometheus text, else JSON)")
+    parser.add_argument("--machine", action="store_true",
+                        help="No console report: print the plan as one NDJSON record")
+    args = parser.parse_args()
+    if args.metrics:
+        METRICS.enable()
 
-    # Distribute across other days
-    irrigation_days = [d for d in days if d != rain_day]
-    i = 0
-    while remaining > 0:
-        day = irrigation_days[i % len(irrigation_days)]
-        water = min(remaining, max_per_day)
-        plan[day] += water
-        remaining -= water
-        i += 1
+    # Load forecast data
+    forecast = load_forecast_fields(["datetime", "is_seedable", "precipitation_potential_mm",
+                                     "precipitation_probability"])
 
-# Final output
-print(f"\n📋 AI Optimized Irrigation Plan for Crop: {crop} ({growth_stage} stage)")
-print(f"💧 Weekly Requirement: {weekly_requirement}mm | 🚿 Max/Day: {max_per_day}mm")
-if seedable_options:
-    print(f"🌧️ Cloud Seeding on {rain_day}: {rainfall_mm}mm\n")
-else:
-    print("⚠️ No Rainfall Included\n")
+    # Load user config
+    with open("user_input_config.json", "r") as f:
+        user_config = json.load(f)
 
-for day in days:
-    if plan[day] > 0:
-        print(f"✅ {day}: Irrigate {plan[day]}mm")
-    elif seedable_options and day == rain_day:
-        print(f"🌧️ {day}: Rainfall expected ({rainfall_mm}mm) - No irrigation")
-    else:
-        print(f"➖ {day}: No irrigation needed")
+    # Choose seeding days (best window per weekday, weighted by its precipitation probability)
+    # and irrigation amounts together, minimising pumped water
+    with METRICS.stage("plan"):
+        plan = plan_forecast_week(forecast, user_config["crop"]["water_requirement_mm_per_week"],
+                                  user_config["irrigation"]["max_capacity_mm_per_day"],
+                                  args.max_seeding_days)
+    with METRICS.stage("report"):
+        if args.machine:
+            sys.stdout.write(json.dumps(plan_record(plan, forecast["datetime"], user_config)) + "\n")
+        else:
+            print_plan(plan, user_config, forecast["datetime"])
+    if args.metrics:
+        METRICS.write(args.metrics)
+        if not args.machine:
+            print(f"📈 Metrics saved to {args.metrics}")
+
+
+if __name__ == "__main__":
+    main()
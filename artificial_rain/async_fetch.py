@@ -0,0 +1,141 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from forecast_fetch import forecast_payloads, forecast_url
+from instrumentation import METRICS
+
+# Concurrent forecast fetching for many locations. Requests go through one pooled
+# requests.Session on a bounded worker pool, so TCP/TLS connections are reused; asyncio
+# drives the concurrency, timeouts, retries and per-host rate limiting, and results are
+# yielded as they arrive so scoring can start before the slowest response.
+
+# Responses worth retrying: rate limited or upstream trouble
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HostRateLimiter:
+    """Token bucket per host: `rate` requests per second with bursts of up to `burst`"""
+
+    def __init__(self, rate=10.0, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._buckets = {}   # host -> [tokens, last refill time]
+        self._locks = {}
+
+    async def acquire(self, host):
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            bucket = self._buckets.setdefault(host, [self.burst, time.monotonic()])
+            while True:
+                now = time.monotonic()
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+                if bucket[0] >= 1:
+                    bucket[0] -= 1
+                    return
+                await asyncio.sleep((1 - bucket[0]) / self.rate)
+
+
+class AsyncForecastFetcher:
+    def __init__(self, concurrency=16, timeout=15, retries=3, backoff=0.5, rate_per_host=20.0,
+                 cache=None):
+        self.concurrency = concurrency
+        self.timeout = timeout            # seconds per request (connect and read)
+        self.retries = retries            # extra attempts after the first failure
+        self.backoff = backoff            # base delay, doubled on every retry
+        self.rate_limiter = HostRateLimiter(rate_per_host)
+        self.cache = cache
+        self.failures = {}                # location index -> final exception
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    async def _get_json(self, url, semaphore):
+        """Forecast payload at `url`; only connection errors and RETRY_STATUSES are retried"""
+        loop = asyncio.get_running_loop()
+        host = urlparse(url).netloc
+        for attempt in range(self.retries + 1):
+            try:
+                async with semaphore:
+                    await self.rate_limiter.acquire(host)
+                    with METRICS.stage("fetch"):
+                        response = await loop.run_in_executor(
+                            self._executor, lambda: self.session.get(url, timeout=self.timeout))
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+            else:
+                # Other error statuses and bad bodies raise here without another attempt
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return forecast_payloads(response)[0]
+            METRICS.count("fetch_retries")
+            # Exponential backoff with jitter so retries from many tasks do not line up
+            await asyncio.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+
+    async def _fetch_one(self, index, lat, lon, semaphore):
+        if self.cache is not None and self.cache.offline:
+            try:
+                return index, self.cache.fetch(lat, lon)
+            except LookupError as exc:
+                self.failures[index] = exc
+                return index, None
+        if self.cache is not None:
+            payload = self.cache.get(lat, lon)
+            if payload is not None:
+                self.cache.record_hits()
+                return index, payload
+            self.cache.record_misses()
+        try:
+            payload = await self._get_json(forecast_url(lat, lon), semaphore)
+        except requests.RequestException as exc:
+            self.failures[index] = exc
+            return index, None
+        if self.cache is not None:
+            self.cache.put(lat, lon, payload, evict=False)
+        return index, payload
+
+    async def fetch_each(self, locations):
+        """Yield (index, payload) for each (lat, lon) in `locations` as responses arrive.
+
+        Locations that still fail after all retries, or have no cached payload in offline
+        mode, are skipped and recorded in `failures`.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = [asyncio.ensure_future(self._fetch_one(i, lat, lon, semaphore))
+                 for i, (lat, lon) in enumerate(locations)]
+        try:
+            for done in asyncio.as_completed(tasks):
+                index, payload = await done
+                if payload is not None:
+                    yield index, payload
+        finally:
+            for task in tasks:
+                task.cancel()
+            if self.cache is not None:
+                self.cache.evict()
+
+    async def fetch_all(self, locations):
+        """Fetch every location; returns payloads in input order (None for failures)"""
+        payloads = [None] * len(locations)
+        async for index, payload in self.fetch_each(locations):
+            payloads[index] = payload
+        return payloads
@@ -0,0 +1,313 @@
+import argparse
+import calendar
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+
+from forecast_stream import NDJSONWriter
+from instrumentation import METRICS
+from regions import PROFILE_ARRAYS, REGION_IDS, REGION_PROFILES, THRESHOLD_FIELDS, classify_climate_zones
+from seedability_engine import HOURLY_COLUMNS, score_hours
+from synthetic_forecast import synthetic_columns, synthetic_observed
+
+# Backtesting of the seedability model against observed rainfall. An archive is a directory
+# of memory-mapped .npy columns shaped (years, locations, hours of the year), one per engine
+# input plus the observed rain, with a manifest naming the years and cell coordinates.
+# The backtest replays it year by year in chunks of locations: every chunk is scored in one
+# batched score_hours() pass (each location with its climate zone's profile, optionally
+# with overridden thresholds) and reduced straight to per-region, per-month counts, so
+# memory stays at one chunk whatever the archive size.
+#
+# Every hour is a yes/no forecast of rain: seedable hours forecast it, and the observation
+# is rain of at least `rain_threshold` mm. Hits, false alarms and misses give the hit rate
+# (probability of detection) and false alarm ratio; expected rain (potential mm x
+# probability) against the rain observed in the seedable hours gives the rainfall bias.
+
+ARCHIVE_VERSION = 1
+HOURS_PER_YEAR = 366 * 24           # every year is padded to a leap year; padding is NaN
+OBSERVED = "observed_mm"
+ARCHIVE_COLUMNS = tuple(HOURLY_COLUMNS.values()) + (OBSERVED,)
+# Precipitation input may be absent (scored as dry, like hourly_arrays()); the rest must be finite
+REQUIRED_COLUMNS = tuple(name for name in ARCHIVE_COLUMNS if name != "precipitation")
+
+CHUNK_HOURS = 1_000_000             # location hours scored per batched call
+RAIN_THRESHOLD = 0.1                # mm in an hour that count as observed rain
+
+COUNTS = ("hours", "hits", "false_alarms", "misses", "expected_mm", "observed_mm")
+
+
+def year_hours(year):
+    """HOURS_PER_YEAR hourly datetime64 values from January 1st of `year`"""
+    return np.datetime64(f"{year}-01-01T00:00") + np.arange(HOURS_PER_YEAR) * np.timedelta64(60, "m")
+
+
+def create_archive(path, years, latitudes, longitudes, dtype="float32", columns=ARCHIVE_COLUMNS):
+    """Create an empty archive and return its columns as writable memmaps.
+
+    Callers fill every [year, location, hour] cell; the hours past the end of non-leap
+    years are set to NaN here. float32 storage halves the disk reads of a backtest.
+    """
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    shape = (len(years), len(latitudes), HOURS_PER_YEAR)
+    arrays = {}
+    for name in columns:
+        arrays[name] = np.lib.format.open_memmap(os.path.join(path, name + ".npy"), mode="w+",
+                                                 dtype=dtype, shape=shape)
+        for y, year in enumerate(years):
+            if not calendar.isleap(year):
+                arrays[name][y, :, 365 * 24:] = np.nan
+    manifest = {
+        "version": ARCHIVE_VERSION,
+        "years": [int(year) for year in years],
+        "latitude": [float(lat) for lat in latitudes],
+        "longitude": [float(lon) for lon in longitudes],
+        "columns": list(columns),
+    }
+    with open(os.path.join(path, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+    return arrays
+
+
+class HourlyArchive:
+    """Read-only view of an archive; columns are memory-mapped on first access"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "manifest.json"), "r") as f:
+            self.manifest = json.load(f)
+        self.years = self.manifest["years"]
+        self.latitudes = np.array(self.manifest["latitude"])
+        self.longitudes = np.array(self.manifest["longitude"])
+        self.regions = classify_climate_zones(self.latitudes, self.longitudes)
+        self._columns = {}
+
+    def __contains__(self, name):
+        return name in self.manifest["columns"]
+
+    def __getitem__(self, name):
+        if name not in self._columns:
+            self._columns[name] = np.load(os.path.join(self.path, name + ".npy"), mmap_mode="r")
+        return self._columns[name]
+
+    @property
+    def cell_hours(self):
+        return len(self.years) * len(self.latitudes) * HOURS_PER_YEAR
+
+
+def threshold_overrides(settings, region_ids):
+    """score_hours() `thresholds` for {(region name or None, field): value} settings.
+
+    A None region applies to every region; region-specific settings win. Values come out
+    per location, shaped (locations, 1) to broadcast over the hours.
+    """
+    fields = {}
+    # Settings for every region first, so region-specific ones overwrite them
+    for (region, field), value in sorted(settings.items(), key=lambda item: item[0][0] is not None):
+        if field not in THRESHOLD_FIELDS:
+            raise KeyError(f"Unknown threshold {field!r}")
+        values = fields.setdefault(field, np.array(PROFILE_ARRAYS[field]))
+        values[slice(None) if region is None else REGION_IDS[region]] = value
+    return {field: values[region_ids][:, None] for field, values in fields.items()}
+
+
+def backtest(archive, settings=None, rain_threshold=RAIN_THRESHOLD, chunk_hours=CHUNK_HOURS, progress=None):
+    """Replay an HourlyArchive through the scoring model.
+
+    `settings` override profile thresholds (see threshold_overrides). `progress` is called
+    with the share of the archive done after every chunk. Returns {name: (regions, 12) array}
+    for every name in COUNTS, summed per region id and month.
+    """
+    result = {name: np.zeros((len(REGION_PROFILES), 12)) for name in COUNTS}
+    n_locations = len(archive.latitudes)
+    step = max(1, chunk_hours // HOURS_PER_YEAR)
+    done = 0
+    for y, year in enumerate(archive.years):
+        times = year_hours(year)
+        month = times.astype("datetime64[M]").astype(np.int64) % 12
+        starts = np.concatenate([[0], np.flatnonzero(month[1:] != month[:-1]) + 1])
+        months = month[starts]
+
+        for first in range(0, n_locations, step):
+            last = min(n_locations, first + step)
+            region_ids = archive.regions[first:last]
+            with METRICS.stage("backtest_read"):
+                rows = {name: np.asarray(archive[name][y, first:last], dtype=float)
+                        for name in ARCHIVE_COLUMNS if name in archive}
+            if "precipitation" not in rows:
+                rows["precipitation"] = np.zeros_like(rows[OBSERVED])
+            rows["time"] = times
+
+            with METRICS.stage("backtest_score"):
+                thresholds = threshold_overrides(settings, region_ids) if settings else None
+                columns = score_hours(rows, region_ids[:, None], thresholds)
+
+            with METRICS.stage("backtest_reduce"):
+                valid = np.ones(rows[OBSERVED].shape, dtype=bool)
+                for name in REQUIRED_COLUMNS:
+                    valid &= np.isfinite(rows[name])
+                seedable = columns["is_seedable"] & valid
+                rain = valid & (rows[OBSERVED] >= rain_threshold)
+                expected = np.where(seedable, columns["precipitation_potential_mm"] *
+                                    columns["precipitation_probability"] / 100, 0.0)
+                observed = np.where(seedable, rows[OBSERVED], 0.0)
+
+                per_hour = {"hours": valid, "hits": seedable & rain, "false_alarms": seedable & ~rain,
+                            "misses": rain & ~seedable, "expected_mm": expected, "observed_mm": observed}
+                for name, values in per_hour.items():
+                    # Month sums per location, folded onto (region, month)
+                    monthly = np.add.reduceat(values, starts, axis=1, dtype=float)
+                    np.add.at(result[name], (region_ids[:, None], months[None, :]), monthly)
+
+            done += (last - first) * HOURS_PER_YEAR
+            METRICS.count("hours_replayed", (last - first) * HOURS_PER_YEAR)
+            if progress:
+                progress(done / archive.cell_hours)
+    return result
+
+
+def _ratio(numerator, denominator):
+    return round(numerator / denominator, 3) if denominator else None
+
+
+def verification_record(counts):
+    """Hit rate, false alarm ratio and bias for one set of summed counts"""
+    hits, false_alarms, misses = counts["hits"], counts["false_alarms"], counts["misses"]
+    return {
+        "hours": int(counts["hours"]),
+        "seedable_hours": int(hits + false_alarms),
+        "hits": int(hits),
+        "false_alarms": int(false_alarms),
+        "misses": int(misses),
+        "hit_rate": _ratio(hits, hits + misses),
+        "false_alarm_ratio": _ratio(false_alarms, hits + false_alarms),
+        "expected_mm": round(float(counts["expected_mm"]), 1),
+        "observed_mm": round(float(counts["observed_mm"]), 1),
+        "rainfall_bias": _ratio(counts["expected_mm"], counts["observed_mm"]),
+    }
+
+
+def backtest_records(result):
+    """Per region with data: a "backtest_month" record per month, then a "backtest_region" total"""
+    records = []
+    for profile in REGION_PROFILES:
+        r = profile.region_id
+        if not result["hours"][r].any():
+            continue
+        for m in range(12):
+            if result["hours"][r, m]:
+                counts = {name: values[r, m] for name, values in result.items()}
+                records.append({"record": "backtest_month", "region_type": profile.name,
+                                "month": m + 1, **verification_record(counts)})
+        counts = {name: values[r].sum() for name, values in result.items()}
+        records.append({"record": "backtest_region", "region_type": profile.name,
+                        **verification_record(counts)})
+    return records
+
+
+def print_report(records):
+    def fmt(value, pattern):
+        return "-" if value is None else format(value, pattern)
+
+    region = None
+    for record in records:
+        if record["region_type"] != region:
+            region = record["region_type"]
+            print(f"\n🌍 {region}")
+            print(f"   {'month':>5} {'hours':>10} {'seedable':>9} {'hit rate':>8} {'FAR':>6} {'bias':>6}")
+        month = calendar.month_abbr[record["month"]] if record["record"] == "backtest_month" else "all"
+        print(f"   {month:>5} {record['hours']:>10} {record['seedable_hours']:>9} "
+              f"{fmt(record['hit_rate'], '.3f'):>8} {fmt(record['false_alarm_ratio'], '.3f'):>6} "
+              f"{fmt(record['rainfall_bias'], '.2f'):>6}")
+
+
+def write_synthetic_archive(path, years, n_locations, seed=0, chunk_hours=CHUNK_HOURS):
+    """Archive of synthetic_forecast data for cells spread over India, for trying the backtest"""
+    rng = np.random.default_rng(seed)
+    arrays = create_archive(path, years, rng.uniform(8, 32, n_locations).round(2),
+                            rng.uniform(68, 97, n_locations).round(2))
+    step = max(1, chunk_hours // HOURS_PER_YEAR)
+    for y, year in enumerate(years):
+        hours = HOURS_PER_YEAR if calendar.isleap(year) else 365 * 24
+        for first in range(0, n_locations, step):
+            last = min(n_locations, first + step)
+            chunk_seed = seed + y * n_locations + first
+            columns = synthetic_columns((last - first) * hours, chunk_seed)
+            columns[OBSERVED] = synthetic_observed(columns, chunk_seed)
+            for name, values in columns.items():
+                arrays[name][y, first:last, :hours] = values.reshape(last - first, hours)
+    for values in arrays.values():
+        values.flush()
+
+
+def parse_setting(text):
+    """FIELD=VALUE or REGION.FIELD=VALUE -> ((region or None, field), value)"""
+    name, _, value = text.partition("=")
+    region, _, field = name.rpartition(".")
+    if region and region not in REGION_IDS:
+        raise argparse.ArgumentTypeError(f"unknown region {region!r}")
+    if field not in THRESHOLD_FIELDS:
+        raise argparse.ArgumentTypeError(f"unknown threshold {field!r}")
+    try:
+        return (region or None, field), float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a number: {value!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest seedability thresholds against observed rainfall")
+    parser.add_argument("archive", help="Archive directory (year x location x hour .npy columns)")
+    parser.add_argument("--set", dest="settings", metavar="[REGION.]FIELD=VALUE", type=parse_setting,
+                        action="append", default=[],
+                        help="Override a profile threshold, e.g. arid.seedability_threshold=45")
+    parser.add_argument("--rain-threshold", type=float, default=RAIN_THRESHOLD,
+                        help="Observed mm in an hour that count as rain")
+    parser.add_argument("--chunk-hours", type=int, default=CHUNK_HOURS, help="Location hours scored per batch")
+    parser.add_argument("--synthetic", nargs=2, type=int, metavar=("YEARS", "LOCATIONS"),
+                        help="First write a synthetic archive of YEARS years (from 2015) x LOCATIONS cells")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Record stage timings and counters to PATH (.prom for Prometheus text, else JSON)")
+    parser.add_argument("--machine", action="store_true",
+                        help="No console report: print the per-region, per-month records as NDJSON")
+    args = parser.parse_args()
+    if args.metrics:
+        METRICS.enable()
+
+    if args.synthetic:
+        years, locations = args.synthetic
+        if not args.machine:
+            print(f"🧪 Writing a synthetic archive: {years} years x {locations} cells → {args.archive}")
+        write_synthetic_archive(args.archive, list(range(2015, 2015 + years)), locations)
+
+    archive = HourlyArchive(args.archive)
+    start = time.perf_counter()
+
+    def progress(share):
+        print(f"\r⏳ {share:.0%} replayed", end="", file=sys.stderr, flush=True)
+
+    result = backtest(archive, dict(args.settings), args.rain_threshold, args.chunk_hours,
+                      None if args.machine else progress)
+    seconds = time.perf_counter() - start
+    records = backtest_records(result)
+
+    if args.machine:
+        writer = NDJSONWriter(sys.stdout)
+        for record in records:
+            writer.write(record)
+    else:
+        print(file=sys.stderr)
+        print(f"📚 {len(archive.years)} years x {len(archive.latitudes)} cells = "
+              f"{archive.cell_hours:,} hours replayed in {seconds:.1f}s")
+        print_report(records)
+    if args.metrics:
+        METRICS.write(args.metrics)
+        if not args.machine:
+            print(f"📈 Metrics saved to {args.metrics}")
+
+
+if __name__ == "__main__":
+    main()
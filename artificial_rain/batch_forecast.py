@@ -0,0 +1,370 @@
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+from collections import defaultdict
+from datetime import datetime
+
+from async_fetch import AsyncForecastFetcher
+from cell_memo import DEFAULT_CELL_SIZE, CellScoreMemo
+from forecast_cache import DEFAULT_CACHE_DIR, ForecastCache
+from forecast_columns import write_forecast_columns
+from forecast_fetch import fetch_forecasts
+from forecast_stream import NDJSONWriter
+from incremental_forecast import load_state, save_state, state_changed, state_path_for
+from instrumentation import METRICS
+from irrigation_planner import plan_record
+from parallel_scoring import score_fleet_parallel
+from pipeline import REPORT_HOURS, WEEK_HOURS, forecast_summary, plan_week, score_forecast
+from regions import REGION_PROFILES, classify_climate_zones, region_id
+
+# Batch mode: score many farms in one process. Farms are fetched through Open-Meteo's
+# multi-coordinate query and grouped by climate zone so each region profile is resolved once per group.
+# Farms sharing a forecast grid cell and zone are fetched and scored once (see cell_memo).
+# With --plans every farm's week is planned as well, and the irrigation_plan records, tagged
+# with their farm_id, are written to fleet_plans.ndjson for plan_rendering.py.
+
+PLANS_FILE = "fleet_plans.ndjson"
+
+# CSV columns and where they land in the user_input_config.json structure
+CSV_FIELDS = {
+    "latitude": ("location", "latitude", float),
+    "longitude": ("location", "longitude", float),
+    "crop_type": ("crop", "type", str),
+    "growth_stage": ("crop", "growth_stage", str),
+    "water_requirement_mm_per_week": ("crop", "water_requirement_mm_per_week", float),
+    "irrigation_type": ("irrigation", "type", str),
+    "max_capacity_mm_per_day": ("irrigation", "max_capacity_mm_per_day", float),
+}
+
+
+def load_farms(path):
+    """Load farms from a JSON list of user_input_config.json-style objects or from a CSV file.
+
+    Every farm gets a `farm_id`; rows without one are numbered in file order.
+    """
+    if path.endswith(".csv"):
+        farms = []
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                farm = {"farm_id": row.get("farm_id") or None}
+                for column, (section, key, cast) in CSV_FIELDS.items():
+                    if row.get(column):
+                        farm.setdefault(section, {})[key] = cast(row[column])
+                farms.append(farm)
+    else:
+        with open(path, "r") as f:
+            farms = json.load(f)
+
+    for i, farm in enumerate(farms):
+        if not farm.get("farm_id"):
+            farm["farm_id"] = f"farm_{i + 1}"
+    return farms
+
+
+def group_by_zone(farms):
+    """Map climate zone -> list of farms in that zone"""
+    zone_ids = classify_climate_zones([farm["location"]["latitude"] for farm in farms],
+                                      [farm["location"]["longitude"] for farm in farms])
+    groups = defaultdict(list)
+    for farm, zone_id in zip(farms, zone_ids.tolist()):
+        groups[REGION_PROFILES[zone_id].name].append(farm)
+    return groups
+
+
+def state_path(state_dir, farm_id):
+    return state_path_for(os.path.join(state_dir, f"{farm_id}_seedable_forecast.json"))
+
+
+def location(farm):
+    return farm["location"]["latitude"], farm["location"]["longitude"]
+
+
+def fetch_locations(farms, memo=None):
+    """(locations to fetch, farms served by each): one per farm, or one per grid cell of `memo`.
+
+    A cell's forecast is fetched for the coordinates of its first farm.
+    """
+    if memo is None:
+        return [location(farm) for farm in farms], [[farm] for farm in farms]
+    farms_by_cell = defaultdict(list)
+    for farm in farms:
+        farms_by_cell[memo.cell(*location(farm))].append(farm)
+    return ([location(group[0]) for group in farms_by_cell.values()],
+            list(farms_by_cell.values()))
+
+
+def fetch_farms(farms, memo=None, cache=None, failures=None):
+    """One payload per farm, in order, fetched once per location of fetch_locations().
+
+    Farms whose forecast could not be fetched get None and their error in `failures`
+    (farm_id -> exception); without a `failures` dict the error is raised.
+    """
+    locations, farms_at = fetch_locations(farms, memo)
+    failed = {} if failures is not None else None
+    payload_of = {}
+    for payload, served in zip(fetch_forecasts(locations, cache=cache, failures=failed), farms_at):
+        for farm in served:
+            payload_of[farm["farm_id"]] = payload
+    for index, exc in (failed or {}).items():
+        for farm in farms_at[index]:
+            failures[farm["farm_id"]] = exc
+    return [payload_of[farm["farm_id"]] for farm in farms]
+
+
+def fetched(farms, payloads):
+    """(farms, payloads) without the farms fetch_farms() has no payload for"""
+    pairs = [(farm, payload) for farm, payload in zip(farms, payloads) if payload is not None]
+    return [farm for farm, _ in pairs], [payload for _, payload in pairs]
+
+
+def score_farm(payload, region, now, state_path=None, memo=None, farm_location=None):
+    """Forecast records for one farm's payload, as HourlyRecords.
+
+    With a `state_path` only changed hours are rescored; returns (records, changed) where
+    `changed` is False when the stored forecast is still current. With a `memo`, the forecast
+    is scored once per grid cell of `farm_location`, incrementally against the stored state
+    of the first farm of the cell to be scored, and each farm's own state decides `changed`.
+    """
+    previous = load_state(state_path) if state_path else None
+    if memo is None:
+        forecast = score_forecast(payload, region, now, previous, incremental=bool(state_path), compact=True)
+        changed = forecast.changed
+    else:
+        # The farms of a cell store the same state, so any one of them can stand for the cell
+        forecast = memo.get(memo.key(*farm_location, region, now, REPORT_HOURS),
+                            lambda: score_forecast(payload, region, now, previous, incremental=True, compact=True))
+        changed = not state_path or state_changed(previous, forecast.state)
+    if state_path and changed:
+        save_state(state_path, forecast.state)
+    return forecast.entries, changed
+
+
+def farm_plan(payload, farm, region, now, memo=None):
+    """plan_record() of a farm's coming week, with its farm_id; None without crop and irrigation needs.
+
+    With a `memo` the week is scored once per grid cell, like the report window.
+    """
+    if ("water_requirement_mm_per_week" not in farm.get("crop", {}) or
+            "max_capacity_mm_per_day" not in farm.get("irrigation", {})):
+        return None
+
+    def score():
+        return score_forecast(payload, region, now, hours=WEEK_HOURS, compact=True)
+
+    forecast = memo.get(memo.key(*location(farm), region, now, WEEK_HOURS), score) if memo else score()
+    entries = forecast.entries.entries()
+    plan = plan_week(entries, farm)
+    return {"farm_id": farm["farm_id"], **plan_record(plan, [entry["datetime"] for entry in entries], farm)}
+
+
+def score_farms(farms, payloads, now=None, state_dir=None, memo=None):
+    """Score every farm against its forecast payload; returns {farm_id: (records, changed)}"""
+    now = now or datetime.now()
+    payload_by_farm = {farm["farm_id"]: payload for farm, payload in zip(farms, payloads)}
+    results = {}
+    for region_type, group in group_by_zone(farms).items():
+        region = region_id(region_type)
+        for farm in group:
+            farm_id = farm["farm_id"]
+            results[farm_id] = score_farm(payload_by_farm[farm_id], region, now,
+                                          state_dir and state_path(state_dir, farm_id), memo, location(farm))
+    return results
+
+
+async def score_farms_streaming(farms, fetcher, now=None, state_dir=None, memo=None, plans=None,
+                                plan_memo=None):
+    """Score farms as their forecasts arrive from an AsyncForecastFetcher.
+
+    With a `memo`, each grid cell is fetched once and its forecast scores all of its farms.
+    With a `plans` list, the farm_plan() of every farm is appended to it as well, scored
+    through `plan_memo`.
+    """
+    now = now or datetime.now()
+    region_of = {}
+    for region_type, group in group_by_zone(farms).items():
+        region = region_id(region_type)
+        for farm in group:
+            region_of[farm["farm_id"]] = region
+
+    locations, farms_at = fetch_locations(farms, memo)
+    results = {}
+    async for index, payload in fetcher.fetch_each(locations):
+        for farm in farms_at[index]:
+            farm_id = farm["farm_id"]
+            results[farm_id] = score_farm(payload, region_of[farm_id], now,
+                                          state_dir and state_path(state_dir, farm_id), memo, location(farm))
+            if plans is not None:
+                plans.append(farm_plan(payload, farm, region_of[farm_id], now, plan_memo))
+    return results
+
+
+def write_plans(plans, farms, output_dir):
+    """Write farm_plan() records to PLANS_FILE in farm order; returns the number written"""
+    order = {farm["farm_id"]: i for i, farm in enumerate(farms)}
+    plans = sorted((plan for plan in plans if plan is not None), key=lambda plan: order[plan["farm_id"]])
+    tmp_path = os.path.join(output_dir, PLANS_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        writer = NDJSONWriter(f)
+        for plan in plans:
+            writer.write(plan)
+    os.replace(tmp_path, os.path.join(output_dir, PLANS_FILE))
+    return len(plans)
+
+
+def write_outputs(results, region_of, output_dir, output_format):
+    """Write score_farms() results in `output_format`; returns (seedable farms, files written)"""
+    seedable_farms = 0
+    written = 0
+    for farm_id, (records, changed) in results.items():
+        if changed and output_format in ("json", "both"):
+            with METRICS.stage("write_json"):
+                data = json.dumps(records.entries(), indent=2)
+                with open(os.path.join(output_dir, f"{farm_id}_seedable_forecast.json"), "w") as f:
+                    f.write(data)
+            METRICS.count("bytes_written", len(data), source="forecast_file")
+            written += 1
+        if records.found:
+            seedable_farms += 1
+    if output_format == "ndjson":
+        # One record per line, tagged with farm and zone so it can be stream-filtered
+        with open(os.path.join(output_dir, "fleet_forecast.ndjson"), "w") as f:
+            writer = NDJSONWriter(f)
+            for farm_id, (records, _) in results.items():
+                for entry in records.entries():
+                    writer.write({"farm_id": farm_id, "region_type": region_of[farm_id], **entry})
+    if output_format in ("columnar", "both"):
+        # One store for the whole fleet, each farm's hours kept as a row range
+        write_forecast_columns(os.path.join(output_dir, "fleet_forecast.cols"),
+                               {farm_id: records for farm_id, (records, _) in results.items()})
+    return seedable_farms, written
+
+
+def run_batch(farms_path, output_dir, cache=None, concurrency=None, incremental=False,
+              output_format="both", machine=False, processes=None, cell_size=DEFAULT_CELL_SIZE, plans=False):
+    """Score every farm in `farms_path` and write the forecasts to `output_dir`.
+
+    With `machine`, nothing is formatted for the console: each farm's forecast_summary()
+    records (tagged with farm_id) and one fleet record are printed as NDJSON instead.
+    With `processes`, farms are scored and written by that many worker processes (see
+    parallel_scoring) and the returned values are (seedable, changed, summary) tuples
+    rather than (records, changed). Farms sharing a `cell_size` grid cell and climate zone
+    are fetched and scored once (with processes, only fetched once); 0 treats every farm apart.
+    With `plans`, each farm's week is also planned and written to PLANS_FILE (see farm_plan()).
+    """
+    farms = load_farms(farms_path)
+    os.makedirs(output_dir, exist_ok=True)
+    state_dir = output_dir if incremental else None
+    groups = group_by_zone(farms)
+    region_of = {farm["farm_id"]: region_type for region_type, group in groups.items() for farm in group}
+    memo = CellScoreMemo(cell_size=cell_size) if cell_size else None
+    # Weeks scored for plans are memoized apart, so the memo stats stay those of the forecasts
+    plan_memo = CellScoreMemo(cell_size=cell_size) if cell_size and plans else None
+    now = datetime.now()
+    failures = {}
+    summaries = None
+    plan_records = [] if plans else None
+    if processes:
+        # Same farm order as score_farms(), so merged outputs match the serial path
+        ordered = [farm for group in groups.values() for farm in group]
+        ordered, payloads = fetched(ordered, fetch_farms(ordered, memo, cache, failures))
+        regions = [region_id(region_of[farm["farm_id"]]) for farm in ordered]
+        results = score_fleet_parallel(ordered, payloads, regions, output_dir, processes, output_format,
+                                       now, state_dir, machine)
+        if plans:
+            plan_records = [farm_plan(payload, farm, region, now, plan_memo)
+                            for farm, payload, region in zip(ordered, payloads, regions)]
+        seedable_farms = sum(seedable for seedable, _, _ in results.values())
+        written = (sum(changed for _, changed, _ in results.values())
+                   if output_format in ("json", "both") else 0)
+        summaries = {farm_id: summary for farm_id, (_, _, summary) in results.items()}
+    else:
+        if concurrency:
+            with AsyncForecastFetcher(concurrency=concurrency, cache=cache) as fetcher:
+                results = asyncio.run(score_farms_streaming(farms, fetcher, now, state_dir, memo, plan_records,
+                                                            plan_memo))
+            _, farms_at = fetch_locations(farms, memo)
+            failures = {farm["farm_id"]: exc for index, exc in fetcher.failures.items()
+                        for farm in farms_at[index]}
+        else:
+            scored, payloads = fetched(farms, fetch_farms(farms, memo, cache, failures))
+            results = score_farms(scored, payloads, now, state_dir, memo)
+            if plans:
+                plan_records = [farm_plan(payload, farm, region_id(region_of[farm["farm_id"]]), now, plan_memo)
+                                for farm, payload in zip(scored, payloads)]
+        seedable_farms, written = write_outputs(results, region_of, output_dir, output_format)
+    planned = write_plans(plan_records, farms, output_dir) if plans else None
+
+    if machine:
+        writer = NDJSONWriter(sys.stdout)
+        for farm_id, error in failures.items():
+            writer.write({"farm_id": farm_id, "record": "fetch_failed", "error": str(error)})
+        if summaries is None:
+            farm_by_id = {farm["farm_id"]: farm for farm in farms}
+            summaries = {farm_id: forecast_summary(records, farm_by_id[farm_id], region_of[farm_id])
+                         for farm_id, (records, _) in results.items()}
+        for farm_id, records in summaries.items():
+            for record in records:
+                writer.write({"farm_id": farm_id, **record})
+        fleet = {"record": "fleet", "farms": len(results), "seedable_farms": seedable_farms,
+                 "written": written, "failed": len(farms) - len(results), "output_dir": output_dir}
+        if plans:
+            fleet.update(plans=planned)
+        if cache is not None:
+            fleet.update(cache_hits=cache.hits, cache_misses=cache.misses)
+        if memo is not None and not processes:
+            fleet.update(memo.stats())
+        writer.write(fleet)
+        return results
+
+    for farm_id, error in failures.items():
+        print(f"⚠️ Forecast fetch failed for {farm_id}: {error}")
+    print(f"✅ Scored {len(results)} farms ({seedable_farms} with seedable hours), "
+          f"{written} forecasts written → {output_dir}")
+    if plans:
+        print(f"🗓️ {planned} irrigation plans → {os.path.join(output_dir, PLANS_FILE)}")
+    if cache is not None:
+        print(f"📦 Forecast cache: {cache.hits} hits, {cache.misses} misses")
+    if memo is not None and not processes:
+        print(f"🧮 Grid cells: {memo.misses} scored for {len(results)} farms "
+              f"({memo.hit_rate:.0%} memo hits, {memo.evictions} evicted)")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch cloud seeding forecast for many farms")
+    parser.add_argument("farms", help="JSON list or CSV file of farms")
+    parser.add_argument("--output-dir", default="batch_forecasts", help="Directory for per-farm forecasts")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Forecast cache directory")
+    parser.add_argument("--offline", action="store_true", help="Use cached forecasts without network access")
+    parser.add_argument("--no-cache", action="store_true", help="Always fetch fresh forecasts")
+    parser.add_argument("--concurrency", type=int, default=0,
+                        help="Fetch per location with this many concurrent requests and score as they arrive")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Rescore only hours whose inputs changed and skip unchanged farms")
+    parser.add_argument("--format", choices=["json", "columnar", "both", "ndjson"], default="both",
+                        help="Per-farm JSON files, one columnar fleet store, both, or one NDJSON fleet file")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="Score and write farms in this many worker processes (shared-memory shards)")
+    parser.add_argument("--cell-size", type=float, default=DEFAULT_CELL_SIZE,
+                        help="Degrees of the grid cell whose farms share one fetch and score (0: per farm)")
+    parser.add_argument("--plans", action="store_true",
+                        help=f"Also plan every farm's week and write its irrigation_plan record to {PLANS_FILE}")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Record stage timings and counters to PATH (.prom for Prometheus text, else JSON)")
+    parser.add_argument("--machine", action="store_true",
+                        help="No console report: print per-farm summaries and a fleet record as NDJSON")
+    args = parser.parse_args()
+    if args.processes and args.concurrency:
+        parser.error("--processes scores after a bulk fetch and cannot be combined with --concurrency")
+    if args.metrics:
+        METRICS.enable()
+    cache = None if args.no_cache else ForecastCache(args.cache_dir, offline=args.offline)
+    run_batch(args.farms, args.output_dir, cache, args.concurrency, args.incremental, args.format,
+              args.machine, args.processes, args.cell_size, args.plans)
+    if args.metrics:
+        METRICS.write(args.metrics)
+        if not args.machine:
+            print(f"📈 Metrics saved to {args.metrics}")
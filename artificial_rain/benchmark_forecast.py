@@ -0,0 +1,288 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from forecast_stream import NDJSONWriter, calendar_predicate, filter_stream, iter_forecast_records
+from irrigation_planner import plan_irrigation_batch
+from pipeline import REPORT_HOURS, farm_region, run_pipeline, score_forecast
+from seedability_engine import score_hours
+from synthetic_forecast import REGION_SITES, location_start, synthetic_arrays, synthetic_payload
+
+# Reproducible benchmarks for the scoring, filtering and planning hot paths, on synthetic
+# Open-Meteo data covering every region and month. Each location size reports throughput,
+# latency, peak traced memory and JSON I/O cost; results can be stored as a baseline and
+# later runs compared against it, so a slower change is flagged. Timings are the median of
+# several measurements, each repeating its work for at least MIN_MEASURE_SECONDS. The per-farm
+# pipeline, JSON and held-memory metrics are measured on up to PIPELINE_SAMPLE farms at every
+# size, and baselines record the host they ran on, as timings only compare on the same machine.
+#
+#   python benchmark_forecast.py                     run and compare with the stored baseline
+#   python benchmark_forecast.py --save-baseline     run and store the results as the baseline
+#   python benchmark_forecast.py --check             exit with status 1 on regressions
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+SIZES = (1, 1000, 100000)
+HOURS = 48                   # forecast window scored per location
+SCORING_CHUNK = 10000        # locations scored per batched call
+PIPELINE_SAMPLE = 1000       # farms run through the per-farm pipeline at each size
+TOLERANCE = 0.25             # allowed slowdown or memory growth before a metric is flagged
+MIN_MEASURE_SECONDS = 0.2    # shortest wall-clock time of one timing measurement
+
+FARM_CONFIG = {
+    "crop": {"type": "wheat", "growth_stage": "flowering", "water_requirement_mm_per_week": 50},
+    "irrigation": {"type": "drip", "max_capacity_mm_per_day": 4.0},
+}
+
+
+def median_time(fn, repeat, min_seconds=MIN_MEASURE_SECONDS):
+    """Median wall-clock seconds per call of fn over `repeat` measurements.
+
+    Each measurement calls fn as many times as it takes to last `min_seconds` (the count is
+    doubled until it does, as timeit's autorange), so quick functions are not timed on the
+    clock's resolution and scheduling noise alone.
+    """
+    calls = 1
+    samples = []
+    while len(samples) < repeat:
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed < min_seconds and not samples:
+            calls *= 2
+            continue
+        samples.append(elapsed / calls)
+    return float(np.median(samples))
+
+
+def peak_memory_mb(fn):
+    """Peak memory traced while running fn (NumPy buffers included), in MB"""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def held_bytes(build):
+    """Bytes still traced after build() returns, i.e. held by what it returned"""
+    tracemalloc.start()
+    try:
+        held = build()   # kept alive until measured
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_scoring(n_locations, repeat):
+    """Batched engine scoring of n_locations x HOURS hours, in chunks of SCORING_CHUNK"""
+    chunks = []
+    for first in range(0, n_locations, SCORING_CHUNK):
+        size = min(SCORING_CHUNK, n_locations - first)
+        chunks.append(synthetic_arrays(size, HOURS, seed=first, first_location=first))
+
+    def score_all():
+        for arrays, region_ids in chunks:
+            score_hours(arrays, region_ids)
+
+    seconds = median_time(score_all, repeat)
+    arrays, region_ids = chunks[0]
+    return {
+        "scoring_hours_per_s": n_locations * HOURS / seconds,
+        "scoring_peak_mb": peak_memory_mb(lambda: score_hours(arrays, region_ids)),
+    }
+
+
+def sample_farms(n_locations):
+    """Config and payload for up to PIPELINE_SAMPLE farms, cycling through regions and months"""
+    farms = []
+    sites = list(REGION_SITES.values())
+    for i in range(min(n_locations, PIPELINE_SAMPLE)):
+        lat, lon = sites[i % len(sites)]
+        start = location_start(i)
+        config = dict(FARM_CONFIG, location={"latitude": lat, "longitude": lon})
+        now = datetime.fromisoformat(str(start))
+        farms.append((config, synthetic_payload(lat, lon, start, hours=168, seed=i), now))
+    return farms
+
+
+def bench_pipeline(n_locations):
+    """Per-farm score -> filter -> plan latency, measured on a sample of farms"""
+    farms = sample_farms(n_locations)
+    latencies = []
+    results = []
+    # The 48-hour report horizon, so timings stay comparable with the stored baselines. Small
+    # samples are run again until MIN_MEASURE_SECONDS is reached, for a stable median.
+    while len(latencies) < len(farms) or sum(latencies) < MIN_MEASURE_SECONDS:
+        config, payload, now = farms[len(latencies) % len(farms)]
+        start = time.perf_counter()
+        result = run_pipeline(config, payload=payload, now=now, hours=REPORT_HOURS)
+        latencies.append(time.perf_counter() - start)
+        if len(results) < len(farms):
+            results.append(result)
+    config, payload, now = farms[0]
+    metrics = {
+        "pipeline_ms_per_farm": 1000 * float(np.median(latencies)),
+        "pipeline_p95_ms": 1000 * float(np.percentile(latencies, 95)),
+        "pipeline_peak_mb": peak_memory_mb(lambda: run_pipeline(config, payload=payload, now=now,
+                                                                hours=REPORT_HOURS)),
+    }
+    return metrics, [result.forecast.entries for result in results]
+
+
+def bench_compact(n_locations):
+    """Memory held by the sampled farms' scored hours as entry dicts and as HourlyRecords"""
+    farms = [(payload, farm_region(config), now) for config, payload, now in sample_farms(n_locations)]
+
+    def held(compact):
+        return [score_forecast(payload, region, now, compact=compact).entries for payload, region, now in farms]
+
+    hours = sum(len(entries) for entries in held(compact=True))
+    return {
+        "entries_bytes_per_hour": held_bytes(lambda: held(compact=False)) / hours,
+        "compact_bytes_per_hour": held_bytes(lambda: held(compact=True)) / hours,
+    }
+
+
+def bench_json_io(forecasts, repeat):
+    """Write and re-read the sampled forecasts as JSON, then stream-filter them"""
+    records = [entry for entries in forecasts for entry in entries]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "seedable_forecast.json")
+
+        def write():
+            with open(path, "w") as f:
+                json.dump(records, f, indent=2)
+
+        def read():
+            with open(path, "r") as f:
+                json.load(f)
+
+        def stream_filter():
+            with open(os.path.join(tmp, "calendar.ndjson"), "w") as f:
+                filter_stream(iter_forecast_records(path), calendar_predicate(), NDJSONWriter(f))
+
+        write_seconds = median_time(write, repeat)
+        read_seconds = median_time(read, repeat)
+        filter_seconds = median_time(stream_filter, repeat)
+        size = os.path.getsize(path)
+    return {
+        "json_write_ms_per_farm": 1000 * write_seconds / len(forecasts),
+        "json_read_ms_per_farm": 1000 * read_seconds / len(forecasts),
+        "json_kb_per_farm": size / 1024 / len(forecasts),
+        "filter_records_per_s": len(records) / filter_seconds,
+    }
+
+
+def bench_planning(n_locations, repeat):
+    rng = np.random.default_rng(n_locations)
+    expected_rain = np.where(rng.random((n_locations, 7)) < 0.4, rng.uniform(0, 6, (n_locations, 7)), 0)
+    requirement = rng.uniform(10, 60, n_locations)
+    capacity = rng.uniform(2, 10, n_locations)
+    seconds = median_time(lambda: plan_irrigation_batch(expected_rain, requirement, capacity), repeat)
+    return {
+        "planning_farms_per_s": n_locations / seconds,
+        "planning_peak_mb": peak_memory_mb(
+            lambda: plan_irrigation_batch(expected_rain, requirement, capacity)),
+    }
+
+
+def run_benchmarks(sizes=SIZES, repeat=3):
+    results = {}
+    for n in sizes:
+        print(f"⏱️ Benchmarking {sample_label(n)}...")
+        metrics = bench_scoring(n, repeat)
+        pipeline_metrics, forecasts = bench_pipeline(n)
+        metrics.update(pipeline_metrics)
+        metrics.update(bench_json_io(forecasts, repeat))
+        metrics.update(bench_compact(n))
+        metrics.update(bench_planning(n, repeat))
+        results[str(n)] = metrics
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "host": platform.node(),
+        "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPU",
+        "pipeline_sample": PIPELINE_SAMPLE,
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance=TOLERANCE):
+    """Metrics worse than the baseline by more than `tolerance`, as (size, metric, old, new)"""
+    regressions = []
+    for size, metrics in current["results"].items():
+        for metric, value in metrics.items():
+            old = baseline["results"].get(size, {}).get(metric)
+            if old is None:
+                continue
+            # Throughput metrics should not drop, every other metric should not grow
+            higher_is_better = metric.endswith("_per_s")
+            worse = value < old / (1 + tolerance) if higher_is_better else value > old * (1 + tolerance)
+            if worse:
+                regressions.append((size, metric, old, value))
+    return regressions
+
+
+def sample_label(n, sample=PIPELINE_SAMPLE):
+    """Size label saying when the per-farm metrics come from a sample"""
+    if n <= sample:
+        return f"{n:,} location(s)"
+    return f"{n:,} locations (pipeline, JSON and memory metrics on a {sample:,}-farm sample)"
+
+
+def print_results(current, baseline=None):
+    for size, metrics in current["results"].items():
+        print(f"\n📊 {sample_label(int(size), current.get('pipeline_sample', PIPELINE_SAMPLE))}")
+        for metric, value in metrics.items():
+            line = f"  {metric:<26} {value:>14,.2f}"
+            old = baseline and baseline["results"].get(size, {}).get(metric)
+            if old:
+                line += f"   (baseline {old:,.2f}, {100 * (value / old - 1):+.0f}%)"
+            print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark forecast scoring, filtering and planning")
+    parser.add_argument("--sizes", default=",".join(str(n) for n in SIZES),
+                        help="Comma-separated location counts")
+    parser.add_argument("--repeat", type=int, default=3, help="Measurements per timing (median is kept)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline results file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="Relative slowdown allowed before a metric is flagged")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if any metric regressed")
+    args = parser.parse_args()
+
+    current = run_benchmarks([int(n) for n in args.sizes.split(",")], args.repeat)
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+    print_results(current, baseline)
+    if baseline and baseline.get("host") != current["host"]:
+        print(f"\n⚠️ Baseline was recorded on {baseline.get('host') or 'an unrecorded host'} "
+              f"({baseline.get('machine')}), this run is on {current['host']}: timings may not compare")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"\n📁 Baseline saved to {args.baseline} ✅")
+    elif baseline:
+        regressions = compare(current, baseline, args.tolerance)
+        for size, metric, old, new in regressions:
+            print(f"⚠️ Regression at {size} location(s): {metric} {old:,.2f} → {new:,.2f}")
+        if not regressions:
+            print(f"\n✅ No regressions beyond {args.tolerance:.0%} of the baseline")
+        if regressions and args.check:
+            sys.exit(1)
@@ -0,0 +1,83 @@
+import threading
+from collections import OrderedDict
+
+from forecast_cache import model_run_time
+from instrumentation import METRICS
+from regions import region_id
+
+# Scored forecasts shared by the farms of one forecast grid cell. Farms in the same cell and
+# climate zone read the same payload and score identically; their crop and irrigation
+# settings only come in after scoring (summaries, plans). CellScoreMemo keys a scored
+# forecast on (snapped grid cell, region profile, forecast model run, window start, hours),
+# so a cell is fetched and scored once and the result is fanned out to every farm in it.
+# The least recently used cells are evicted beyond max_cells.
+#
+# The default cell matches ForecastCache(precision=2), which already serves one payload per
+# 0.01° cell. Open-Meteo's models are coarser than that (about 0.1° for the finest global
+# ones), so a larger cell_size shares more work at the cost of scoring every farm on the
+# forecast fetched for the first farm seen in its cell.
+
+DEFAULT_CELL_SIZE = 0.01
+DEFAULT_MAX_CELLS = 50_000
+
+
+def snap(lat, lon, cell_size=DEFAULT_CELL_SIZE):
+    """Centre of the grid cell containing a location"""
+    return (round(round(lat / cell_size) * cell_size, 6),
+            round(round(lon / cell_size) * cell_size, 6))
+
+
+class CellScoreMemo:
+    def __init__(self, max_cells=DEFAULT_MAX_CELLS, cell_size=DEFAULT_CELL_SIZE):
+        self.max_cells = max_cells
+        self.cell_size = cell_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()   # key -> scored forecast, least recently used first
+        self._lock = threading.Lock()
+
+    def cell(self, lat, lon):
+        return snap(lat, lon, self.cell_size)
+
+    def key(self, lat, lon, region, now, hours):
+        """Memo key of a forecast scored for `hours` hours from `now` at a location"""
+        return (self.cell(lat, lon), region_id(region), model_run_time(),
+                now.strftime("%Y-%m-%dT%H"), hours)
+
+    def get(self, key, score):
+        """The forecast memoized under `key`, calling score() to produce it on a miss.
+
+        Concurrent misses on one key may both score; the last result is kept.
+        """
+        with self._lock:
+            forecast = self._entries.get(key)
+            if forecast is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if forecast is not None:
+            METRICS.count("score_memo_hits")
+            return forecast
+
+        forecast = score()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = forecast
+            self._entries.move_to_end(key)
+            evicted = max(0, len(self._entries) - self.max_cells)
+            for _ in range(evicted):
+                self._entries.popitem(last=False)
+            self.evictions += evicted
+        METRICS.count("score_memo_misses")
+        if evicted:
+            METRICS.count("score_memo_evictions", evicted)
+        return forecast
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {"memo_cells": len(self._entries), "memo_hits": self.hits, "memo_misses": self.misses,
+                "memo_evictions": self.evictions, "memo_hit_rate": round(self.hit_rate, 4)}
@@ -0,0 +1,119 @@
+import numpy as np
+
+from regions import decode_limiting_factors, limiting_factor_mask, region_id
+from seedability_engine import HOURLY_COLUMNS, forecast_entries
+
+# Compact scored hours. A seedable_forecast.json entry is a 19-key dict of boxed numbers and
+# repeated strings, so a fleet of forecasts held in memory is mostly dict overhead.
+# HourlyRecords keeps the same hours as a struct of arrays: raw inputs as float64 next to
+# their uint8 JSON type (ints, floats and nulls come back as they were), the score_hours()
+# columns with cloud type and seeding method as the uint8 cloud code into CLOUD_CLASSES, and
+# the limiting factors as a uint16 bitmask (regions.limiting_factor_mask). Dicts and text
+# are only built at the output boundary, by entries() and limiting_factors(), and match
+# forecast_entries() and limiting_factor_list() exactly.
+
+# JSON type of a raw value, stored per value as uint8
+_FLOAT, _INT, _NULL = 0, 1, 2
+_KINDS = {float: _FLOAT, int: _INT, type(None): _NULL}
+
+# Entry field -> Open-Meteo variable of the raw input it shows
+ENTRY_INPUTS = {
+    "temperature": "temperature_2m",
+    "humidity": "relativehumidity_2m",
+    "dewpoint": "dewpoint_2m",
+    "cloudcover": "cloudcover",
+    "cloudcover_low": "cloudcover_low",
+    "cloudcover_mid": "cloudcover_mid",
+    "cloudcover_high": "cloudcover_high",
+    "pressure": "pressure_msl",
+    "windspeed": "windspeed_10m",
+}
+
+# score_hours() columns kept as rows of one float64 and one bool array, besides cloud_code;
+# the `ensemble` flags of apply_ensemble() are all False for heuristic forecasts
+FLOAT_COLUMNS = ("spread", "estimated_lwc", "seedability_score", "precipitation_potential_mm",
+                 "precipitation_probability")
+FLAG_COLUMNS = ("scored", "is_seedable", "ensemble")
+
+
+def pack_column(values):
+    """float64 values and uint8 JSON kinds for a list of raw numbers"""
+    array = np.array(values)   # lets NumPy infer int / float / object in one C pass
+    if array.dtype.kind in "iu":
+        return array.astype(float), np.full(len(values), _INT, dtype=np.uint8)
+    if array.dtype.kind == "f" and not (array == np.trunc(array)).any():
+        return array, np.full(len(values), _FLOAT, dtype=np.uint8)
+    # Integral values may have been ints or floats (or nulls): look at each one
+    kinds = np.array([_KINDS[type(value)] for value in values], dtype=np.uint8)
+    return np.array(values, dtype=float), kinds
+
+
+def unpack_column(values, kinds):
+    """Raw list again from pack_column() output"""
+    if not kinds.any():
+        return values.tolist()
+    if (kinds == _INT).all():
+        return values.astype(np.int64).tolist()
+    return [None if kind == _NULL else int(value) if kind == _INT else value
+            for value, kind in zip(values.tolist(), kinds.tolist())]
+
+
+class HourlyRecords:
+    """The hours of `hourly` selected by `index`, with their score_hours() `columns`"""
+
+    __slots__ = ("region", "time", "keys", "inputs", "kinds", "values", "flags", "cloud_code", "limiting")
+
+    def __init__(self, hourly, columns, index, region):
+        rows = None if isinstance(index, slice) else list(index)
+
+        def take(values):
+            return values[index] if rows is None else [values[i] for i in rows]
+
+        self.region = region_id(region)
+        self.time = np.array(take(hourly["time"]), dtype="datetime64[m]")
+        self.keys = tuple(key for key in HOURLY_COLUMNS if key in hourly)
+        packed = [pack_column(take(hourly[key])) for key in self.keys]
+        n = len(self.time)
+        self.inputs = np.array([values for values, _ in packed]).reshape(len(self.keys), n)
+        self.kinds = np.array([kinds for _, kinds in packed], dtype=np.uint8).reshape(len(self.keys), n)
+        self.values = np.array([columns[name] for name in FLOAT_COLUMNS], dtype=float).reshape(-1, n)
+        self.flags = np.array([columns.get(name, np.zeros(n, dtype=bool)) for name in FLAG_COLUMNS],
+                              dtype=bool).reshape(-1, n)
+        self.cloud_code = np.array(columns["cloud_code"], dtype=np.uint8)
+        fields = {field: self.inputs[self.keys.index(key)]
+                  for field, key in ENTRY_INPUTS.items() if key in self.keys}
+        self.limiting = limiting_factor_mask(fields, self.cloud_code, self.region)
+
+    def __len__(self):
+        return len(self.time)
+
+    @property
+    def found(self):
+        return bool(self.flags[FLAG_COLUMNS.index("is_seedable")].any())
+
+    @property
+    def nbytes(self):
+        arrays = (self.time, self.inputs, self.kinds, self.values, self.flags, self.cloud_code, self.limiting)
+        return sum(array.nbytes for array in arrays)
+
+    def hourly(self):
+        """Open-Meteo style hourly data of the held hours"""
+        hourly = {"time": np.datetime_as_string(self.time, unit="m").tolist()}
+        for key, values, kinds in zip(self.keys, self.inputs, self.kinds):
+            hourly[key] = unpack_column(values, kinds)
+        return hourly
+
+    def columns(self):
+        """The score_hours() columns forecast_entries() reads"""
+        columns = dict(zip(FLOAT_COLUMNS, self.values))
+        columns.update(zip(FLAG_COLUMNS, self.flags))
+        columns["cloud_code"] = self.cloud_code
+        return columns
+
+    def entries(self):
+        """seedable_forecast.json records, exactly as forecast_entries() builds them"""
+        return forecast_entries(self.hourly(), self.columns(), slice(None))
+
+    def limiting_factors(self, hour):
+        """limiting_factor_list() of one hour, under the region's thresholds"""
+        return decode_limiting_factors(self.limiting[hour], self.region)
@@ -0,0 +1,58 @@
+import numpy as np
+
+from window_ranking import best_in_groups, day_starts
+
+# Daily roll-up of scored hours, for horizons longer than the hourly report. Each calendar
+# day gets its seedable hour count, the best seedable window (the hour with the most
+# expected rain, potential mm x probability) and the day's total seedable potential. All
+# of it comes from already scored columns in a few reduceat passes, so extending the
+# horizon never rescores an hour.
+
+
+def aggregate_daily(datetimes, is_seedable, potential_mm, probability):
+    """Per-day arrays for a chronological forecast.
+
+    Returns a dict with day (datetime64[D]), hours, seedable_hours, window (index of the best
+    seedable hour, -1 when none), expected_rain_mm and probability of that window, and
+    total_potential_mm over the day's seedable hours.
+    """
+    days = np.asarray(datetimes, dtype="datetime64[D]")
+    seedable = np.asarray(is_seedable, dtype=bool)
+    potential = np.where(seedable, np.asarray(potential_mm, dtype=float), 0.0)
+    probability = np.where(seedable, np.asarray(probability, dtype=float), 0.0)
+    expected = potential * probability / 100
+    if len(days) == 0:
+        empty = np.zeros(0)
+        return {"day": days, "hours": empty.astype(np.int64), "seedable_hours": empty.astype(np.int64),
+                "window": empty.astype(np.int64), "expected_rain_mm": empty, "probability": empty,
+                "total_potential_mm": empty}
+    starts = day_starts(days)
+    window = best_in_groups(np.where(seedable, expected, -np.inf), starts)
+    found = window >= 0
+    best = np.where(found, window, 0)
+    return {
+        "day": days[starts],
+        "hours": np.diff(np.append(starts, len(days))),
+        "seedable_hours": np.add.reduceat(seedable.astype(np.int64), starts),
+        "window": window,
+        "expected_rain_mm": np.where(found, expected[best], 0.0),
+        "probability": np.where(found, probability[best], 0.0),
+        "total_potential_mm": np.add.reduceat(potential, starts),
+    }
+
+
+def daily_records(daily, datetimes):
+    """JSON-ready records for aggregate_daily() output; `datetimes` name the best windows"""
+    records = []
+    for d, day in enumerate(daily["day"].astype(str).tolist()):
+        window = int(daily["window"][d])
+        records.append({
+            "date": day,
+            "hours": int(daily["hours"][d]),
+            "seedable_hours": int(daily["seedable_hours"][d]),
+            "best_window": datetimes[window] if window >= 0 else None,
+            "expected_rain_mm": round(float(daily["expected_rain_mm"][d]), 2),
+            "probability": float(daily["probability"][d]),
+            "total_potential_mm": round(float(daily["total_potential_mm"][d]), 2),
+        })
+    return records
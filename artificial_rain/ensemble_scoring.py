@@ -0,0 +1,138 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from instrumentation import METRICS
+from seedability_engine import HOURLY_COLUMNS, score_hours
+
+# Probabilistic scoring over Open-Meteo ensemble members. Every member is scored with the
+# same engine as the deterministic forecast, all members at once as (members, hours)
+# arrays, and the members' answers replace the heuristic precipitation fields:
+#
+#   precipitation_probability   share of members (in %) in which the hour is seedable
+#   precipitation_potential_mm  percentile of the potential over those seedable members
+#
+# Member hours with missing inputs (models that end before the horizon) do not count.
+# Every hour the ensemble covers gets its fields, including hours the deterministic forecast
+# does not find seedable: most members may still be seedable there. Those hours are marked
+# in an `ensemble` column so forecast_entries() shows the members' values (up to 100%)
+# instead of the heuristic ones, which stop at 95% and stay 0 outside seedable hours.
+
+# Members are scored in row blocks spread over threads; NumPy releases the GIL inside the
+# array operations, so the blocks run in parallel
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_PERCENTILE = 50
+
+_MEMBER_KEY = re.compile(r"_member(\d+)$")
+
+
+def member_suffixes(hourly):
+    """Key suffixes of the members in an ensemble `hourly` dict: "" (control), "_member01", ..."""
+    numbers = sorted({int(m.group(1)) for key in hourly if (m := _MEMBER_KEY.search(key))})
+    return [""] + [f"_member{n:02d}" for n in numbers]
+
+
+def ensemble_arrays(hourly, fallback=None):
+    """Engine columns as (members, hours) float64 arrays, plus the 1-D time column.
+
+    A variable the ensemble does not provide (layered cloud cover for some models) is taken
+    from `fallback`, the hourly_arrays() of the deterministic forecast, matched on time.
+    """
+    times = np.array(hourly["time"], dtype="datetime64[m]")
+    suffixes = member_suffixes(hourly)
+    arrays = {"time": times}
+    for key, name in HOURLY_COLUMNS.items():
+        rows = [hourly.get(key + suffix, hourly.get(key)) for suffix in suffixes]
+        if all(row is not None for row in rows):
+            arrays[name] = np.array(rows, dtype=float)
+        elif fallback is not None:
+            position = np.minimum(np.searchsorted(fallback["time"], times), len(fallback["time"]) - 1)
+            column = np.where(fallback["time"][position] == times, fallback[name][position], np.nan)
+            arrays[name] = np.broadcast_to(column, (len(suffixes), len(times)))
+        elif key == "precipitation":
+            arrays[name] = np.zeros((len(suffixes), len(times)))
+        else:
+            raise KeyError(f"Ensemble payload has no {key} and no deterministic fallback")
+    return arrays
+
+
+def score_members(arrays, region, hours=None, workers=DEFAULT_WORKERS):
+    """score_hours() over every member: a dict of (members, hours) columns.
+
+    `hours` selects hour positions (index array or slice); `workers` threads each score a
+    block of members.
+    """
+    hours = slice(None) if hours is None else hours
+    n_members = arrays["temps"].shape[0]
+    selected = {"time": arrays["time"][hours]}
+    for name in HOURLY_COLUMNS.values():
+        selected[name] = arrays[name][:, hours]
+    selected["time"] = np.broadcast_to(selected["time"], selected["temps"].shape)
+
+    blocks = [rows for rows in np.array_split(np.arange(n_members), max(1, min(workers, n_members)))
+              if len(rows)]
+
+    def score_block(rows):
+        return score_hours({name: values[rows] for name, values in selected.items()}, region)
+
+    with METRICS.stage("score_ensemble"):
+        if len(blocks) == 1:
+            results = [score_block(blocks[0])]
+        else:
+            with ThreadPoolExecutor(len(blocks)) as pool:
+                results = list(pool.map(score_block, blocks))
+    METRICS.count("member_hours_scored", selected["temps"].size)
+    return {name: np.concatenate([result[name] for result in results]) for name in results[0]}
+
+
+def ensemble_precipitation(arrays, columns, percentile=DEFAULT_PERCENTILE, hours=None):
+    """(probability %, potential mm) per hour from score_members() columns.
+
+    Both are NaN for hours no member has complete inputs for; the potential is 0 where no
+    member is seedable.
+    """
+    hours = slice(None) if hours is None else hours
+    valid = np.ones(columns["is_seedable"].shape, dtype=bool)
+    for name in HOURLY_COLUMNS.values():
+        if name != "precipitation":
+            valid &= np.isfinite(arrays[name][:, hours])
+    seedable = columns["is_seedable"] & valid
+    members = valid.sum(axis=0)
+    seedable_members = seedable.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        probability = np.where(members > 0, 100 * seedable_members / members, np.nan)
+    potential = np.where(seedable, columns["precipitation_potential_mm"], np.nan)
+    conditional = np.zeros(len(members))
+    some = seedable_members > 0
+    if some.any():
+        conditional[some] = np.nanpercentile(potential[:, some], percentile, axis=0)
+    return probability, np.where(members > 0, conditional, np.nan)
+
+
+def apply_ensemble(columns, times, ensemble, region, fallback=None, percentile=DEFAULT_PERCENTILE,
+                   workers=DEFAULT_WORKERS):
+    """Deterministic score_hours() `columns` for `times` with ensemble precipitation fields.
+
+    Every hour the ensemble covers, seedable or not, gets its probability and percentile
+    potential and is flagged in the bool `ensemble` column; hours it does not cover keep the
+    heuristic values. Returns (columns, members, covered hours).
+    """
+    arrays = ensemble_arrays(ensemble["hourly"], fallback)
+    position = np.minimum(np.searchsorted(arrays["time"], times), len(arrays["time"]) - 1)
+    matched = arrays["time"][position] == times
+    hours = position[matched]
+    member_columns = score_members(arrays, region, hours, workers)
+    probability, potential = ensemble_precipitation(arrays, member_columns, percentile, hours)
+
+    covered = np.zeros(len(times), dtype=bool)
+    covered[matched] = np.isfinite(probability)
+    columns = dict(columns)
+    for name, values in (("precipitation_probability", probability),
+                         ("precipitation_potential_mm", potential)):
+        full = np.zeros(len(times))
+        full[matched] = np.nan_to_num(values)
+        columns[name] = np.where(covered, full, columns[name])
+    columns["ensemble"] = covered
+    return columns, arrays["temps"].shape[0], int(covered.sum())
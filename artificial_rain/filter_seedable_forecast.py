@@ -1,21 +1,65 @@
-import json
-
-# Load full forecast
-with open('seedable_forecast.json', 'r') as f:
-    forecast = json.load(f)
-
-# Filter seedable events
-filtered = [
-    {
-        "datetime": entry["datetime"],
-        "precipitation_potential_mm": entry["precipitation_potential_mm"],
-        "precipitation_probability": entry["precipitation_probability"]
-    }
-    for entry in forecast if entry.get("is_seedable")
-]
-
-# Save the result
-with open('filtered_seedable_forecast.json', 'w') as f:
-    json.dump(filtered, f, indent=2)
-
-print(f"✅ Rain Calendar data ready: {len(filtered)} seedable days saved.")
+import argparse
+import os
+
+from forecast_columns import load_forecast_fields
+from forecast_stream import (NDJSONWriter, StreamingJSONWriter, calendar_predicate, filter_stream,
+                             iter_forecast_records, top_records)
+from instrumentation import METRICS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the rain calendar from seedable forecast hours")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream records from --input (JSON array or NDJSON) with constant memory")
+    parser.add_argument("--input", default="seedable_forecast.json", help="Forecast file to filter")
+    parser.add_argument("--output", default="filtered_seedable_forecast.json", help="Calendar file to write")
+    parser.add_argument("--ndjson-out", action="store_true", help="Write one calendar record per line")
+    parser.add_argument("--min-score", type=float, help="Keep hours with at least this seedability score")
+    parser.add_argument("--start", help="Keep hours at or after this time (e.g. 2025-06-01T00:00)")
+    parser.add_argument("--end", help="Keep hours before this time")
+    parser.add_argument("--region", action="append",
+                        help="Keep hours of farms in this climate zone (repeatable, --stream only)")
+    parser.add_argument("--top", type=int, metavar="K",
+                        help="Keep only the K highest-scoring matching hours (in time order)")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Record stage timings and counters to PATH (.prom for Prometheus text, else JSON)")
+    args = parser.parse_args()
+    if args.metrics:
+        METRICS.enable()
+    if args.region and not args.stream:
+        parser.error("--region needs --stream with a multi-farm input that has region_type")
+
+    # Filter seedable events, plus any optional score/time/region conditions
+    predicate = calendar_predicate(args.min_score, args.start, args.end, args.region)
+
+    if args.stream:
+        records = iter_forecast_records(args.input)
+        METRICS.count("bytes_read", os.path.getsize(args.input), source="forecast_file")
+    else:
+        # Load only the fields the calendar needs (columnar store when available)
+        fields = ["datetime", "precipitation_potential_mm", "precipitation_probability", "is_seedable"]
+        if args.min_score is not None or args.top:
+            fields.append("seedability_score")
+        forecast = load_forecast_fields(fields, args.input)
+        records = (dict(zip(fields, values)) for values in zip(*(forecast[field] for field in fields)))
+
+    if args.top:
+        # Only the best K survive, so memory stays bounded by K even when streaming
+        records = top_records(records, predicate, args.top)
+        predicate = lambda record: True
+
+    # Save the result as records pass the filter
+    with METRICS.stage("filter"), open(args.output, 'w') as f:
+        writer = NDJSONWriter(f) if args.ndjson_out else StreamingJSONWriter(f)
+        count = filter_stream(records, predicate, writer)
+    METRICS.count("bytes_written", os.path.getsize(args.output), source="calendar")
+    METRICS.count("calendar_records", count)
+
+    print(f"✅ Rain Calendar data ready: {count} seedable days saved.")
+    if args.metrics:
+        METRICS.write(args.metrics)
+        print(f"📈 Metrics saved to {args.metrics}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import requests
+
+from forecast_fetch import FORECAST_DAYS, HOURLY_VARIABLES, REQUEST_TIMEOUT, forecast_payloads, forecast_url
+from instrumentation import METRICS
+
+# On-disk cache for Open-Meteo payloads. Entries are keyed on the rounded coordinates, the
+# variable list and the forecast horizon, and are only fresh for the model run they were
+# fetched in and within the TTL.
+# Expired entries are kept as "last good" payloads for offline mode until they age out.
+
+DEFAULT_CACHE_DIR = ".forecast_cache"
+
+# Global models behind Open-Meteo's best_match publish new runs every 6 hours
+MODEL_RUN_INTERVAL_HOURS = 6
+
+
+def model_run_time(now=None, interval_hours=MODEL_RUN_INTERVAL_HOURS):
+    """Start of the model run cycle containing `now` (UTC), as an ISO string"""
+    now = now or datetime.now(timezone.utc)
+    run_hour = now.hour - now.hour % interval_hours
+    return now.strftime("%Y-%m-%dT") + f"{run_hour:02d}:00Z"
+
+
+class CacheMiss(LookupError):
+    """No cached payload for a location while offline"""
+
+
+class ForecastCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl_seconds=3 * 3600, max_entries=5000,
+                 max_age_seconds=2 * 24 * 3600, precision=2, offline=False, keep_in_memory=False):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds            # how long an entry counts as fresh
+        self.max_entries = max_entries            # size bound on the number of cached cells
+        self.max_age_seconds = max_age_seconds    # stale entries older than this are evicted
+        self.precision = precision                # decimals kept when rounding lat/lon
+        self.offline = offline                    # never touch the network, serve last good payloads
+        self._memory = {} if keep_in_memory else None   # path -> entry, for long-running processes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def record_hits(self, n=1):
+        self.hits += n
+        METRICS.count("cache_hits", n)
+
+    def record_misses(self, n=1):
+        self.misses += n
+        METRICS.count("cache_misses", n)
+
+    def cell(self, lat, lon):
+        """Grid cell a location is cached under"""
+        return round(lat, self.precision), round(lon, self.precision)
+
+    def _path(self, lat, lon, variables):
+        cell = "{},{}".format(*self.cell(lat, lon)) + f"|{','.join(variables)}|{FORECAST_DAYS}d"
+        return os.path.join(self.cache_dir, hashlib.sha1(cell.encode()).hexdigest() + ".json")
+
+    def _read(self, path):
+        if self._memory is not None and path in self._memory:
+            return self._memory[path]
+        try:
+            with open(path, "r") as f:
+                data = f.read()
+            METRICS.count("bytes_read", len(data), source="cache")
+            with METRICS.stage("json_parse"):
+                entry = json.loads(data)
+        except (OSError, ValueError):
+            return None
+        if self._memory is not None:
+            self._memory[path] = entry
+        return entry
+
+    def _is_fresh(self, entry, now):
+        return (entry["model_run"] == model_run_time() and
+                now - entry["fetched_at"] < self.ttl_seconds)
+
+    def get(self, lat, lon, variables=HOURLY_VARIABLES):
+        """Fresh cached payload for a location, or None"""
+        entry = self._read(self._path(lat, lon, variables))
+        if entry and self._is_fresh(entry, time.time()):
+            return entry["payload"]
+        return None
+
+    def last_good(self, lat, lon, variables=HOURLY_VARIABLES):
+        """Cached payload for a location however old (the offline fallback), or None"""
+        entry = self._read(self._path(lat, lon, variables))
+        return entry["payload"] if entry else None
+
+    def put(self, lat, lon, payload, variables=HOURLY_VARIABLES, etag=None, last_modified=None,
+            evict=True):
+        if not isinstance(payload, dict) or "hourly" not in payload:
+            raise ValueError("Only forecast payloads with hourly data are cached")
+        entry = {
+            "model_run": model_run_time(),
+            "fetched_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "payload": payload,
+        }
+        path = self._path(lat, lon, variables)
+        tmp_path = path + ".tmp"
+        data = json.dumps(entry)
+        with open(tmp_path, "w") as f:
+            f.write(data)
+        METRICS.count("bytes_written", len(data), source="cache")
+        os.replace(tmp_path, path)
+        if self._memory is not None:
+            self._memory[path] = entry
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """Drop entries past max_age_seconds, then the oldest ones beyond max_entries.
+
+        Safe to run from several threads or processes at once: entries another caller has
+        already removed are skipped.
+        """
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                mtime = os.path.getmtime(path)
+            except FileNotFoundError:
+                continue
+            if now - mtime > self.max_age_seconds:
+                self._remove(path)
+            else:
+                entries.append((mtime, path))
+        if len(entries) > self.max_entries:
+            entries.sort()
+            for _, path in entries[:len(entries) - self.max_entries]:
+                self._remove(path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        if self._memory is not None:
+            self._memory.pop(path, None)
+
+    def fetch(self, lat, lon, session=None):
+        """Return the forecast for a location, going to the network only when needed.
+
+        Fresh entries are served directly. Otherwise the request is made conditional on the
+        stored ETag/Last-Modified, and a 304 just renews the entry. In offline mode, or when
+        the request fails, the last good payload is served instead.
+        """
+        path = self._path(lat, lon, HOURLY_VARIABLES)
+        entry = self._read(path)
+        if entry and (self.offline or self._is_fresh(entry, time.time())):
+            self.record_hits()
+            return entry["payload"]
+        if self.offline:
+            raise CacheMiss(f"No cached forecast for ({lat}, {lon}) in offline mode")
+
+        self.record_misses()
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            response = (session or requests).get(forecast_url(lat, lon), headers=headers,
+                                                 timeout=REQUEST_TIMEOUT)
+            if response.status_code == 304 and entry:
+                payload = entry["payload"]
+            else:
+                payload = forecast_payloads(response)[0]
+        except requests.RequestException:
+            if entry:
+                return entry["payload"]
+            raise
+
+        self.put(lat, lon, payload, etag=response.headers.get("ETag"),
+                 last_modified=response.headers.get("Last-Modified"))
+        return payload
@@ -0,0 +1,250 @@
+import json
+import os
+import shutil
+
+import numpy as np
+
+from compact_forecast import HourlyRecords
+from instrumentation import METRICS
+
+# Compact columnar storage for seedable forecasts. A store is a directory holding one .npy
+# file per field plus a manifest; numeric fields are typed arrays, text fields are small
+# integer codes with a category list, and several farms can share one store. Readers
+# memory-map only the columns they ask for, so nothing else is parsed or copied.
+
+COLUMNAR_SUFFIX = ".cols"
+FORMAT_VERSION = 1
+
+# Field -> storage dtype; "category" fields are stored as codes into a per-store vocabulary
+FIELD_TYPES = {
+    "datetime": "datetime64[m]",
+    "temperature": "float64",
+    "humidity": "float64",
+    "dewpoint": "float64",
+    "spread": "float64",
+    "cloudcover": "float64",
+    "cloudcover_low": "float64",
+    "cloudcover_mid": "float64",
+    "cloudcover_high": "float64",
+    "pressure": "float64",
+    "windspeed": "float64",
+    "cloud_type": "category",
+    "estimated_lwc": "float64",
+    "recommended_seeding_method": "category",
+    "seedability_score": "float64",
+    "is_seedable": "bool",
+    "precipitation_potential_mm": "float64",
+    "precipitation_probability": "float64",
+}
+
+
+def columnar_path_for(json_path):
+    """Columnar store that sits next to a forecast JSON file"""
+    return os.path.splitext(json_path)[0] + COLUMNAR_SUFFIX
+
+
+def _column(field, dtype, values):
+    """(stored array, manifest column entry) of one field"""
+    column = {"file": f"{field}.npy", "dtype": dtype}
+    if dtype == "category":
+        categories = sorted(set(values))
+        lookup = {value: code for code, value in enumerate(categories)}
+        code_type = np.uint8 if len(categories) <= 256 else np.uint16
+        column["categories"] = categories
+        return np.array([lookup[value] for value in values], dtype=code_type), column
+    return np.array(values, dtype=dtype), column
+
+
+def write_forecast_columns(path, forecasts):
+    """Write forecast records to a columnar store.
+
+    `forecasts` is either one list of seedable_forecast.json records or a dict mapping
+    farm_id -> records; rows are stored farm after farm and the manifest keeps each farm's
+    row range. Records may also be HourlyRecords, decoded one farm at a time. The store is
+    replaced as a whole.
+    """
+    with METRICS.stage("write_columns"):
+        if not isinstance(forecasts, dict):
+            forecasts = {None: forecasts}
+
+        farms = []
+        fields = {field: [] for field in FIELD_TYPES}
+        n_rows = 0
+        for farm_id, records in forecasts.items():
+            if isinstance(records, HourlyRecords):
+                records = records.entries()
+            farms.append({"farm_id": farm_id, "start": n_rows, "stop": n_rows + len(records)})
+            n_rows += len(records)
+            for field, values in fields.items():
+                values.extend([record[field] for record in records])
+
+        tmp_path = path + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        manifest = {"version": FORMAT_VERSION, "rows": n_rows, "farms": farms, "columns": {}}
+        for field, dtype in FIELD_TYPES.items():
+            array, column = _column(field, dtype, fields.pop(field))
+            np.save(os.path.join(tmp_path, column["file"]), array)
+            METRICS.count("bytes_written", array.nbytes, source="columnar_store")
+            manifest["columns"][field] = column
+        with open(os.path.join(tmp_path, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+
+
+def update_forecast_columns(path, records):
+    """Bring the single-farm store at `path` up to date with `records`.
+
+    Only the column files whose values changed are rewritten (each replaced atomically),
+    followed by the manifest; without a single-farm store to update, the store is written
+    whole by write_forecast_columns(). Returns the number of column files written.
+    """
+    manifest_path = os.path.join(path, "manifest.json")
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = None
+    if (manifest is None or manifest["version"] != FORMAT_VERSION or
+            [farm["farm_id"] for farm in manifest["farms"]] != [None]):
+        write_forecast_columns(path, records)
+        return len(FIELD_TYPES)
+
+    with METRICS.stage("write_columns"):
+        manifest.update(rows=len(records), farms=[{"farm_id": None, "start": 0, "stop": len(records)}])
+        written = 0
+        for field, dtype in FIELD_TYPES.items():
+            array, column = _column(field, dtype, [record[field] for record in records])
+            file_path = os.path.join(path, column["file"])
+            try:
+                stored = np.load(file_path)
+                unchanged = (manifest["columns"].get(field) == column and stored.dtype == array.dtype and
+                             stored.shape == array.shape and stored.tobytes() == array.tobytes())
+            except (OSError, ValueError):
+                unchanged = False
+            if unchanged:
+                continue
+            tmp_path = file_path + ".tmp.npy"
+            np.save(tmp_path, array)
+            os.replace(tmp_path, file_path)
+            METRICS.count("bytes_written", array.nbytes, source="columnar_store")
+            manifest["columns"][field] = column
+            written += 1
+        if written:
+            # Also marks the store as current for load_forecast_fields()
+            tmp_path = manifest_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_path, manifest_path)
+        return written
+
+
+class ForecastColumns:
+    """Read-only view of a columnar store; columns are memory-mapped on first access"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "manifest.json"), "r") as f:
+            self.manifest = json.load(f)
+        self.farms = {farm["farm_id"]: slice(farm["start"], farm["stop"])
+                      for farm in self.manifest["farms"]}
+        self._columns = {}
+
+    def __len__(self):
+        return self.manifest["rows"]
+
+    def codes(self, field):
+        """Raw column as stored (category fields give their integer codes)"""
+        if field not in self._columns:
+            column = self.manifest["columns"][field]
+            self._columns[field] = np.load(os.path.join(self.path, column["file"]), mmap_mode="r")
+        return self._columns[field]
+
+    def __getitem__(self, field):
+        """Column values; category fields are decoded to text"""
+        column = self.manifest["columns"][field]
+        if column["dtype"] == "category":
+            return np.array(column["categories"], dtype=object)[self.codes(field)]
+        return self.codes(field)
+
+    def farm(self, field, farm_id=None):
+        """Column values for one farm of a multi-farm store"""
+        return self[field][self.farms[farm_id]]
+
+
+def merge_forecast_columns(path, shard_paths):
+    """Concatenate multi-farm stores, in order, into one store at `path` and remove them.
+
+    The result is the store write_forecast_columns() would write for all the shards' farms;
+    category codes are remapped onto the merged vocabulary.
+    """
+    with METRICS.stage("merge_columns"):
+        shards = [ForecastColumns(shard_path) for shard_path in shard_paths]
+        farms = []
+        rows = 0
+        for shard in shards:
+            for farm in shard.manifest["farms"]:
+                farms.append({"farm_id": farm["farm_id"], "start": farm["start"] + rows,
+                              "stop": farm["stop"] + rows})
+            rows += len(shard)
+
+        tmp_path = path + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        manifest = {"version": FORMAT_VERSION, "rows": rows, "farms": farms, "columns": {}}
+        for field, dtype in FIELD_TYPES.items():
+            column = {"file": f"{field}.npy", "dtype": dtype}
+            if dtype == "category":
+                vocabularies = [shard.manifest["columns"][field]["categories"] for shard in shards]
+                categories = sorted(set().union(*vocabularies))
+                lookup = {value: code for code, value in enumerate(categories)}
+                code_type = np.uint8 if len(categories) <= 256 else np.uint16
+                remaps = [np.array([lookup[value] for value in vocabulary], dtype=code_type)
+                          for vocabulary in vocabularies]
+                parts = [remap[shard.codes(field)] for remap, shard in zip(remaps, shards)]
+                array = np.concatenate(parts) if parts else np.zeros(0, dtype=code_type)
+                column["categories"] = categories
+            else:
+                parts = [shard.codes(field) for shard in shards]
+                array = np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+            np.save(os.path.join(tmp_path, column["file"]), array)
+            METRICS.count("bytes_written", array.nbytes, source="columnar_store")
+            manifest["columns"][field] = column
+        with open(os.path.join(tmp_path, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+        for shard_path in shard_paths:
+            shutil.rmtree(shard_path, ignore_errors=True)
+
+
+def load_forecast_fields(fields, json_path="seedable_forecast.json"):
+    """Load only `fields` of a forecast as {field: list of values}.
+
+    Uses the columnar store next to `json_path` when it is at least as new as the JSON,
+    and falls back to parsing the JSON otherwise.
+    """
+    with METRICS.stage("load_forecast"):
+        columnar_path = columnar_path_for(json_path)
+        manifest_path = os.path.join(columnar_path, "manifest.json")
+        if os.path.exists(manifest_path) and (
+                not os.path.exists(json_path) or os.path.getmtime(manifest_path) >= os.path.getmtime(json_path)):
+            store = ForecastColumns(columnar_path)
+            loaded = {}
+            for field in fields:
+                values = store[field]
+                if field == "datetime":
+                    values = np.datetime_as_string(values, unit="m")
+                loaded[field] = values.tolist()
+                METRICS.count("bytes_read", store.codes(field).nbytes, source="columnar_store")
+            return loaded
+
+        with open(json_path, "r") as f:
+            data = f.read()
+        METRICS.count("bytes_read", len(data), source="forecast_file")
+        with METRICS.stage("json_parse"):
+            records = json.loads(data)
+        return {field: [record[field] for record in records] for field in fields}
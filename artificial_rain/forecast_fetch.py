@@ -0,0 +1,146 @@
+import os
+
+import requests
+
+from instrumentation import METRICS
+
+# Open-Meteo forecast fetching for one or many coordinates
+
+# OPEN_METEO_URL points every fetch at another endpoint, e.g. a local stub for testing
+FORECAST_URL = os.environ.get("OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+
+# Hourly parameters relevant to cloud seeding
+HOURLY_VARIABLES = [
+    "temperature_2m", "relativehumidity_2m", "dewpoint_2m",
+    "cloudcover", "cloudcover_low", "cloudcover_mid", "cloudcover_high",
+    "pressure_msl", "windspeed_10m", "precipitation",
+]
+
+# Days of hourly data requested: Open-Meteo's full horizon (its own default is 7). Scoring
+# only ever reads the hours it needs, see score_forecast(hours=...)
+FORECAST_DAYS = 16
+
+# Ensemble API (OPEN_METEO_ENSEMBLE_URL overrides it): the same hourly variables for every
+# member of one ensemble model, e.g. icon_seamless with 40 members or gfs_seamless with 30
+ENSEMBLE_URL = os.environ.get("OPEN_METEO_ENSEMBLE_URL", "https://ensemble-api.open-meteo.com/v1/ensemble")
+ENSEMBLE_MODEL = "icon_seamless"
+
+# Open-Meteo accepts comma-separated coordinate lists; chunk them to keep URLs short
+MAX_LOCATIONS_PER_REQUEST = 100
+
+# Seconds before a forecast request is given up
+REQUEST_TIMEOUT = 30
+
+
+class ForecastError(requests.RequestException):
+    """The forecast API answered without a usable forecast"""
+
+
+def forecast_url(lats, lons):
+    """Build the forecast URL for one coordinate or for parallel lists of coordinates"""
+    if isinstance(lats, (list, tuple)):
+        lats = ",".join(str(v) for v in lats)
+        lons = ",".join(str(v) for v in lons)
+    return (f"{FORECAST_URL}?latitude={lats}&longitude={lons}&hourly={','.join(HOURLY_VARIABLES)}"
+            f"&forecast_days={FORECAST_DAYS}&timezone=auto")
+
+
+def forecast_payloads(response, count=1):
+    """The `count` forecast payloads of a response, checked before anything uses or caches them.
+
+    Error statuses, unparsable bodies and payloads without an hourly block with its time
+    column raise a requests.RequestException (ForecastError for the last two).
+    """
+    response.raise_for_status()
+    METRICS.count("bytes_read", len(response.content), source="network")
+    with METRICS.stage("json_parse"):
+        try:
+            data = response.json()
+        except ValueError as exc:
+            raise ForecastError(f"Unreadable forecast response: {exc}") from exc
+    # A single coordinate comes back as an object, several as a list
+    data = data if isinstance(data, list) else [data]
+    if len(data) != count:
+        raise ForecastError(f"Expected {count} forecasts, got {len(data)}")
+    for payload in data:
+        if not isinstance(payload, dict) or "time" not in (payload.get("hourly") or {}):
+            reason = payload.get("reason") if isinstance(payload, dict) else None
+            raise ForecastError(f"Response without hourly data: {reason or payload!r}"[:200])
+    return data
+
+
+def fetch_forecast(lat, lon, cache=None):
+    """Fetch the hourly forecast payload for a single location, through `cache` if given"""
+    with METRICS.stage("fetch"):
+        if cache is not None:
+            return cache.fetch(lat, lon)
+        return forecast_payloads(requests.get(forecast_url(lat, lon), timeout=REQUEST_TIMEOUT))[0]
+
+
+def ensemble_url(lat, lon, model=ENSEMBLE_MODEL):
+    return (f"{ENSEMBLE_URL}?latitude={lat}&longitude={lon}&hourly={','.join(HOURLY_VARIABLES)}"
+            f"&models={model}&forecast_days={FORECAST_DAYS}&timezone=auto")
+
+
+def fetch_ensemble(lat, lon, model=ENSEMBLE_MODEL):
+    """Fetch the ensemble payload (every member's hourly variables) for a single location.
+
+    Checked like forecast payloads (see forecast_payloads), so a partial response fails here
+    rather than while the members are scored.
+    """
+    with METRICS.stage("fetch"):
+        return forecast_payloads(requests.get(ensemble_url(lat, lon, model), timeout=REQUEST_TIMEOUT))[0]
+
+
+def fetch_forecasts(locations, chunk_size=MAX_LOCATIONS_PER_REQUEST, cache=None, failures=None):
+    """Fetch forecasts for a list of (lat, lon) pairs with multi-coordinate queries.
+
+    Locations with a fresh entry in `cache` are served from it (all of them in offline
+    mode); the rest are fetched and stored. When a request fails, its locations fall back to
+    their last good cached payload. Locations left without a payload (or offline cache
+    misses) raise the error, unless a `failures` dict is given: they are then recorded in it
+    (location index -> exception, as AsyncForecastFetcher.failures) and their payload is
+    None. Returns one payload per location, in order.
+    """
+    payloads = [None] * len(locations)
+    missing = []
+    for i, (lat, lon) in enumerate(locations):
+        if cache is not None and cache.offline:
+            try:
+                payloads[i] = cache.fetch(lat, lon)
+            except LookupError as exc:
+                if failures is None:
+                    raise
+                failures[i] = exc
+        elif cache is not None and (payload := cache.get(lat, lon)) is not None:
+            cache.record_hits()
+            payloads[i] = payload
+        else:
+            missing.append(i)
+    if cache is not None:
+        cache.record_misses(len(missing))
+
+    with requests.Session() as session:
+        for start in range(0, len(missing), chunk_size):
+            chunk = [locations[i] for i in missing[start:start + chunk_size]]
+            url = forecast_url([lat for lat, _ in chunk], [lon for _, lon in chunk])
+            try:
+                with METRICS.stage("fetch"):
+                    response = session.get(url, timeout=REQUEST_TIMEOUT)
+                data = forecast_payloads(response, len(chunk))
+            except requests.RequestException as exc:
+                stale = [cache.last_good(lat, lon) if cache is not None else None for lat, lon in chunk]
+                if failures is None and any(payload is None for payload in stale):
+                    raise
+                for i, payload in zip(missing[start:start + chunk_size], stale):
+                    payloads[i] = payload
+                    if payload is None:
+                        failures[i] = exc
+                continue
+            for i, (lat, lon), payload in zip(missing[start:start + chunk_size], chunk, data):
+                payloads[i] = payload
+                if cache is not None:
+                    cache.put(lat, lon, payload, evict=False)
+    if cache is not None and missing:
+        cache.evict()
+    return payloads
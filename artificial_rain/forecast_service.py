@@ -0,0 +1,250 @@
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import forecast_fetch
+from cell_memo import CellScoreMemo
+from forecast_cache import DEFAULT_CACHE_DIR, CacheMiss, ForecastCache
+from forecast_stream import calendar_predicate
+from instrumentation import METRICS
+from irrigation_planner import DAYS
+from pipeline import REPORT_HOURS, WEEK_HOURS, daily_outlook, filter_calendar, plan_week, score_forecast
+from regions import determine_climate_zone
+
+# Resident forecast service. One process keeps the region tables, a pooled upstream session
+# and the forecast cache (in memory as well as on disk) warm, and serves scoring, irrigation
+# plans and rain calendar data over HTTP. Concurrent requests for the same grid cell share a
+# single upstream fetch, and a scored forecast is reused by every request for its cell, zone,
+# model run and window (see cell_memo).
+#
+#   GET /health                                   service and cache counters
+#   GET /metrics                                  stage timings and counters (Prometheus text,
+#                                                 needs --metrics)
+#   GET /forecast?lat=..&lon=..[&days]            scored forecast (seedable_forecast.json), 48 hours
+#                                                 or `days` days (up to 16) plus their daily outlook
+#   GET /calendar?lat=..&lon=..[&min_score&start&end]
+#                                                 rain calendar (filtered_seedable_forecast.json)
+#   GET /plan?lat=..&lon=..[&requirement&capacity&max_seeding_days]
+#                                                 weekly seeding and irrigation plan
+#
+# lat/lon and the crop settings default to the farm in user_input_config.json when present.
+# Invalid query parameters get a 400, a failed upstream fetch a 502, a location with no
+# cached forecast in offline mode a 503 and anything else going wrong while scoring a 500.
+
+
+class BadRequest(ValueError):
+    """A missing or invalid query parameter"""
+
+
+def _param(query, name, convert, default=None):
+    """Query parameter `name` converted with `convert`, raising BadRequest when unusable"""
+    value = query.get(name, default)
+    if value is None:
+        raise BadRequest(f"missing {name}")
+    try:
+        return convert(value)
+    except (TypeError, ValueError):
+        raise BadRequest(f"invalid {name}: {value!r}") from None
+
+
+class ForecastService:
+    def __init__(self, cache, default_config=None, pool_size=16):
+        self.cache = cache
+        self.default_config = default_config or {}
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.requests = 0
+        self.coalesced = 0            # requests that waited on another request's fetch
+        self._inflight = {}           # grid cell -> Future of the payload being fetched
+        self._lock = threading.Lock()
+        self.memo = CellScoreMemo(cell_size=10 ** -cache.precision)
+
+    def close(self):
+        self.session.close()
+
+    def payload(self, lat, lon):
+        """Forecast payload for a location; one fetch per grid cell however many callers wait"""
+        cell = self.cache.cell(lat, lon)
+        with self._lock:
+            self.requests += 1
+            future = self._inflight.get(cell)
+            leader = future is None
+            if leader:
+                future = self._inflight[cell] = Future()
+            else:
+                self.coalesced += 1
+        if leader:
+            try:
+                future.set_result(self.cache.fetch(lat, lon, self.session))
+            except Exception as exc:
+                future.set_exception(exc)
+            finally:
+                with self._lock:
+                    del self._inflight[cell]
+        return future.result()
+
+    def forecast(self, lat, lon, now=None, hours=REPORT_HOURS):
+        """(region_type, ScoredForecast) for the next `hours` hours at a location"""
+        region_type = determine_climate_zone(lat, lon)
+        now = now or datetime.now()
+        forecast = self.memo.get(self.memo.key(lat, lon, region_type, now, hours),
+                                 lambda: score_forecast(self.payload(lat, lon), region_type, now, hours=hours))
+        return region_type, forecast
+
+    def calendar(self, lat, lon, predicate=None, now=None):
+        _, forecast = self.forecast(lat, lon, now)
+        return filter_calendar(forecast.entries, predicate)
+
+    def plan(self, lat, lon, config, max_seeding_days=None, now=None):
+        _, forecast = self.forecast(lat, lon, now, WEEK_HOURS)
+        plan = plan_week(forecast.entries, config, max_seeding_days)
+        result = {name: values.tolist() for name, values in plan.items()}
+        result["days"] = DAYS
+        return result
+
+    def stats(self):
+        return {"requests": self.requests, "coalesced": self.coalesced,
+                "cache_hits": self.cache.hits, "cache_misses": self.cache.misses, **self.memo.stats()}
+
+
+class ForecastRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == "/metrics":
+            return self._send_text(200, METRICS.to_prometheus())
+        route = {
+            "/health": self._health,
+            "/forecast": self._forecast,
+            "/calendar": self._calendar,
+            "/plan": self._plan,
+        }.get(url.path)
+        if route is None:
+            return self._send(404, {"error": f"Unknown path {url.path}"})
+        try:
+            self._send(200, route(query))
+        except BadRequest as exc:
+            self._send(400, {"error": f"Bad request: {exc}"})
+        except CacheMiss as exc:
+            self._send(503, {"error": str(exc)})
+        except requests.RequestException as exc:
+            self._send(502, {"error": f"Upstream forecast failed: {exc}"})
+        except Exception as exc:
+            self.log_error("%s failed: %r", url.path, exc)
+            self._send(500, {"error": f"Forecast processing failed: {exc!r}"})
+
+    def _send(self, status, body):
+        self._send_text(status, json.dumps(body), "application/json")
+
+    def _send_text(self, status, text, content_type="text/plain; version=0.0.4"):
+        data = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        # rain_calendar.html may be opened from anywhere
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def _location(self, query):
+        location = self.service.default_config.get("location", {})
+        lat = _param(query, "lat", float, location.get("latitude"))
+        lon = _param(query, "lon", float, location.get("longitude"))
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise BadRequest(f"location ({lat}, {lon}) is out of range")
+        return lat, lon
+
+    def _health(self, query):
+        return {"status": "ok", **self.service.stats()}
+
+    def _forecast(self, query):
+        if "days" not in query:
+            region_type, forecast = self.service.forecast(*self._location(query))
+            return {"region_type": region_type, "found": forecast.found, "entries": forecast.entries}
+        days = _param(query, "days", int)
+        if not 1 <= days <= forecast_fetch.FORECAST_DAYS:
+            raise BadRequest(f"days must be between 1 and {forecast_fetch.FORECAST_DAYS}")
+        region_type, forecast = self.service.forecast(*self._location(query), hours=days * 24)
+        return {"region_type": region_type, "found": forecast.found, "entries": forecast.entries,
+                "daily": daily_outlook(forecast.entries)}
+
+    def _calendar(self, query):
+        for name in ("start", "end"):
+            if name in query:
+                _param(query, name, datetime.fromisoformat)
+        predicate = calendar_predicate(
+            _param(query, "min_score", float) if "min_score" in query else None,
+            query.get("start"), query.get("end"))
+        return self.service.calendar(*self._location(query), predicate)
+
+    def _plan(self, query):
+        defaults = self.service.default_config
+        config = {
+            "crop": {"water_requirement_mm_per_week": _param(
+                query, "requirement", float, defaults.get("crop", {}).get("water_requirement_mm_per_week"))},
+            "irrigation": {"max_capacity_mm_per_day": _param(
+                query, "capacity", float, defaults.get("irrigation", {}).get("max_capacity_mm_per_day"))},
+        }
+        max_seeding_days = _param(query, "max_seeding_days", int) if "max_seeding_days" in query else None
+        return self.service.plan(*self._location(query), config, max_seeding_days)
+
+
+def make_server(service, host="127.0.0.1", port=8080, verbose=False):
+    server = ThreadingHTTPServer((host, port), ForecastRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.verbose = verbose
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resident cloud seeding forecast service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Forecast cache directory")
+    parser.add_argument("--offline", action="store_true", help="Serve cached forecasts without network access")
+    parser.add_argument("--upstream", help="Forecast API URL, e.g. a local Open-Meteo stub")
+    parser.add_argument("--config", default="user_input_config.json",
+                        help="Farm used when requests leave out location or crop settings")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    parser.add_argument("--metrics", action="store_true", help="Record stage timings and counters for /metrics")
+    args = parser.parse_args()
+    if args.metrics:
+        METRICS.enable()
+
+    if args.upstream:
+        forecast_fetch.FORECAST_URL = args.upstream
+    default_config = None
+    if os.path.exists(args.config):
+        with open(args.config, "r") as f:
+            default_config = json.load(f)
+
+    cache = ForecastCache(args.cache_dir, offline=args.offline, keep_in_memory=True)
+    service = ForecastService(cache, default_config)
+    server = make_server(service, args.host, args.port, args.verbose)
+    print(f"🌐 Forecast service listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
@@ -0,0 +1,193 @@
+import json
+import textwrap
+
+from window_ranking import TopWindows
+
+# Streaming access to forecast files that may be far larger than memory: records are decoded
+# one at a time from a JSON array or NDJSON file, filtered by composable predicates and
+# written out as they go, so memory use does not grow with the input size.
+
+CHUNK_SIZE = 1 << 16
+
+CALENDAR_FIELDS = ("datetime", "precipitation_potential_mm", "precipitation_probability")
+
+
+def iter_json_array(f, chunk_size=CHUNK_SIZE):
+    """Yield the elements of a top-level JSON array from a text file, one at a time.
+
+    A file that is not a JSON array, or ends before the array does, raises ValueError.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    eof = False
+    while True:
+        # Skip whitespace and separators between elements
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer) or eof:
+                break
+            chunk = f.read(chunk_size)
+            buffer, position = chunk, 0
+            eof = not chunk
+        if position >= len(buffer):
+            raise ValueError("Unterminated JSON array" if started else "Expected a JSON array")
+        if not started:
+            if buffer[position] != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            position += 1
+            continue
+        if buffer[position] == "]":
+            return
+        try:
+            record, end = decoder.raw_decode(buffer, position)
+            complete = end < len(buffer) or eof
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+        if not complete:
+            # Element may continue past the buffer: read more and retry
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield record
+        position = end
+
+
+def iter_ndjson(f):
+    """Yield one record per non-empty line of an NDJSON file"""
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_forecast_records(path):
+    """Stream records from a forecast file, either a JSON array or NDJSON"""
+    with open(path, "r") as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == "[":
+            yield from iter_json_array(f)
+        else:
+            yield from iter_ndjson(f)
+
+
+# Predicates: each returns a function record -> bool
+
+def is_seedable():
+    return lambda record: bool(record.get("is_seedable"))
+
+
+def min_score(score):
+    return lambda record: record.get("seedability_score", 0) >= score
+
+
+def time_range(start=None, end=None):
+    """Records with start <= datetime < end; ISO strings compare in time order"""
+    return lambda record: ((start is None or record["datetime"] >= start) and
+                           (end is None or record["datetime"] < end))
+
+
+def in_region(*region_types):
+    regions = set(region_types)
+    return lambda record: record.get("region_type") in regions
+
+
+def all_of(*predicates):
+    return lambda record: all(predicate(record) for predicate in predicates)
+
+
+def any_of(*predicates):
+    return lambda record: any(predicate(record) for predicate in predicates)
+
+
+def calendar_predicate(score=None, start=None, end=None, regions=None):
+    """Seedable hours, optionally with a minimum score, a time range and climate zones"""
+    predicates = [is_seedable()]
+    if score is not None:
+        predicates.append(min_score(score))
+    if start or end:
+        predicates.append(time_range(start, end))
+    if regions:
+        predicates.append(in_region(*regions))
+    return all_of(*predicates)
+
+
+def calendar_record(record):
+    """The rain calendar's view of a record (farm_id is kept for multi-farm inputs)"""
+    entry = {"farm_id": record["farm_id"]} if "farm_id" in record else {}
+    entry.update({field: record[field] for field in CALENDAR_FIELDS})
+    return entry
+
+
+def record_text(record):
+    """A record as it appears inside json.dump(records, f, indent=2) output"""
+    return textwrap.indent(json.dumps(record, indent=2), "  ")
+
+
+def join_record_texts(texts):
+    """json.dump(records, f, indent=2) output from the record_text() of each record"""
+    return "[\n" + ",\n".join(texts) + "\n]" if texts else "[]"
+
+
+def split_record_texts(text):
+    """record_text() of each record of a json.dump(records, f, indent=2) file of flat records"""
+    if text == "[]":
+        return []
+    texts = text[2:-2].split(",\n  {\n")
+    return texts[:1] + ["  {\n" + record for record in texts[1:]]
+
+
+class StreamingJSONWriter:
+    """Write records one by one, byte-identical to json.dump(records, f, indent=2)"""
+
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
+
+    def write(self, record):
+        self.f.write("[\n" if self.count == 0 else ",\n")
+        self.f.write(record_text(record))
+        self.count += 1
+
+    def close(self):
+        self.f.write("\n]" if self.count else "[]")
+
+
+class NDJSONWriter:
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
+
+    def write(self, record):
+        self.f.write(json.dumps(record) + "\n")
+        self.count += 1
+
+    def close(self):
+        pass
+
+
+def filter_stream(records, predicate, writer, transform=calendar_record):
+    """Write transform(record) for every record matching predicate; returns the count"""
+    for record in records:
+        if predicate(record):
+            writer.write(transform(record))
+    writer.close()
+    return writer.count
+
+
+def top_records(records, predicate, k, key="seedability_score"):
+    """The k matching records with the highest `key`, kept in a bounded heap and returned in input order"""
+    ranking = TopWindows(k)
+    for position, record in enumerate(records):
+        if predicate(record):
+            ranking.push(record[key], (position, record))
+    return [record for _, record in sorted(item for _, item in ranking.best())]
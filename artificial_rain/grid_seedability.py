@@ -0,0 +1,265 @@
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+import numpy as np
+
+from forecast_cache import ForecastCache
+from forecast_fetch import fetch_forecasts
+from instrumentation import METRICS
+from pipeline import REPORT_HOURS
+from regions import CLOUD_CLASSES, REGION_PROFILES, ZONE_BOXES, classify_climate_zones
+from seedability_engine import HOURLY_COLUMNS, forecast_window, score_hours
+from synthetic_forecast import synthetic_columns
+
+# Gridded seedability maps. A domain (a state's climate zone box or any bounding box) is cut
+# into a regular lat/lon grid, and the grid into square tiles. One tile at a time is fetched,
+# scored in a single score_hours() pass with every cell's climate zone, and written out, so
+# memory stays at one tile whatever the domain size.
+#
+# Output is a directory a map client can read lazily: manifest.json describes the grid, the
+# hours and the tile layout, and h<hour>/<tile row>_<tile col>.bin holds one tile for one
+# hour as consecutive little-endian blocks, one per field, each tile_size x tile_size cells in
+# row-major order (row 0 is the northern edge). Cells outside the grid or without data hold
+# the field's nodata value.
+
+GRID_VERSION = 1
+DEFAULT_STEP = 0.1
+TILE_SIZE = 32
+
+# (field, dtype, scale, nodata): stored value = round(value / scale)
+TILE_FIELDS = (
+    ("seedability_score", "<u1", 1, 255),
+    ("is_seedable", "<u1", 1, 255),
+    ("precipitation_probability", "<u1", 1, 255),
+    ("precipitation_potential_mm", "<u2", 0.01, 65535),
+    ("cloud_code", "<u1", 1, 255),
+)
+
+
+def state_bbox(name):
+    """(south, north, west, east) of a named climate zone box, e.g. Rajasthan or Maharashtra"""
+    for box in ZONE_BOXES:
+        if box.name.lower() == name.lower() and np.isfinite(box.lon_range).all():
+            return box.lat_range + box.lon_range
+    names = ", ".join(box.name for box in ZONE_BOXES if np.isfinite(box.lon_range).all())
+    raise KeyError(f"Unknown state {name!r} (choose from {names})")
+
+
+class Grid:
+    """Regular lat/lon grid over a bounding box, cut into tile_size x tile_size tiles"""
+
+    def __init__(self, south, north, west, east, step=DEFAULT_STEP, tile_size=TILE_SIZE):
+        self.step = step
+        self.tile_size = tile_size
+        self.north = north
+        self.west = west
+        # Rows run north to south and columns west to east; both edges are included
+        self.rows = int(round((north - south) / step)) + 1
+        self.cols = int(round((east - west) / step)) + 1
+        self.tile_rows = -(-self.rows // tile_size)
+        self.tile_cols = -(-self.cols // tile_size)
+
+    @property
+    def cells(self):
+        return self.rows * self.cols
+
+    def tiles(self):
+        return [(tr, tc) for tr in range(self.tile_rows) for tc in range(self.tile_cols)]
+
+    def tile_coordinates(self, tile_row, tile_col):
+        """Latitudes and longitudes of a tile's cells inside the grid, each (rows, cols)"""
+        r0, c0 = tile_row * self.tile_size, tile_col * self.tile_size
+        rows = np.arange(r0, min(r0 + self.tile_size, self.rows))
+        cols = np.arange(c0, min(c0 + self.tile_size, self.cols))
+        lats = np.round(self.north - rows * self.step, 6)
+        lons = np.round(self.west + cols * self.step, 6)
+        return np.meshgrid(lats, lons, indexing="ij")
+
+
+def fetched_inputs(lats, lons, hours, now, cache=None):
+    """Engine input columns shaped (cells, hours) from Open-Meteo, and the hour times.
+
+    Every cell is aligned on the first cell's forecast window; missing hours are NaN.
+    """
+    payloads = fetch_forecasts(list(zip(lats.tolist(), lons.tolist())), cache=cache)
+    first = payloads[0]["hourly"]["time"]
+    times = first[forecast_window(first, now, hours)]
+    rows = {name: np.full((len(payloads), len(times)), np.nan) for name in HOURLY_COLUMNS.values()}
+    for i, payload in enumerate(payloads):
+        hourly = payload["hourly"]
+        try:
+            start = hourly["time"].index(times[0])
+        except ValueError:
+            continue
+        for key, name in HOURLY_COLUMNS.items():
+            values = hourly.get(key)
+            if values is None and key == "precipitation":
+                values = [0] * len(hourly["time"])
+            values = np.array(values[start:start + len(times)], dtype=float)
+            rows[name][i, :len(values)] = values
+    rows["time"] = np.array(times, dtype="datetime64[m]")
+    return rows
+
+
+def synthetic_inputs(lats, lons, hours, now, seed=0):
+    """synthetic_forecast data shaped like fetched_inputs(), for trying the grid offline"""
+    start = np.datetime64(now.strftime("%Y-%m-%dT%H:00"), "m")
+    columns = synthetic_columns(len(lats) * hours, seed + int(abs(lats[0] * 1000 + lons[0])))
+    rows = {name: values.reshape(len(lats), hours) for name, values in columns.items()}
+    rows["time"] = start + np.arange(hours) * np.timedelta64(60, "m")
+    return rows
+
+
+def encode_tile(columns, valid, shape, tile_size):
+    """Packed bytes per hour for one tile's score_hours() columns, each (cells, hours)"""
+    hours = columns["seedability_score"].shape[1]
+    blocks = []
+    for field, dtype, scale, nodata in TILE_FIELDS:
+        values = np.where(valid, np.round(columns[field] / scale), nodata)
+        # Hour-major, so each hour's block is one contiguous slice
+        tile = np.full((hours, tile_size, tile_size), nodata, dtype=dtype)
+        tile[:, :shape[0], :shape[1]] = values.T.reshape((hours,) + shape)
+        blocks.append(tile)
+    return [b"".join(block[h].tobytes() for block in blocks) for h in range(hours)]
+
+
+def build_grid(grid, output_dir, hours=REPORT_HOURS, now=None, source=fetched_inputs, progress=None):
+    """Score every cell of `grid` for `hours` hours and write the tiles to `output_dir`.
+
+    `source(lats, lons, hours, now)` gives a tile's inputs (see fetched_inputs()). The
+    directory is replaced as a whole once every tile is written. Returns the manifest.
+    """
+    now = now or datetime.now()
+    tmp_dir = output_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    times = None
+    seedable_cells = np.zeros(hours, dtype=np.int64)
+    for done, (tile_row, tile_col) in enumerate(grid.tiles(), 1):
+        lats, lons = grid.tile_coordinates(tile_row, tile_col)
+        with METRICS.stage("grid_inputs"):
+            rows = source(lats.ravel(), lons.ravel(), hours, now)
+        if times is None:
+            times = rows["time"]
+            hours = len(times)
+            seedable_cells = seedable_cells[:hours]
+            for h in range(hours):
+                os.makedirs(os.path.join(tmp_dir, f"h{h:03d}"))
+        with METRICS.stage("grid_score"):
+            # determine_climate_zone() for every cell, as a (cells, 1) column of region ids
+            region_ids = classify_climate_zones(lats.ravel(), lons.ravel())
+            columns = score_hours(rows, region_ids[:, None])
+            valid = np.isfinite(rows["temps"]) & np.isfinite(rows["humidity"]) & np.isfinite(rows["clouds"])
+            seedable_cells += (columns["is_seedable"] & valid).sum(axis=0)
+        with METRICS.stage("grid_write"):
+            for h, data in enumerate(encode_tile(columns, valid, lats.shape, grid.tile_size)):
+                with open(os.path.join(tmp_dir, f"h{h:03d}", f"{tile_row}_{tile_col}.bin"), "wb") as f:
+                    f.write(data)
+        METRICS.count("grid_cells_scored", lats.size * hours)
+        if progress:
+            progress(done, grid.tile_rows * grid.tile_cols)
+
+    manifest = {
+        "version": GRID_VERSION,
+        "north": grid.north, "west": grid.west, "step": grid.step,
+        "rows": grid.rows, "cols": grid.cols,
+        "tile_size": grid.tile_size, "tile_rows": grid.tile_rows, "tile_cols": grid.tile_cols,
+        "tile_path": "h{hour:03d}/{tile_row}_{tile_col}.bin",
+        "hours": np.datetime_as_string(times, unit="m").tolist(),
+        "fields": [{"field": field, "dtype": dtype, "scale": scale, "nodata": nodata}
+                   for field, dtype, scale, nodata in TILE_FIELDS],
+        "cloud_types": [cloud_class.cloud_type for cloud_class in CLOUD_CLASSES],
+        "regions": [profile.name for profile in REGION_PROFILES],
+        "seedable_cells": seedable_cells.tolist(),
+    }
+    with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(tmp_dir, output_dir)
+    return manifest
+
+
+def read_tile(output_dir, manifest, hour, tile_row, tile_col):
+    """{field: (tile_size, tile_size) float array} for one tile and hour; nodata becomes NaN"""
+    size = manifest["tile_size"]
+    path = os.path.join(output_dir, manifest["tile_path"].format(hour=hour, tile_row=tile_row, tile_col=tile_col))
+    with open(path, "rb") as f:
+        data = f.read()
+    fields = {}
+    offset = 0
+    for spec in manifest["fields"]:
+        dtype = np.dtype(spec["dtype"])
+        values = np.frombuffer(data, dtype, size * size, offset).reshape(size, size)
+        fields[spec["field"]] = np.where(values == spec["nodata"], np.nan, values * spec["scale"])
+        offset += dtype.itemsize * size * size
+    return fields
+
+
+def read_hour(output_dir, field, hour):
+    """One field over the whole grid for one hour, as a (rows, cols) array"""
+    with open(os.path.join(output_dir, "manifest.json"), "r") as f:
+        manifest = json.load(f)
+    size = manifest["tile_size"]
+    raster = np.empty((manifest["tile_rows"] * size, manifest["tile_cols"] * size))
+    for tile_row in range(manifest["tile_rows"]):
+        for tile_col in range(manifest["tile_cols"]):
+            tile = read_tile(output_dir, manifest, hour, tile_row, tile_col)[field]
+            raster[tile_row * size:(tile_row + 1) * size, tile_col * size:(tile_col + 1) * size] = tile
+    return raster[:manifest["rows"], :manifest["cols"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gridded seedability maps over a state, as hour x tile files")
+    domain = parser.add_mutually_exclusive_group(required=True)
+    domain.add_argument("--state", help="Climate zone box to cover, e.g. Rajasthan or Maharashtra")
+    domain.add_argument("--bbox", nargs=4, type=float, metavar=("SOUTH", "NORTH", "WEST", "EAST"),
+                        help="Bounding box to cover")
+    parser.add_argument("--step", type=float, default=DEFAULT_STEP, help="Grid spacing in degrees")
+    parser.add_argument("--tile-size", type=int, default=TILE_SIZE, help="Cells per tile side")
+    parser.add_argument("--hours", type=int, default=REPORT_HOURS, help="Forecast hours to map")
+    parser.add_argument("--output-dir", default="seedability_grid", help="Directory for the manifest and tiles")
+    parser.add_argument("--offline", action="store_true", help="Use cached forecasts without network access")
+    parser.add_argument("--no-cache", action="store_true", help="Always fetch fresh forecasts")
+    parser.add_argument("--synthetic", action="store_true", help="Score synthetic inputs instead of fetching")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Record stage timings and counters to PATH (.prom for Prometheus text, else JSON)")
+    args = parser.parse_args()
+    if args.metrics:
+        METRICS.enable()
+
+    try:
+        bbox = state_bbox(args.state) if args.state else tuple(args.bbox)
+    except KeyError as exc:
+        parser.error(exc.args[0])
+    grid = Grid(*bbox, step=args.step, tile_size=args.tile_size)
+    if args.synthetic:
+        source = synthetic_inputs
+    else:
+        # Room for the whole grid next to the farms' entries
+        cache = None if args.no_cache else ForecastCache(offline=args.offline, max_entries=grid.cells + 5000)
+
+        def source(lats, lons, hours, now):
+            return fetched_inputs(lats, lons, hours, now, cache)
+
+    print(f"🗺️ {args.state or 'Bounding box'}: {grid.rows} x {grid.cols} cells at {args.step}°, "
+          f"{grid.tile_rows * grid.tile_cols} tiles of {grid.tile_size}x{grid.tile_size}")
+    start = time.perf_counter()
+
+    def progress(done, total):
+        print(f"\r⏳ {done}/{total} tiles", end="", flush=True)
+
+    manifest = build_grid(grid, args.output_dir, args.hours, source=source, progress=progress)
+    print(f"\r✅ {len(manifest['hours'])} hours x {grid.cells} cells written to {args.output_dir} "
+          f"in {time.perf_counter() - start:.1f}s; "
+          f"peak {max(manifest['seedable_cells'])} seedable cells in an hour")
+    if args.metrics:
+        METRICS.write(args.metrics)
+        print(f"📈 Metrics saved to {args.metrics}")
+
+
+if __name__ == "__main__":
+    main()
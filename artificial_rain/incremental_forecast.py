@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+
+from regions import region_id
+from seedability_engine import score_hours
+
+# Incremental rescoring for hourly polling. The hourly inputs and derived columns of the
+# last run are kept in a small .npz state file; on the next run only hours that are new or
+# whose inputs changed are rescored, and everything else is copied from the stored state.
+# pipeline.save_forecast() also keeps the CRC of the JSON it wrote in the state, so the
+# next run can copy the text of unchanged hours from that file instead of encoding them.
+
+INPUT_COLUMNS = ("temps", "humidity", "dewpoints", "clouds", "clouds_low", "clouds_mid",
+                 "clouds_high", "pressure", "wind", "precipitation")
+DERIVED_COLUMNS = ("spread", "estimated_lwc", "cloud_code", "scored", "seedability_score",
+                   "is_seedable", "precipitation_potential_mm", "precipitation_probability")
+
+
+def state_path_for(forecast_path):
+    """State file stored next to a forecast JSON file"""
+    return os.path.splitext(forecast_path)[0] + "_state.npz"
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as state:
+        return {name: state[name] for name in state.files}
+
+
+def save_state(path, state):
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, **state)
+    os.replace(tmp_path, path)
+
+
+def _same(a, b):
+    # Elementwise equality where two missing values also count as unchanged
+    return (a == b) | (np.isnan(a) & np.isnan(b))
+
+
+def state_changed(previous, state):
+    """True unless `state` has the hours, region and inputs of the `previous` state"""
+    if previous is None or int(previous["region"]) != int(state["region"]):
+        return True
+    if not np.array_equal(previous["time"], state["time"]):
+        return True
+    return not all(_same(previous[name], state[name]).all() for name in INPUT_COLUMNS)
+
+
+def reused_hours(previous, state):
+    """(reuse, source) for the hours of `state`: whether each is unchanged since the
+    `previous` state, and its row there"""
+    times = state["time"]
+    reuse = np.zeros(len(times), dtype=bool)
+    source = np.zeros(len(times), dtype=np.int64)
+    if previous is not None and len(previous["time"]) and int(previous["region"]) == int(state["region"]):
+        prev_times = previous["time"]
+        source = np.minimum(np.searchsorted(prev_times, times), len(prev_times) - 1)
+        reuse = prev_times[source] == times
+        for name in INPUT_COLUMNS:
+            reuse &= _same(state[name], previous[name][source])
+    return reuse, source
+
+
+def score_incremental(arrays, region, window, previous):
+    """Score `window` of `arrays`, reusing hours from the `previous` state that did not change.
+
+    Returns (columns, state, rescored) where `columns` matches score_hours() output for the
+    window, `state` is the state to store for the next run and `rescored` counts scored hours.
+    """
+    region = region_id(region)
+    hours = np.arange(len(arrays["time"]))[window]
+    state = {"time": arrays["time"][hours], "region": np.array(region)}
+    state.update({name: arrays[name][hours] for name in INPUT_COLUMNS})
+    reuse, source = reused_hours(previous, state)
+
+    columns = {}
+    changed = np.flatnonzero(~reuse)
+    rescored = score_hours(arrays, region, index=hours[changed])
+    for name in DERIVED_COLUMNS:
+        values = np.empty(len(hours), dtype=rescored[name].dtype)
+        if reuse.any():
+            values[reuse] = previous[name][source[reuse]]
+        values[changed] = rescored[name]
+        columns[name] = values
+
+    state.update(columns)
+    return columns, state, len(changed)
@@ -0,0 +1,117 @@
+import json
+import threading
+import time
+
+# Opt-in instrumentation shared by the forecast, filter and optimizer code paths. Stages
+# record calls, wall time and process CPU time; counters record things like hours scored,
+# seedable hours per region, cache hits/misses and bytes read and written. Stages may nest
+# (e.g. json_parse inside fetch) and each reports its own inclusive time.
+#
+# Everything goes through the METRICS singleton, which is disabled by default: a disabled
+# stage() hands back one shared no-op context manager and count() returns at once, so the
+# instrumented code pays one attribute check per call. Snapshots export as JSON or in the
+# Prometheus text format.
+
+PROMETHEUS_PREFIX = "skyharvest"
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("metrics", "name", "wall", "cpu")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record_stage(self.name, time.perf_counter() - self.wall,
+                                  time.process_time() - self.cpu)
+        return False
+
+
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def reset(self):
+        self.stages = {}      # stage name -> [calls, wall seconds, cpu seconds]
+        self.counters = {}    # (counter name, sorted label items) -> value
+
+    def stage(self, name):
+        """Context manager timing one run of a stage"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def record_stage(self, name, wall, cpu):
+        with self._lock:
+            totals = self.stages.setdefault(name, [0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += wall
+            totals[2] += cpu
+
+    def count(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def snapshot(self):
+        with self._lock:
+            stages = {name: {"calls": calls, "wall_seconds": wall, "cpu_seconds": cpu}
+                      for name, (calls, wall, cpu) in self.stages.items()}
+            counters = {}
+            for (name, labels), value in self.counters.items():
+                counters.setdefault(name, []).append({"labels": dict(labels), "value": value})
+        return {"stages": stages, "counters": counters}
+
+    def to_prometheus(self, prefix=PROMETHEUS_PREFIX):
+        snapshot = self.snapshot()
+        lines = []
+        for field, help_text in (("calls", "Stage runs"), ("wall_seconds", "Stage wall-clock time"),
+                                 ("cpu_seconds", "Stage process CPU time")):
+            metric = f"{prefix}_stage_{field}_total"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, stage in snapshot["stages"].items():
+                lines.append(f'{metric}{{stage="{name}"}} {stage[field]}')
+        for name, samples in snapshot["counters"].items():
+            metric = f"{prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for sample in samples:
+                labels = ",".join(f'{key}="{value}"' for key, value in sample["labels"].items())
+                lines.append(f"{metric}{{{labels}}} {sample['value']}" if labels else
+                             f"{metric} {sample['value']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write a snapshot: Prometheus text for .prom/.txt paths, JSON otherwise"""
+        with open(path, "w") as f:
+            if path.endswith((".prom", ".txt")):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.snapshot(), f, indent=2)
+
+
+METRICS = Metrics()
@@ -0,0 +1,143 @@
+import numpy as np
+
+from daily_forecast import aggregate_daily
+
+# Weekly irrigation planning. Each farm chooses which days to seed clouds and how much to pump.
+# A seeding day credits the expected rain of its best seedable window (potential mm x
+# probability) against the weekly requirement; it does not take the place of irrigation, so
+# every day, seeded or not, can still pump up to the daily capacity. With only seven days
+# there are 128 possible sets of seeding days, so the solver scores all of them at once for
+# every farm and picks the exact optimum: the smallest unmet requirement first, then the
+# least pumped water, then the fewest seeding days. Pumping goes to unseeded days first.
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Every subset of the week as a (128, 7) mask, and the number of seeding days in each
+SEEDING_SETS = ((np.arange(2 ** 7)[:, None] >> np.arange(7)) & 1).astype(bool)
+SEEDING_SET_SIZES = SEEDING_SETS.sum(axis=1)
+
+
+def weekday_index(datetimes):
+    """Monday=0 .. Sunday=6 for ISO datetime strings or datetime64 values"""
+    days = np.asarray(datetimes, dtype="datetime64[D]").astype(np.int64)
+    return (days + 3) % 7   # 1970-01-01 was a Thursday
+
+
+def best_seeding_windows(datetimes, is_seedable, potential_mm, probability):
+    """Best seedable window on each weekday of a forecast.
+
+    Returns (expected_rain, window) where expected_rain[d] is the expected rainfall in mm of
+    the best seedable hour on weekday d (0 when there is none) and window[d] is the index
+    of that hour in the forecast (-1 when there is none).
+    """
+    daily = aggregate_daily(datetimes, is_seedable, potential_mm, probability)
+    expected_rain = np.zeros(7)
+    window = np.full(7, -1)
+    # Forecasts longer than a week have several days per weekday; the earlier wins ties
+    for day, index, rain in zip(weekday_index(daily["day"]).tolist(), daily["window"].tolist(),
+                                daily["expected_rain_mm"].tolist()):
+        if index >= 0 and (window[day] < 0 or rain > expected_rain[day]):
+            expected_rain[day] = rain
+            window[day] = index
+    return expected_rain, window
+
+
+def plan_irrigation_batch(expected_rain, weekly_requirement, max_per_day, max_seeding_days=None):
+    """Plan a week for many farms at once.
+
+    expected_rain      (farms, 7) expected rain per weekday if that day is seeded
+    weekly_requirement (farms,) mm of water needed over the week
+    max_per_day        (farms,) irrigation capacity in mm per day
+    max_seeding_days   optional limit on seeding days per farm
+
+    Returns a dict of arrays: seeding (farms, 7) bool, irrigation (farms, 7) mm,
+    rainfall (farms,) expected mm, pumped (farms,) mm and shortfall (farms,) mm.
+    """
+    expected_rain = np.atleast_2d(np.asarray(expected_rain, dtype=float))
+    requirement = np.broadcast_to(np.asarray(weekly_requirement, dtype=float), len(expected_rain))
+    capacity = np.broadcast_to(np.asarray(max_per_day, dtype=float), len(expected_rain))
+
+    # Rain and resulting water balance for every farm x seeding set; seeded days keep their
+    # pumping capacity, so the whole week's capacity is available whatever is seeded
+    rainfall = expected_rain @ SEEDING_SETS.T
+    needed = np.maximum(requirement[:, None] - rainfall, 0)
+    available = capacity[:, None] * 7
+    pumped = np.minimum(needed, available)
+    shortfall = needed - pumped
+
+    # Seeding a day without any seedable window is never allowed
+    invalid = (SEEDING_SETS[None, :, :] & (expected_rain[:, None, :] <= 0)).any(axis=2)
+    if max_seeding_days is not None:
+        invalid |= SEEDING_SET_SIZES[None, :] > max_seeding_days
+    shortfall = np.where(invalid, np.inf, shortfall)
+
+    # Lexicographic choice: shortfall, then pumped water, then fewer seeding days
+    best = np.lexsort((np.broadcast_to(SEEDING_SET_SIZES, pumped.shape), pumped, shortfall))[:, 0]
+    farms = np.arange(len(expected_rain))
+    seeding = SEEDING_SETS[best]
+    pumped = pumped[farms, best]
+
+    # Pump at full capacity until the need is met: unseeded days first, then seeded days,
+    # each in week order
+    rank = np.argsort(np.argsort(seeding * 7 + np.arange(7), axis=1), axis=1)
+    irrigation = np.clip(pumped[:, None] - capacity[:, None] * rank, 0, capacity[:, None])
+
+    return {
+        "seeding": seeding,
+        "irrigation": irrigation,
+        "rainfall": rainfall[farms, best],
+        "pumped": pumped,
+        "shortfall": shortfall[farms, best],
+    }
+
+
+def plan_irrigation(expected_rain, weekly_requirement, max_per_day, max_seeding_days=None):
+    """Plan a week for one farm; returns plan_irrigation_batch() results for that farm"""
+    plan = plan_irrigation_batch(np.asarray(expected_rain, dtype=float)[None, :],
+                                 [weekly_requirement], [max_per_day], max_seeding_days)
+    return {name: values[0] for name, values in plan.items()}
+
+
+def plan_record(plan, datetimes, config=None):
+    """JSON-ready summary of a plan_forecast_week() plan; `datetimes` are the forecast hours.
+
+    With the farm's `config` the record also names its crop and growth stage, which is all
+    plan_rendering needs to draw the chart without the forecast.
+    """
+    seeded = [d for d in range(7) if plan["seeding"][d]]
+    record = {
+        "record": "irrigation_plan",
+        "seeding": {DAYS[d]: datetimes[plan["window"][d]] for d in seeded},
+        "seeding_rain_mm": {DAYS[d]: round(float(plan["expected_rain"][d]), 2) for d in seeded},
+        "irrigation_mm": {day: round(float(mm), 2) for day, mm in zip(DAYS, plan["irrigation"])},
+        "expected_rain_mm": round(float(plan["rainfall"]), 2),
+        "pumped_mm": round(float(plan["pumped"]), 2),
+        "shortfall_mm": round(float(plan["shortfall"]), 2),
+    }
+    if config is not None:
+        record["crop"] = config["crop"].get("type", "unknown")
+        record["growth_stage"] = config["crop"].get("growth_stage", "unknown")
+    return record
+
+
+def plan_forecast_week(forecast, weekly_requirement, max_per_day, max_seeding_days=None):
+    """Plan the coming week for one farm from forecast fields ({field: values} or a list of records).
+
+    Returns plan_irrigation() results plus expected_rain and window from best_seeding_windows().
+    """
+    if isinstance(forecast, list):
+        forecast = {field: [entry[field] for entry in forecast] for field in
+                    ("datetime", "is_seedable", "precipitation_potential_mm", "precipitation_probability")}
+    # Only the coming week is planned: longer forecasts stop after 7 calendar days
+    days = np.asarray(forecast["datetime"], dtype="datetime64[D]")
+    if len(days):
+        week = int(np.searchsorted(days, days[0] + 7))
+        forecast = {field: forecast[field][:week] for field in
+                    ("datetime", "is_seedable", "precipitation_potential_mm", "precipitation_probability")}
+    expected_rain, window = best_seeding_windows(
+        forecast["datetime"], forecast["is_seedable"], forecast["precipitation_potential_mm"],
+        forecast["precipitation_probability"])
+    plan = plan_irrigation(expected_rain, weekly_requirement, max_per_day, max_seeding_days)
+    plan["expected_rain"] = expected_rain
+    plan["window"] = window
+    return plan
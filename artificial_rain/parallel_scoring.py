@@ -0,0 +1,208 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from compact_forecast import pack_column, unpack_column
+from forecast_columns import merge_forecast_columns, write_forecast_columns
+from forecast_stream import NDJSONWriter
+from incremental_forecast import load_state, save_state, score_incremental, state_path_for
+from instrumentation import METRICS
+from pipeline import forecast_summary
+from regions import get_region_profile
+from seedability_engine import HOURLY_COLUMNS, forecast_entries, forecast_window, score_hours
+
+# Multi-process scoring for large fleets. The parent packs every farm's forecast window
+# into a handful of fleet-wide columns in shared memory (one block per column, farms back to
+# back), so workers attach to the arrays instead of receiving pickled payloads. Farms are
+# split into contiguous shards; a worker scores a whole shard in one batched pass and writes
+# its own outputs (per-farm JSON, an NDJSON shard, a columnar shard), which the parent then
+# merges in shard order. Only small per-farm summaries travel back through the pool.
+#
+# Results match the serial path byte for byte: scoring is elementwise, and the JSON number
+# type of every raw value (int, float or null) is kept next to the float columns (see
+# compact_forecast.pack_column) so the rebuilt records serialize exactly as the originals.
+
+SHARDS_PER_PROCESS = 4
+
+_worker = {}   # per worker process: attached shared arrays and the run settings
+
+
+class SharedColumns:
+    """Named NumPy columns in shared memory blocks; the creating process unlinks them"""
+
+    def __init__(self, columns=None, spec=None):
+        self.blocks = []
+        self.arrays = {}
+        if columns is not None:
+            self.spec = {}
+            for name, array in columns.items():
+                block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+                self.blocks.append(block)
+                shared = np.ndarray(array.shape, array.dtype, buffer=block.buf)
+                shared[...] = array
+                self.arrays[name] = shared
+                self.spec[name] = (block.name, array.dtype.str, array.shape)
+        else:
+            self.spec = spec
+            for name, (block_name, dtype, shape) in spec.items():
+                block = shared_memory.SharedMemory(name=block_name)
+                self.blocks.append(block)
+                self.arrays[name] = np.ndarray(shape, dtype, buffer=block.buf)
+
+    def close(self, unlink=False):
+        self.arrays = {}
+        for block in self.blocks:
+            block.close()
+            if unlink:
+                block.unlink()
+        self.blocks = []
+
+
+def pack_fleet(farms, payloads, regions, now):
+    """Fleet-wide engine columns for every farm's forecast window, farm after farm.
+
+    Returns (columns, offsets) where farm i owns rows offsets[i]:offsets[i + 1]; raw value
+    columns carry a "<name>_kind" companion with the JSON type of each value.
+    """
+    raw = {key: [] for key in HOURLY_COLUMNS}
+    times = []
+    offsets = [0]
+    for payload in payloads:
+        hourly = payload["hourly"]
+        window = forecast_window(hourly["time"], now)
+        hours = hourly["time"][window]
+        times.extend(hours)
+        for key, values in raw.items():
+            values.extend(hourly[key][window] if key in hourly else [0] * len(hours))
+        offsets.append(offsets[-1] + len(hours))
+
+    offsets = np.array(offsets, dtype=np.int64)
+    columns = {"time": np.array(times, dtype="datetime64[m]"),
+               "region": np.repeat(np.asarray(regions, dtype=np.int64), np.diff(offsets))}
+    for key, name in HOURLY_COLUMNS.items():
+        columns[name], columns[name + "_kind"] = pack_column(raw.pop(key))
+    return columns, offsets
+
+
+def _attach(spec, settings):
+    _worker["shared"] = SharedColumns(spec=spec)
+    _worker.update(settings)
+
+
+def _score_shard(task):
+    """Score farms [start, stop) and write their outputs; returns per-farm summaries"""
+    shard, start, stop = task
+    arrays = _worker["shared"].arrays
+    offsets = _worker["offsets"]
+    farm_ids = _worker["farm_ids"]
+    output_dir = _worker["output_dir"]
+    output_format = _worker["output_format"]
+    state_dir = _worker["state_dir"]
+    lo, hi = int(offsets[start]), int(offsets[stop])
+    rows = {name: values[lo:hi] for name, values in arrays.items()}
+
+    if state_dir is None:
+        # The whole shard in one batched pass, each hour with its farm's region profile
+        shard_columns = score_hours(rows, rows["region"])
+
+    ndjson = None
+    if output_format == "ndjson":
+        ndjson = open(os.path.join(output_dir, f".shard_{shard:05d}.ndjson"), "w")
+        writer = NDJSONWriter(ndjson)
+    shard_forecasts = {}
+    summaries = []
+    for farm in range(start, stop):
+        farm_id = farm_ids[farm]
+        a, b = int(offsets[farm]) - lo, int(offsets[farm + 1]) - lo
+        region = int(rows["region"][a]) if b > a else _worker["regions"][farm]
+        if state_dir is None:
+            columns = {name: values[a:b] for name, values in shard_columns.items()}
+            changed = True
+        else:
+            farm_rows = {name: values[a:b] for name, values in rows.items()}
+            path = state_path_for(os.path.join(state_dir, f"{farm_id}_seedable_forecast.json"))
+            previous = load_state(path)
+            columns, state, rescored = score_incremental(farm_rows, region, slice(None), previous)
+            changed = (rescored > 0 or previous is None or
+                       not np.array_equal(previous["time"], state["time"]))
+            if changed:
+                save_state(path, state)
+
+        hourly = {"time": np.datetime_as_string(rows["time"][a:b], unit="m").tolist()}
+        for key, name in HOURLY_COLUMNS.items():
+            hourly[key] = unpack_column(rows[name][a:b], rows[name + "_kind"][a:b])
+        entries = forecast_entries(hourly, columns, slice(None))
+
+        region_type = get_region_profile(region).name
+        if changed and output_format in ("json", "both"):
+            with open(os.path.join(output_dir, f"{farm_id}_seedable_forecast.json"), "w") as f:
+                f.write(json.dumps(entries, indent=2))
+        if ndjson is not None:
+            for entry in entries:
+                writer.write({"farm_id": farm_id, "region_type": region_type, **entry})
+        if output_format in ("columnar", "both"):
+            shard_forecasts[farm_id] = entries
+        summary = (forecast_summary(entries, _worker["configs"][farm], region_type)
+                   if _worker["machine"] else None)
+        summaries.append((farm_id, bool(columns["is_seedable"].any()), changed, summary))
+
+    if ndjson is not None:
+        ndjson.close()
+    if output_format in ("columnar", "both"):
+        write_forecast_columns(os.path.join(output_dir, f".shard_{shard:05d}.cols"), shard_forecasts)
+    return summaries
+
+
+def score_fleet_parallel(farms, payloads, regions, output_dir, processes, output_format="both",
+                         now=None, state_dir=None, machine=False, shards_per_process=SHARDS_PER_PROCESS):
+    """Score farms (in order) across `processes` worker processes and write their outputs.
+
+    `regions` are the farms' region ids. Writes what run_batch() writes for `output_format`
+    and returns {farm_id: (seedable, changed, forecast_summary() records or None)}.
+    """
+    with METRICS.stage("pack"):
+        columns, offsets = pack_fleet(farms, payloads, regions, now)
+    shared = SharedColumns(columns)
+    del columns
+    n_shards = max(1, min(len(farms), processes * shards_per_process))
+    bounds = np.linspace(0, len(farms), n_shards + 1).astype(int)
+    tasks = [(shard, int(bounds[shard]), int(bounds[shard + 1])) for shard in range(n_shards)]
+    settings = {
+        "offsets": offsets,
+        "farm_ids": [farm["farm_id"] for farm in farms],
+        "regions": list(regions),
+        "configs": farms if machine else None,
+        "output_dir": output_dir,
+        "output_format": output_format,
+        "state_dir": state_dir,
+        "machine": machine,
+    }
+    results = {}
+    try:
+        with METRICS.stage("score_parallel"), ProcessPoolExecutor(
+                processes, initializer=_attach, initargs=(shared.spec, settings)) as pool:
+            for summaries in pool.map(_score_shard, tasks):
+                for farm_id, seedable, changed, summary in summaries:
+                    results[farm_id] = (seedable, changed, summary)
+    finally:
+        shared.close(unlink=True)
+    METRICS.count("hours_scored", int(offsets[-1]))
+
+    # Merge the shards in order
+    with METRICS.stage("merge"):
+        if output_format == "ndjson":
+            with open(os.path.join(output_dir, "fleet_forecast.ndjson"), "wb") as out:
+                for shard, _, _ in tasks:
+                    path = os.path.join(output_dir, f".shard_{shard:05d}.ndjson")
+                    with open(path, "rb") as f:
+                        while chunk := f.read(1 << 20):
+                            out.write(chunk)
+                    os.remove(path)
+        if output_format in ("columnar", "both"):
+            merge_forecast_columns(os.path.join(output_dir, "fleet_forecast.cols"),
+                                   [os.path.join(output_dir, f".shard_{shard:05d}.cols")
+                                    for shard, _, _ in tasks])
+    return results
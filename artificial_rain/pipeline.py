@@ -0,0 +1,319 @@
+import json
+import os
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+
+from compact_forecast import HourlyRecords
+from daily_forecast import aggregate_daily, daily_records
+from ensemble_scoring import DEFAULT_PERCENTILE, DEFAULT_WORKERS, apply_ensemble
+from forecast_columns import columnar_path_for, update_forecast_columns
+from forecast_fetch import fetch_forecast
+from forecast_stream import (calendar_predicate, calendar_record, join_record_texts, record_text,
+                           split_record_texts)
+from incremental_forecast import reused_hours, save_state, score_incremental, state_changed
+from instrumentation import METRICS
+from irrigation_planner import plan_forecast_week
+from regions import determine_climate_zone, get_region_profile, limiting_factor_list
+from seedability_engine import hourly_arrays, score_hours, forecast_entries, forecast_window
+from window_ranking import best_contiguous_window, top_entries, top_k
+
+# Library API for the whole farm pipeline: fetch -> score -> filter -> plan -> render.
+# Every stage takes and returns in-memory structures, so a long-running process can run
+# the pipeline end to end without writing or re-reading seedable_forecast.json; files are
+# only written by save_forecast() when asked. The command line scripts are thin wrappers
+# around these stages.
+
+# Hours in the hourly report, and the horizon the weekly plan needs
+REPORT_HOURS = 48
+WEEK_HOURS = 7 * 24
+
+
+@dataclass(slots=True)
+class ScoredForecast:
+    entries: list           # seedable_forecast.json records for the forecast window (HourlyRecords if compact)
+    columns: dict           # score_hours() columns for the same hours
+    state: dict = None      # incremental state for the next run (incremental scoring only)
+    changed: bool = True    # False when an incremental run found nothing new
+    rescored: int = 0       # hours actually scored
+    members: int = 0        # ensemble members behind the precipitation fields (0: heuristic)
+    reused: object = None   # per hour, its row in the previous state, or -1 where rescored
+    state_changed: bool = True   # False when the stored state is still current
+
+    @property
+    def found(self):
+        return bool(self.columns["is_seedable"].any())
+
+
+@dataclass(slots=True)
+class PipelineResult:
+    config: dict
+    region_type: str
+    forecast: ScoredForecast
+    calendar: list
+    plan: dict
+    figure: object = None
+
+
+def load_config(path="user_input_config.json"):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def farm_region(config):
+    """Climate zone of a user_input_config.json-style farm"""
+    return determine_climate_zone(config["location"]["latitude"], config["location"]["longitude"])
+
+
+def fetch(config, cache=None):
+    """Open-Meteo payload for the farm's location"""
+    return fetch_forecast(config["location"]["latitude"], config["location"]["longitude"], cache)
+
+
+def score_forecast(payload, region, now=None, previous=None, incremental=False, hours=REPORT_HOURS,
+                   ensemble=None, percentile=DEFAULT_PERCENTILE, workers=DEFAULT_WORKERS, compact=False,
+                   previous_entries=None):
+    """Score the next `hours` hours of a payload for a region (name or id).
+
+    With `incremental`, hours unchanged since the `previous` state are reused and the new
+    state is returned on the result for the next call; consecutive runs over overlapping
+    horizons only score the hours that are new or changed, and given the `previous_entries`
+    scored with that state, only their entries are built. An `ensemble` payload (see
+    ensemble_scoring) replaces the heuristic precipitation probability and potential. With
+    `compact`, the entries are held as HourlyRecords and only decoded when asked.
+    """
+    with METRICS.stage("score"):
+        hourly = payload["hourly"]
+        window = forecast_window(hourly["time"], now or datetime.now(), hours)
+        arrays = hourly_arrays(hourly)
+        reused = None
+        if incremental:
+            columns, state, rescored = score_incremental(arrays, region, window, previous)
+            changed = state_changed(previous, state)
+            reuse, source = reused_hours(previous, state)
+            reused = np.where(reuse, source, -1)
+        else:
+            columns = score_hours(arrays, region, index=window)
+            state, changed, rescored = None, True, len(columns["is_seedable"])
+        state_is_new = changed
+        members = 0
+        if ensemble is not None:
+            # Members are rescored every run, so the output always changes with them
+            columns, members, _ = apply_ensemble(columns, arrays["time"][window], ensemble, region,
+                                                 arrays, percentile, workers)
+            changed, reused = True, None
+        patchable = (reused is not None and previous_entries is not None and
+                     len(previous_entries) == len(previous["time"]))
+        if compact:
+            entries = HourlyRecords(hourly, columns, window, region)
+        elif patchable:
+            entries = patch_entries(hourly, columns, window, reused, previous_entries)
+        else:
+            entries = forecast_entries(hourly, columns, window)
+    if METRICS.enabled:
+        region_type = get_region_profile(region).name
+        METRICS.count("hours_scored", rescored, region=region_type)
+        METRICS.count("seedable_hours", int(columns["is_seedable"].sum()), region=region_type)
+    return ScoredForecast(entries, columns, state, changed, rescored, members, reused, state_is_new)
+
+
+def patch_entries(hourly, columns, window, reused, previous_entries):
+    """Entries for the window, copying reused hours from `previous_entries` and building the rest"""
+    rebuild = reused < 0
+    rows = np.arange(len(hourly["time"]))[window][rebuild]
+    built = iter(forecast_entries(hourly, {name: values[rebuild] for name, values in columns.items()}, rows))
+    return [previous_entries[row] if row >= 0 else next(built) for row in reused.tolist()]
+
+
+def daily_outlook(entries):
+    """Per-day records (see daily_forecast) rolled up from scored entries"""
+    with METRICS.stage("aggregate_daily"):
+        datetimes = [entry["datetime"] for entry in entries]
+        daily = aggregate_daily(datetimes, [entry["is_seedable"] for entry in entries],
+                                [entry["precipitation_potential_mm"] for entry in entries],
+                                [entry["precipitation_probability"] for entry in entries])
+        return daily_records(daily, datetimes)
+
+
+def filter_calendar(entries, predicate=None):
+    """Rain calendar records (filtered_seedable_forecast.json) for the matching entries"""
+    predicate = predicate or calendar_predicate()
+    with METRICS.stage("filter"):
+        return [calendar_record(entry) for entry in entries if predicate(entry)]
+
+
+def plan_week(entries, config, max_seeding_days=None):
+    """Weekly seeding and irrigation plan for the farm (see irrigation_planner)"""
+    with METRICS.stage("plan"):
+        return plan_forecast_week(entries, config["crop"]["water_requirement_mm_per_week"],
+                                  config["irrigation"]["max_capacity_mm_per_day"], max_seeding_days)
+
+
+def render(plan, config, path=None):
+    """Plot the plan; with `path` the figure is saved there and closed"""
+    # matplotlib is only needed when a plan is actually rendered
+    import matplotlib.pyplot as plt
+    from visualize_irrigation_plan import plot_irrigation_plan
+
+    with METRICS.stage("render"):
+        figure = plot_irrigation_plan(plan, config)
+        if path:
+            figure.savefig(path)
+            plt.close(figure)
+    return figure
+
+
+def forecast_summary(entries, config, region_type, top=5, closest=3, block_hours=3):
+    """Structured version of the forecast report, as a list of records.
+
+    A "summary" record with totals is followed by the `top` best seedable windows and the
+    best run of `block_hours` consecutive seedable hours, or by the `closest` near misses
+    and their limiting factors when nothing is seedable. `entries` may be HourlyRecords,
+    whose limiting factor masks are then decoded instead of checking each entry again.
+    """
+    compact = entries if isinstance(entries, HourlyRecords) else None
+    if compact is not None:
+        entries = compact.entries()
+
+    crop = config.get("crop", {})
+    seedable = [entry for entry in entries if entry["is_seedable"]]
+    total_potential = sum(entry["precipitation_potential_mm"] for entry in seedable)
+    weekly_requirement = crop.get("water_requirement_mm_per_week", 0)
+    records = [{
+        "record": "summary",
+        "region_type": region_type,
+        "latitude": config.get("location", {}).get("latitude"),
+        "longitude": config.get("location", {}).get("longitude"),
+        "crop": crop.get("type", "unknown"),
+        "growth_stage": crop.get("growth_stage", "unknown"),
+        "hours": len(entries),
+        "seedable_hours": len(seedable),
+        "total_potential_mm": round(total_potential, 1),
+        "requirement_met_pct": (round(total_potential / weekly_requirement * 100, 1)
+                                if seedable and weekly_requirement > 0 else None),
+    }]
+    if seedable:
+        for rank, entry in enumerate(top_entries(entries, top, seedable_only=True), 1):
+            records.append({
+                "record": "best_window",
+                "rank": rank,
+                "datetime": entry["datetime"],
+                "seedability_score": entry["seedability_score"],
+                "cloud_type": entry["cloud_type"],
+                "recommended_seeding_method": entry["recommended_seeding_method"],
+                "precipitation_potential_mm": entry["precipitation_potential_mm"],
+                "precipitation_probability": entry["precipitation_probability"],
+            })
+        expected = [entry["precipitation_potential_mm"] * entry["precipitation_probability"] / 100
+                    for entry in entries]
+        start, total = best_contiguous_window(expected, block_hours,
+                                              [entry["is_seedable"] for entry in entries])
+        if start >= 0:
+            records.append({
+                "record": "best_block",
+                "hours": block_hours,
+                "start": entries[start]["datetime"],
+                "end": entries[start + block_hours - 1]["datetime"],
+                "expected_rain_mm": round(float(total), 2),
+            })
+    else:
+        thresholds = get_region_profile(region_type).thresholds
+        scores = [entry["seedability_score"] for entry in entries]
+        for rank, hour in enumerate(top_k(scores, closest).tolist(), 1):
+            entry = entries[hour]
+            records.append({
+                "record": "closest_window",
+                "rank": rank,
+                "datetime": entry["datetime"],
+                "seedability_score": entry["seedability_score"],
+                "limiting_factors": compact.limiting_factors(hour) if compact is not None else
+                                    limiting_factor_list(entry, region_type, thresholds["min_cloud"],
+                                                         thresholds["min_humidity"], thresholds["min_wind"]),
+            })
+    return records
+
+
+def _stored_json_crc(state_path):
+    """CRC of the JSON file last saved from the stored state alone, or None"""
+    try:
+        with np.load(state_path) as state:
+            return int(state["json_crc"]) if "json_crc" in state.files else None
+    except (OSError, ValueError):
+        return None
+
+
+def _entry_texts(forecast, previous_texts):
+    """record_text() of each entry, copying reused hours from `previous_texts` when given"""
+    texts = []
+    for i, entry in enumerate(forecast.entries):
+        row = forecast.reused[i] if previous_texts else -1
+        if 0 <= row < len(previous_texts) and previous_texts[row].startswith(
+                f'  {{\n    "datetime": "{entry["datetime"]}"'):
+            texts.append(previous_texts[row])
+        else:
+            texts.append(record_text(entry))
+    return texts
+
+
+def save_forecast(forecast, json_path="seedable_forecast.json", state_path=None):
+    """Write the forecast JSON, columnar store and incremental state, each only if it changed.
+
+    After an incremental run only new or rescored hours are encoded, the rest being copied
+    from the previous JSON when the stored state vouches for it (by CRC), and only the
+    store's changed columns are rewritten. Returns True when anything was written.
+    """
+    if not forecast.changed:
+        return False
+    stored_crc = _stored_json_crc(state_path) if state_path else None
+    with METRICS.stage("write_json"):
+        try:
+            with open(json_path, "r") as f:
+                previous_text = f.read()
+            METRICS.count("bytes_read", len(previous_text), source="forecast_file")
+        except OSError:
+            previous_text = None
+        previous_texts = None
+        if (forecast.reused is not None and previous_text is not None and
+                stored_crc == zlib.crc32(previous_text.encode())):
+            previous_texts = split_record_texts(previous_text)
+        data = join_record_texts(_entry_texts(forecast, previous_texts))
+        json_written = data != previous_text
+        if json_written:
+            with open(json_path, "w") as f:
+                f.write(data)
+            METRICS.count("bytes_written", len(data), source="forecast_file")
+    columns_written = update_forecast_columns(columnar_path_for(json_path), forecast.entries)
+
+    # Only JSON scored from the state alone (no ensemble) may be copied from on the next run
+    json_crc = zlib.crc32(data.encode()) if forecast.reused is not None else None
+    state_written = bool(state_path and forecast.state is not None and
+                         (forecast.state_changed or stored_crc != json_crc or not os.path.exists(state_path)))
+    if state_written:
+        state = dict(forecast.state)
+        if json_crc is not None:
+            state["json_crc"] = np.array(json_crc, dtype=np.uint32)
+        save_state(state_path, state)
+    return json_written or columns_written > 0 or state_written
+
+
+def run_pipeline(config, cache=None, now=None, payload=None, previous=None, incremental=False,
+                 predicate=None, max_seeding_days=None, render_path=None, hours=WEEK_HOURS,
+                 previous_entries=None):
+    """Run every stage for one farm in memory and return a PipelineResult.
+
+    `payload` skips the fetch, `previous` and `previous_entries` are the state and entries
+    of an earlier incremental run (its result.forecast), `render_path` also renders the plan
+    to an image file and `hours` is the scored horizon (a week by default, so the plan covers
+    every day of it).
+    """
+    region_type = farm_region(config)
+    if payload is None:
+        payload = fetch(config, cache)
+    forecast = score_forecast(payload, region_type, now, previous, incremental, hours,
+                              previous_entries=previous_entries)
+    calendar = filter_calendar(forecast.entries, predicate)
+    plan = plan_week(forecast.entries, config, max_seeding_days)
+    figure = render(plan, config, render_path) if render_path else None
+    return PipelineResult(config, region_type, forecast, calendar, plan, figure)
@@ -0,0 +1,201 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import matplotlib
+matplotlib.use("Agg")   # headless workers have no display; Agg renders straight to files
+import matplotlib.pyplot as plt
+
+from instrumentation import METRICS
+from irrigation_planner import DAYS
+
+# Batch rendering of precomputed irrigation plans. One figure is built as a template (axes,
+# labels, grid, seven bars and their annotations) and every chart only updates bar heights,
+# colors, texts and limits before saving, so a fleet of plans renders in one process without
+# rebuilding a figure per farm. Each output file is skipped when the hash of what it shows
+# (and of the template) matches the one recorded for it in the output directory's manifest.
+
+# Bump when the template changes so every chart is redrawn once
+TEMPLATE_VERSION = 2
+MANIFEST = ".render_manifest.json"
+FORMATS = ("png", "svg")
+
+
+def record_chart_values(record, config=None):
+    """chart_values() from a plan_record() dict; `config` fills in a missing crop or stage"""
+    crop = record.get("crop") or (config or {}).get("crop", {}).get("type", "unknown")
+    growth_stage = record.get("growth_stage") or (config or {}).get("crop", {}).get("growth_stage", "unknown")
+    rain = record.get("seeding_rain_mm", {})
+    return {
+        "crop": crop.capitalize(),
+        "growth_stage": growth_stage,
+        "water": [float(record["irrigation_mm"][day]) for day in DAYS],
+        "rain": [rain.get(day, 0) if day in record["seeding"] else 0 for day in DAYS],
+        "seeding": [day in record["seeding"] for day in DAYS],
+    }
+
+
+def chart_hash(chart, dpi):
+    """Hash of everything a rendered chart depends on"""
+    key = json.dumps([TEMPLATE_VERSION, dpi, chart], sort_keys=True)
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+class PlanChartTemplate:
+    """Reusable plan chart: the look of plot_irrigation_plan(), redrawn in place per plan"""
+
+    def __init__(self, dpi=100):
+        self.dpi = dpi
+        self.figure = plt.figure(figsize=(10, 6), dpi=dpi)
+        ax = self.axes = self.figure.add_subplot()
+        self.bars = ax.bar(DAYS, [0] * 7, color="skyblue")
+        self.rain_labels = [ax.text(i, 0, "", ha='center', color='navy', visible=False) for i in range(7)]
+        self.water_labels = [ax.text(i, 0, "", ha='center', fontsize=9, visible=False) for i in range(7)]
+        self.title = ax.set_title("🌾 AI Irrigation Plan", fontsize=14, wrap=True)
+        ax.set_xlabel("Day of the Week")
+        ax.set_ylabel("Watering (mm)")
+        ax.grid(axis='y', linestyle='--', alpha=0.7)
+        ax.set_ylim(0, 100)
+        # Fixed margins instead of a layout engine, so savefig() draws once and no title is
+        # laid out against another one: room for four-digit ticks and a title wrapped onto
+        # two lines when a long crop or stage name would run past the figure
+        self.figure.subplots_adjust(left=0.08, right=0.97, bottom=0.09, top=0.87)
+
+    def draw(self, chart):
+        water_values, rain_values = chart["water"], chart["rain"]
+        for i, (bar, water, seeded) in enumerate(zip(self.bars, water_values, chart["seeding"])):
+            bar.set_height(water)
+            bar.set_facecolor("deepskyblue" if seeded else "skyblue")
+            rain = self.rain_labels[i]
+            rain.set_visible(seeded)
+            if seeded:
+                rain.set_position((i, water + 1))
+                rain.set_text(f"Rain: {rain_values[i]}mm")
+            label = self.water_labels[i]
+            label.set_visible(water > 0)
+            if water > 0:
+                label.set_position((i, water + 0.5))
+                label.set_text(f"{round(water, 2)}mm")
+        self.title.set_text(f"🌾 AI Irrigation Plan for {chart['crop']} ({chart['growth_stage']} Stage)")
+        self.axes.set_ylim(0, max(water_values + rain_values) + 10)
+
+    def save(self, path, fmt):
+        # Written under a temporary name so an interrupted run never leaves a partial chart
+        tmp_path = path + ".tmp"
+        self.figure.savefig(tmp_path, format=fmt, dpi=self.dpi)
+        os.replace(tmp_path, path)
+
+    def close(self):
+        plt.close(self.figure)
+
+
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def render_plans(charts, output_dir, formats=("png",), dpi=100, force=False):
+    """Render (farm_id, chart_values()) pairs to <farm_id>_irrigation_plan.<format> files.
+
+    Files whose recorded hash matches the chart are left alone unless `force`.
+    Returns (rendered, skipped) counts of files.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {} if force else load_manifest(output_dir)
+    template = None
+    rendered = skipped = 0
+    try:
+        for farm_id, chart in charts:
+            digest = chart_hash(chart, dpi)
+            drawn = False
+            for fmt in formats:
+                name = f"{farm_id}_irrigation_plan.{fmt}"
+                path = os.path.join(output_dir, name)
+                if manifest.get(name) == digest and os.path.exists(path):
+                    skipped += 1
+                    continue
+                if template is None:
+                    template = PlanChartTemplate(dpi)
+                with METRICS.stage("render"):
+                    if not drawn:
+                        template.draw(chart)
+                        drawn = True
+                    template.save(path, fmt)
+                manifest[name] = digest
+                rendered += 1
+    finally:
+        if template is not None:
+            template.close()
+        # Also on failure, so the charts already written are not redrawn next time
+        save_manifest(output_dir, manifest)
+    METRICS.count("charts_rendered", rendered)
+    METRICS.count("charts_skipped", skipped)
+    return rendered, skipped
+
+
+def read_plan_records(f):
+    """(farm_id, record) for every irrigation_plan record in an NDJSON stream.
+
+    Fleet plans (batch_forecast.py --plans) carry their farm_id; single-farm records are
+    numbered farm_1, farm_2, ... in stream order.
+    """
+    number = 0
+    for line in f:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if record.get("record") != "irrigation_plan":
+            continue
+        number += 1
+        yield record.get("farm_id") or f"farm_{number}", record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render irrigation plan charts for many farms without a display")
+    parser.add_argument("plans", nargs="?", default="-",
+                        help="NDJSON irrigation_plan records (ai_irrigation_optimizer.py --machine, or "
+                             "fleet_plans.ndjson from batch_forecast.py --plans), - for stdin")
+    parser.add_argument("--output-dir", default="plan_charts", help="Directory for the chart files")
+    parser.add_argument("--format", choices=FORMATS, action="append",
+                        help="Output format, may be repeated (default: png)")
+    parser.add_argument("--dpi", type=int, default=100, help="Resolution of raster charts")
+    parser.add_argument("--config", help="Farm config used for records without crop and growth stage")
+    parser.add_argument("--force", action="store_true", help="Redraw every chart even if its plan is unchanged")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Record stage timings and counters to PATH (.prom for Prometheus text, else JSON)")
+    args = parser.parse_args()
+    if args.metrics:
+        METRICS.enable()
+    config = None
+    if args.config:
+        with open(args.config, "r") as f:
+            config = json.load(f)
+
+    f = sys.stdin if args.plans == "-" else open(args.plans, "r")
+    try:
+        charts = ((farm_id, record_chart_values(record, config)) for farm_id, record in read_plan_records(f))
+        rendered, skipped = render_plans(charts, args.output_dir, args.format or ["png"], args.dpi, args.force)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    print(f"🖼️ Rendered {rendered} charts, {skipped} unchanged → {args.output_dir}")
+    if args.metrics:
+        METRICS.write(args.metrics)
+        print(f"📈 Metrics saved to {args.metrics}")
+
+
+if __name__ == "__main__":
+    main()
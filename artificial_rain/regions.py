@@ -0,0 +1,389 @@
+import json
+import math
+import os
+from dataclasses import dataclass
+from types import MappingProxyType
+
+import numpy as np
+
+# Climate zone detection and the region profile registry, shared by every forecast entry point.
+# Region parameters live in region_profiles.json and are compiled once at import into immutable
+# profiles (looked up by id or name) and into per-field arrays indexed by region id for the
+# vectorized scoring engine. New regions only need a new entry in the data file.
+
+PROFILES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "region_profiles.json")
+
+THRESHOLD_FIELDS = (
+    "min_cloud", "min_humidity", "ideal_wind", "min_wind", "temp_threshold",
+    "seedability_threshold", "base_precipitation_potential", "precipitation_efficiency",
+    "min_viable_precipitation", "seeding_enhancement_factor",
+)
+
+CLOUD_LAYERS = {"low": 0, "mid": 1, "high": 2}
+WATER_PATH_LAYERS = {"low": 0, "mid": 1, "monsoon": 2, "total": 3}
+
+# Profiles are padded to these sizes in the array form
+MAX_CONVECTION_WINDOWS = 2
+MAX_CLOUD_RULES = 3
+
+
+@dataclass(frozen=True, slots=True)
+class CloudClass:
+    code: int
+    cloud_type: str
+    seeding_method: str
+    effectiveness: float
+    water_path: int       # WATER_PATH_LAYERS value feeding the cloud water path
+    scored: bool          # False for cloud types that are never seedable
+
+    @property
+    def unsuitable(self):
+        # The "unsuitable cloud type" limiting factor
+        return "High" in self.cloud_type or "Not Recommended" in self.seeding_method
+
+
+@dataclass(frozen=True, slots=True)
+class CloudRule:
+    layer: int            # CLOUD_LAYERS value compared against min_cover
+    min_cover: float
+    cold_below: float     # temperature below which cold_code applies (-inf: no split)
+    cold_code: int
+    warm_code: int
+
+
+@dataclass(frozen=True, slots=True)
+class RegionProfile:
+    region_id: int
+    name: str
+    description: str
+    thresholds: MappingProxyType
+    lwc_saturated_spread: float
+    lwc_saturated: float
+    lwc_dry_spread: float
+    lwc_dry: float
+    lwc_spread_scale: float
+    lwc_floor: float
+    convection_windows: tuple
+    convection_off_peak: float
+    cloud_weights: tuple
+    cloud_rules: tuple
+    monsoon_months: tuple     # (first, last) month, or None
+    monsoon_min_humidity: float
+    monsoon_factor: float
+    monsoon_code: int
+    water_path_factors: tuple
+    cold_below: float
+    cold_factor: float
+    cool_below: float
+    cool_factor: float
+    boost_below: float        # arid-style bump for small precipitation amounts
+    boost_floor: float
+    boost_scale: float
+    limiting_factors: tuple   # (entry field, above, text)
+
+
+def _intern_cloud_class(spec, classes, codes):
+    key = (spec["cloud_type"], spec["seeding_method"], spec["effectiveness"])
+    if key not in codes:
+        codes[key] = len(classes)
+        classes.append(CloudClass(len(classes), spec["cloud_type"], spec["seeding_method"],
+                                  spec["effectiveness"], WATER_PATH_LAYERS[spec["water_path"]],
+                                  spec.get("scored", True)))
+    return codes[key]
+
+
+def load_region_profiles(path=PROFILES_PATH):
+    """Compile the profile data file into (profiles by region id, cloud classes by code)"""
+    with open(path, "r") as f:
+        data = json.load(f)
+
+    classes = []
+    codes = {}
+    _intern_cloud_class({"cloud_type": "Unknown", "seeding_method": "N/A", "effectiveness": 0,
+                         "water_path": "total", "scored": False}, classes, codes)
+
+    profiles = []
+    for region_id, (name, spec) in enumerate(data["regions"].items()):
+        rules = spec["cloud_rules"]
+        if isinstance(rules, str):
+            rules = data["shared_cloud_rules"][rules]
+        cloud_rules = []
+        for rule in rules:
+            warm_code = _intern_cloud_class(rule["warm"], classes, codes)
+            cold_code = _intern_cloud_class(rule["cold"], classes, codes) if "cold" in rule else warm_code
+            cloud_rules.append(CloudRule(CLOUD_LAYERS[rule["layer"]], rule["min_cover"],
+                                         rule.get("cold_below", -math.inf), cold_code, warm_code))
+
+        monsoon = spec.get("monsoon")
+        lwc = spec["lwc"]
+        paths = spec["water_path_factors"]
+        adjust = spec["temperature_adjustment"]
+        boost = spec.get("precipitation_boost", {"below": 0, "floor": 0, "scale": 1})
+        profiles.append(RegionProfile(
+            region_id=region_id,
+            name=name,
+            description=spec.get("description", ""),
+            thresholds=MappingProxyType({field: spec["thresholds"][field] for field in THRESHOLD_FIELDS}),
+            lwc_saturated_spread=lwc["saturated_spread"],
+            lwc_saturated=lwc["saturated_lwc"],
+            lwc_dry_spread=lwc["dry_spread"],
+            lwc_dry=lwc["dry_lwc"],
+            lwc_spread_scale=lwc["spread_scale"],
+            lwc_floor=lwc["floor"],
+            convection_windows=tuple(tuple(w) for w in spec["convection"]["windows"]),
+            convection_off_peak=spec["convection"]["off_peak"],
+            cloud_weights=tuple(spec["cloud_weights"]),
+            cloud_rules=tuple(cloud_rules),
+            monsoon_months=tuple(monsoon["months"]) if monsoon else None,
+            monsoon_min_humidity=monsoon["min_humidity"] if monsoon else math.inf,
+            monsoon_factor=monsoon["factor"] if monsoon else 1.0,
+            monsoon_code=_intern_cloud_class(monsoon["cloud"], classes, codes) if monsoon else 0,
+            water_path_factors=(paths["low"], paths["mid"], paths["monsoon"], paths["total"]),
+            cold_below=adjust["cold_below"],
+            cold_factor=adjust["cold_factor"],
+            cool_below=adjust["cool_below"],
+            cool_factor=adjust["cool_factor"],
+            boost_below=boost["below"],
+            boost_floor=boost["floor"],
+            boost_scale=boost["scale"],
+            limiting_factors=tuple((f["field"], f["above"], f["text"])
+                                   for f in spec.get("limiting_factors", [])),
+        ))
+    return tuple(profiles), tuple(classes)
+
+
+def compile_profile_arrays(profiles):
+    """Per-field NumPy arrays indexed by region id, used by the vectorized scoring engine"""
+    def column(values, dtype=float):
+        return np.array(values, dtype=dtype)
+
+    arrays = {field: column([p.thresholds[field] for p in profiles]) for field in THRESHOLD_FIELDS}
+
+    windows = [list(p.convection_windows) + [(-1, -1)] * (MAX_CONVECTION_WINDOWS - len(p.convection_windows))
+               for p in profiles]
+    rules = [list(p.cloud_rules) + [CloudRule(0, math.inf, -math.inf, 0, 0)] * (MAX_CLOUD_RULES - len(p.cloud_rules))
+             for p in profiles]
+    arrays.update({
+        "lwc_saturated_spread": column([p.lwc_saturated_spread for p in profiles]),
+        "lwc_saturated": column([p.lwc_saturated for p in profiles]),
+        "lwc_dry_spread": column([p.lwc_dry_spread for p in profiles]),
+        "lwc_dry": column([p.lwc_dry for p in profiles]),
+        "lwc_spread_scale": column([p.lwc_spread_scale for p in profiles]),
+        "lwc_floor": column([p.lwc_floor for p in profiles]),
+        "convection_start": column([[w[0] for w in ws] for ws in windows], np.int64),
+        "convection_end": column([[w[1] for w in ws] for ws in windows], np.int64),
+        "convection_off_peak": column([p.convection_off_peak for p in profiles]),
+        "cloud_weights": column([p.cloud_weights for p in profiles]),
+        "rule_layer": column([[r.layer for r in rs] for rs in rules], np.int64),
+        "rule_min_cover": column([[r.min_cover for r in rs] for rs in rules]),
+        "rule_cold_below": column([[r.cold_below for r in rs] for rs in rules]),
+        "rule_cold_code": column([[r.cold_code for r in rs] for rs in rules], np.int64),
+        "rule_warm_code": column([[r.warm_code for r in rs] for rs in rules], np.int64),
+        "monsoon_first_month": column([p.monsoon_months[0] if p.monsoon_months else 13 for p in profiles], np.int64),
+        "monsoon_last_month": column([p.monsoon_months[1] if p.monsoon_months else 0 for p in profiles], np.int64),
+        "monsoon_min_humidity": column([p.monsoon_min_humidity for p in profiles]),
+        "monsoon_factor": column([p.monsoon_factor for p in profiles]),
+        "monsoon_code": column([p.monsoon_code for p in profiles], np.int64),
+        "water_path_factors": column([p.water_path_factors for p in profiles]),
+        "cold_below": column([p.cold_below for p in profiles]),
+        "cold_factor": column([p.cold_factor for p in profiles]),
+        "cool_below": column([p.cool_below for p in profiles]),
+        "cool_factor": column([p.cool_factor for p in profiles]),
+        "boost_below": column([p.boost_below for p in profiles]),
+        "boost_floor": column([p.boost_floor for p in profiles]),
+        "boost_scale": column([p.boost_scale for p in profiles]),
+    })
+    for values in arrays.values():
+        values.flags.writeable = False
+    return arrays
+
+
+REGION_PROFILES, CLOUD_CLASSES = load_region_profiles()
+REGION_IDS = {profile.name: profile.region_id for profile in REGION_PROFILES}
+DEFAULT_REGION_ID = REGION_IDS["default"]
+PROFILE_ARRAYS = compile_profile_arrays(REGION_PROFILES)
+# Cloud codes whose cloud type is an "unsuitable cloud type" limiting factor
+CLASS_UNSUITABLE = np.array([c.unsuitable for c in CLOUD_CLASSES])
+
+
+def region_id(region):
+    """Region id for a region name or id; unknown names fall back to the default profile"""
+    if isinstance(region, str):
+        return REGION_IDS.get(region, DEFAULT_REGION_ID)
+    return region
+
+
+def get_region_profile(region):
+    """Look up a RegionProfile by region name or id"""
+    return REGION_PROFILES[region_id(region)]
+
+
+@dataclass(frozen=True, slots=True)
+class ZoneBox:
+    name: str
+    region: str
+    priority: int
+    lat_range: tuple      # inclusive (min, max)
+    lon_range: tuple      # inclusive (min, max); (-inf, inf) for latitude bands
+
+    def contains(self, lat, lon):
+        return (self.lat_range[0] <= lat <= self.lat_range[1] and
+                self.lon_range[0] <= lon <= self.lon_range[1])
+
+
+def load_climate_zones(path=PROFILES_PATH):
+    """Zone boxes in match order: named boxes by priority, then latitude bands, then the fallback"""
+    with open(path, "r") as f:
+        zones = json.load(f)["climate_zones"]
+    boxes = sorted(zones["boxes"], key=lambda box: box["priority"])
+    matched = [ZoneBox(box["name"], box["region"], box["priority"], tuple(box["lat"]), tuple(box["lon"]))
+               for box in boxes]
+    for band in zones["latitude_bands"]:
+        matched.append(ZoneBox(band["name"], band["region"], len(matched) + 1,
+                               tuple(band["lat"]), (-math.inf, math.inf)))
+    return tuple(matched), zones["fallback"]
+
+
+ZONE_BOXES, FALLBACK_ZONE = load_climate_zones()
+
+
+# Auto-detect region type based on location coordinates
+def determine_climate_zone(lat, lon):
+    for box in ZONE_BOXES:
+        if box.contains(lat, lon):
+            return box.region
+    return FALLBACK_ZONE
+
+
+def overlapping_zones(boxes=ZONE_BOXES):
+    """(winner, shadowed) box name pairs whose areas overlap; the winner has the higher priority"""
+    overlaps = []
+    for i, first in enumerate(boxes):
+        for second in boxes[i + 1:]:
+            if (first.lat_range[0] <= second.lat_range[1] and second.lat_range[0] <= first.lat_range[1] and
+                    first.lon_range[0] <= second.lon_range[1] and second.lon_range[0] <= first.lon_range[1] and
+                    first.region != second.region):
+                overlaps.append((first.name, second.name))
+    return overlaps
+
+
+class ClimateZoneIndex:
+    """Exact raster lookup of determine_climate_zone for arrays of coordinates.
+
+    The box edges split latitude and longitude into slots: each edge value is a slot of its
+    own (bounds are inclusive) and so is each open interval between edges. Every box test is
+    constant within a slot, so classifying one representative point per slot pair gives a
+    small table that answers any coordinate with two binary searches and a gather, with the
+    same precedence as the scalar function.
+    """
+
+    def __init__(self, boxes=ZONE_BOXES, fallback=FALLBACK_ZONE):
+        finite = lambda values: sorted({v for v in values if math.isfinite(v)})
+        self.lat_edges = np.array(finite(v for box in boxes for v in box.lat_range))
+        self.lon_edges = np.array(finite(v for box in boxes for v in box.lon_range))
+
+        def classify(lat, lon):
+            for box in boxes:
+                if box.contains(lat, lon):
+                    return REGION_IDS.get(box.region, DEFAULT_REGION_ID)
+            return REGION_IDS.get(fallback, DEFAULT_REGION_ID)
+
+        lat_points = self._representatives(self.lat_edges)
+        lon_points = self._representatives(self.lon_edges)
+        self.table = np.array([[classify(lat, lon) for lon in lon_points] for lat in lat_points],
+                              dtype=np.int64)
+
+    @staticmethod
+    def _representatives(edges):
+        # Slot 2k+1 is edge k itself, slot 2k is the open interval just below it
+        points = [edges[0] - 1.0]
+        for k, edge in enumerate(edges):
+            points.append(edge)
+            points.append((edge + edges[k + 1]) / 2 if k + 1 < len(edges) else edge + 1.0)
+        return points
+
+    @staticmethod
+    def _slots(edges, values):
+        k = np.searchsorted(edges, values, side="left")
+        on_edge = (k < len(edges)) & (edges[np.minimum(k, len(edges) - 1)] == values)
+        return 2 * k + on_edge
+
+    def region_ids(self, lats, lons):
+        """Region ids (see REGION_IDS) for coordinate arrays of any matching shape"""
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        return self.table[self._slots(self.lat_edges, lats), self._slots(self.lon_edges, lons)]
+
+    def region_names(self, lats, lons):
+        names = np.array([profile.name for profile in REGION_PROFILES])
+        return names[self.region_ids(lats, lons)]
+
+
+CLIMATE_ZONE_INDEX = ClimateZoneIndex()
+
+
+def classify_climate_zones(lats, lons):
+    """Vectorized determine_climate_zone: region ids for arrays of coordinates"""
+    return CLIMATE_ZONE_INDEX.region_ids(lats, lons)
+
+
+def get_limiting_factors(entry, region_type, min_cloud, min_humidity, min_wind):
+    """Identify factors limiting seedability - adjusted for region type"""
+    factors = limiting_factor_list(entry, region_type, min_cloud, min_humidity, min_wind)
+    return ", ".join(factors) if factors else "borderline conditions"
+
+
+def limiting_factor_texts(region_type, min_cloud, min_humidity, min_wind):
+    """Every limiting factor of a region in checking order: the common ones, then its own"""
+    return ([f"insufficient cloud cover (< {min_cloud}%)",
+             f"low humidity (< {min_humidity}%)",
+             f"insufficient wind (< {min_wind} m/s)",
+             "unsuitable cloud type"] +
+            [text for _, _, text in get_region_profile(region_type).limiting_factors])
+
+
+def limiting_factor_list(entry, region_type, min_cloud, min_humidity, min_wind):
+    """get_limiting_factors() as a list of reasons (empty for borderline conditions)"""
+    limited = [entry["cloudcover"] < min_cloud,
+               entry["humidity"] < min_humidity,
+               entry["windspeed"] < min_wind,
+               "High" in entry["cloud_type"] or "Not Recommended" in entry["recommended_seeding_method"]]
+    # Region-specific factors
+    limited += [entry[field] > above for field, above, _ in get_region_profile(region_type).limiting_factors]
+    texts = limiting_factor_texts(region_type, min_cloud, min_humidity, min_wind)
+    return [text for text, hit in zip(texts, limited) if hit]
+
+
+def limiting_factor_mask(fields, cloud_codes, region_type):
+    """limiting_factor_list() for many hours at once under the region's thresholds.
+
+    `fields` maps the entry fields the factors read (cloudcover, humidity, windspeed and
+    those of the region's own factors) to arrays. Returns one uint16 per hour whose bit i
+    is set when factor i of limiting_factor_texts() applies.
+    """
+    profile = get_region_profile(region_type)
+    thresholds = profile.thresholds
+    limited = [fields["cloudcover"] < thresholds["min_cloud"],
+               fields["humidity"] < thresholds["min_humidity"],
+               fields["windspeed"] < thresholds["min_wind"],
+               CLASS_UNSUITABLE[cloud_codes]]
+    limited += [fields[field] > above for field, above, _ in profile.limiting_factors]
+    if len(limited) > 16:
+        raise ValueError(f"Region {profile.name!r} has too many limiting factors for a uint16 mask")
+    mask = np.zeros(len(cloud_codes), dtype=np.uint16)
+    for bit, hit in enumerate(limited):
+        mask[hit] |= 1 << bit
+    return mask
+
+
+def decode_limiting_factors(mask, region_type):
+    """limiting_factor_list() from one limiting_factor_mask() value"""
+    thresholds = get_region_profile(region_type).thresholds
+    texts = limiting_factor_texts(region_type, thresholds["min_cloud"], thresholds["min_humidity"],
+                                  thresholds["min_wind"])
+    return [text for bit, text in enumerate(texts) if int(mask) >> bit & 1]
+
+
+def get_region_thresholds(region_type):
+    """Seeding thresholds and precipitation factors for a region type"""
+    return dict(get_region_profile(region_type).thresholds)
@@ -0,0 +1,257 @@
+import numpy as np
+
+from regions import CLOUD_CLASSES, MAX_CLOUD_RULES, MAX_CONVECTION_WINDOWS, PROFILE_ARRAYS, region_id
+
+# Columnar seedability engine: scores a whole slice of Open-Meteo hourly data in one
+# batched NumPy pass instead of one hour at a time. Every if/elif branch of the original
+# per-hour loop is expressed as a boolean mask, so the output matches it field for field.
+# Region behaviour comes from the compiled profile arrays in regions.py, so the hot path
+# indexes arrays by region id and never compares region names.
+
+# Open-Meteo hourly variable -> short column name used by the engine
+HOURLY_COLUMNS = {
+    "temperature_2m": "temps",
+    "relativehumidity_2m": "humidity",
+    "dewpoint_2m": "dewpoints",
+    "cloudcover": "clouds",
+    "cloudcover_low": "clouds_low",
+    "cloudcover_mid": "clouds_mid",
+    "cloudcover_high": "clouds_high",
+    "pressure_msl": "pressure",
+    "windspeed_10m": "wind",
+    "precipitation": "precipitation",
+}
+
+# Per-class lookup tables, indexed by cloud code
+CLASS_EFFECTIVENESS = np.array([c.effectiveness for c in CLOUD_CLASSES], dtype=float)
+CLASS_SCORED = np.array([c.scored for c in CLOUD_CLASSES])
+CLASS_WATER_PATH_LAYER = np.array([c.water_path for c in CLOUD_CLASSES])
+
+
+def hourly_arrays(hourly):
+    """Convert an Open-Meteo `hourly` dict into float64 NumPy columns"""
+    n = len(hourly["time"])
+    arrays = {"time": np.array(hourly["time"], dtype="datetime64[m]")}
+    for key, name in HOURLY_COLUMNS.items():
+        values = hourly.get(key)
+        if values is None and key == "precipitation":
+            values = [0] * n
+        arrays[name] = np.asarray(values, dtype=float)
+    return arrays
+
+
+def forecast_window(hours, now, length=48):
+    """Slice of `hours` covering the next `length` hours starting at the current hour"""
+    now_str = now.strftime("%Y-%m-%dT%H:00")
+    try:
+        now_index = hours.index(now_str)
+    except ValueError:
+        # If exact hour not found, find closest hour
+        now_hour_decimal = now.hour + now.minute / 60
+        now_index = 0
+        min_diff = 24
+
+        for i, time_str in enumerate(hours):
+            diff = abs(int(time_str[11:13]) - now_hour_decimal)
+            if diff < min_diff:
+                min_diff = diff
+                now_index = i
+
+    return slice(now_index, min(now_index + length, len(hours)))
+
+
+def region_parameters(region, thresholds=None):
+    """Profile arrays for `region` (a name, an id, or an array of ids), with optional overrides.
+
+    A scalar region gives scalar parameters; an id array gives per-element parameters that
+    broadcast against the hourly columns. `thresholds` values replace the profile's own.
+    """
+    ids = region_id(region) if np.ndim(region) == 0 else np.asarray(region)
+    params = {name: values[ids] for name, values in PROFILE_ARRAYS.items()}
+    if thresholds:
+        params.update(thresholds)
+    return params
+
+
+def score_hours(arrays, region, thresholds=None, index=None):
+    """Score the selected hours of a forecast in one batched pass.
+
+    `arrays` comes from hourly_arrays(), `region` is a region name, id or id array (see
+    region_parameters), `thresholds` optionally overrides profile thresholds and `index`
+    selects the hours (a slice or index array). Returns a dict of derived NumPy columns
+    aligned with the selected hours.
+    """
+    if index is None:
+        index = slice(None)
+    p = region_parameters(region, thresholds)
+    time = arrays["time"][index]
+    temps = arrays["temps"][index]
+    humidity = arrays["humidity"][index]
+    dewpoints = arrays["dewpoints"][index]
+    clouds = arrays["clouds"][index]
+    low = arrays["clouds_low"][index]
+    mid = arrays["clouds_mid"][index]
+    high = arrays["clouds_high"][index]
+    wind = arrays["wind"][index]
+    precipitation = arrays["precipitation"][index]
+
+    month = time.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    hour_of_day = (time.astype("datetime64[h]") - time.astype("datetime64[D]")).astype(np.int64)
+
+    # Dew point depression (spread) and estimated liquid water content
+    spread = temps - dewpoints
+    estimated_lwc = np.select(
+        [spread <= p["lwc_saturated_spread"], spread > p["lwc_dry_spread"]],
+        [p["lwc_saturated"], p["lwc_dry"]],
+        np.maximum(p["lwc_floor"], (humidity / 100) * (1 - spread / p["lwc_spread_scale"])))
+    estimated_lwc = np.maximum(0, np.minimum(1, estimated_lwc))
+
+    # Convective potential by time of day
+    in_window = np.zeros(np.broadcast(hour_of_day, p["convection_off_peak"]).shape, dtype=bool)
+    for w in range(MAX_CONVECTION_WINDOWS):
+        in_window |= ((p["convection_start"][..., w] <= hour_of_day) &
+                      (hour_of_day <= p["convection_end"][..., w]))
+    daytime_convection = np.where(in_window, 1.0, p["convection_off_peak"])
+
+    temp_factor = np.where(temps > 0, np.minimum(1.0, temps / p["temp_threshold"]), 0.2)
+    rain_factor = np.where(precipitation > 0.5, 0.5, 1.0)
+
+    # Cloud classification: rules are tried in order and np.select keeps the first match
+    layers = (low, mid, high)
+    conditions = []
+    choices = []
+    for k in range(MAX_CLOUD_RULES):
+        covered = np.choose(p["rule_layer"][..., k], layers) > p["rule_min_cover"][..., k]
+        conditions += [covered & (temps < p["rule_cold_below"][..., k]), covered]
+        choices += [p["rule_cold_code"][..., k], p["rule_warm_code"][..., k]]
+    cloud_code = np.select(conditions, choices, 0)
+
+    # Monsoon overrides
+    monsoon = ((p["monsoon_first_month"] <= month) & (month <= p["monsoon_last_month"]) &
+               (humidity > p["monsoon_min_humidity"]))
+    cloud_code = np.where(monsoon, p["monsoon_code"], cloud_code)
+    monsoon_factor = np.where(monsoon, p["monsoon_factor"], 1.0)
+    effectiveness = CLASS_EFFECTIVENESS[cloud_code]
+
+    # Wind factor
+    min_wind = p["min_wind"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        wind_factor = np.select([wind < min_wind, wind > 10], [wind / min_wind, 10 / wind],
+                                1 - np.abs(wind - p["ideal_wind"]) / 7)
+    wind_factor = np.maximum(0.2, np.minimum(1.0, wind_factor))
+
+    # Seedability score (0-100)
+    weights = p["cloud_weights"]
+    cloud_score = (low * weights[..., 0] + mid * weights[..., 1] + high * weights[..., 2]) / 100 * 30
+
+    scored = CLASS_SCORED[cloud_code]
+    seedability_score = (
+        cloud_score +
+        (np.minimum(humidity / p["min_humidity"], 2) * 15) +
+        (wind_factor * 15) +
+        (estimated_lwc * 20) +
+        (daytime_convection * temp_factor * 15)
+    ) * effectiveness * monsoon_factor * rain_factor
+    seedability_score = np.where(scored, np.minimum(100, seedability_score), 0.0)
+
+    is_seedable = scored & (seedability_score >= p["seedability_threshold"])
+
+    # Expected precipitation for seedable hours
+    path_factors = p["water_path_factors"]
+    layer = CLASS_WATER_PATH_LAYER[cloud_code]
+    cloud_water_path = np.select(
+        [layer == 0, layer == 1, layer == 2],
+        [estimated_lwc * path_factors[..., 0] * low / 100,
+         estimated_lwc * path_factors[..., 1] * mid / 100,
+         estimated_lwc * path_factors[..., 2] * (low + mid) / 200],
+        estimated_lwc * path_factors[..., 3] * clouds / 100)
+    cloud_water_path = cloud_water_path * np.select(
+        [temps < p["cold_below"], temps < p["cool_below"]], [p["cold_factor"], p["cool_factor"]], 1.0)
+
+    natural_precipitation = cloud_water_path * 0.3
+    seeding_enhancement = effectiveness * p["seeding_enhancement_factor"] * 0.3
+    precipitation_potential_mm = np.maximum(
+        p["min_viable_precipitation"],
+        p["base_precipitation_potential"] * (
+            natural_precipitation * (1 + seeding_enhancement) *
+            p["precipitation_efficiency"] *
+            (seedability_score / 100)
+        )
+    )
+    # Regions with a boost (arid) lift small amounts so they stay meaningful
+    precipitation_potential_mm = np.where(
+        precipitation_potential_mm < p["boost_below"],
+        np.maximum(p["boost_floor"], precipitation_potential_mm * p["boost_scale"]),
+        precipitation_potential_mm)
+    precipitation_potential_mm = np.where(is_seedable, precipitation_potential_mm, 0.0)
+    precipitation_probability = np.where(
+        is_seedable, np.minimum(95, 40 + (seedability_score / 2)), 0.0)
+
+    return {
+        "spread": spread,
+        "estimated_lwc": estimated_lwc,
+        "cloud_code": cloud_code,
+        "scored": scored,
+        "seedability_score": seedability_score,
+        "is_seedable": is_seedable,
+        "precipitation_potential_mm": precipitation_potential_mm,
+        "precipitation_probability": precipitation_probability,
+    }
+
+
+def _capped(value, high, digits, low=None):
+    # Mirrors round(min(high, x)) / round(max(low, min(high, x))): hitting a bound yields the int
+    if value >= high:
+        return high
+    if low is not None and value <= low:
+        return low
+    return round(value, digits)
+
+
+def forecast_entries(hourly, columns, index):
+    """Build the seedable_forecast.json records for the hours scored by score_hours().
+
+    Hours flagged in an optional `ensemble` column (ensemble_scoring.apply_ensemble) show
+    the members' precipitation fields whether or not they are seedable, with the
+    probability capped at 100 instead of the heuristic's 95.
+    """
+    rows = range(len(hourly["time"]))[index] if isinstance(index, slice) else list(index)
+    times = hourly["time"]
+    raw = {name: hourly[key] for key, name in HOURLY_COLUMNS.items() if key in hourly}
+
+    spread = columns["spread"].tolist()
+    lwc = columns["estimated_lwc"].tolist()
+    codes = columns["cloud_code"].tolist()
+    scored = columns["scored"].tolist()
+    score = columns["seedability_score"].tolist()
+    seedable = columns["is_seedable"].tolist()
+    potential = columns["precipitation_potential_mm"].tolist()
+    probability = columns["precipitation_probability"].tolist()
+    ensemble = columns["ensemble"].tolist() if "ensemble" in columns else [False] * len(seedable)
+
+    entries = []
+    for j, i in enumerate(rows):
+        cloud_class = CLOUD_CLASSES[codes[j]]
+        entries.append({
+            "datetime": times[i],
+            "display_time": times[i].replace("T", " ")[:13] + ":00",
+            "temperature": raw["temps"][i],
+            "humidity": raw["humidity"][i],
+            "dewpoint": raw["dewpoints"][i],
+            "spread": round(spread[j], 1),
+            "cloudcover": raw["clouds"][i],
+            "cloudcover_low": raw["clouds_low"][i],
+            "cloudcover_mid": raw["clouds_mid"][i],
+            "cloudcover_high": raw["clouds_high"][i],
+            "pressure": raw["pressure"][i],
+            "windspeed": raw["wind"][i],
+            "cloud_type": cloud_class.cloud_type,
+            "estimated_lwc": _capped(lwc[j], 1, 2, low=0),
+            "recommended_seeding_method": cloud_class.seeding_method,
+            "seedability_score": _capped(score[j], 100, 1) if scored[j] else 0,
+            "is_seedable": seedable[j],
+            "precipitation_potential_mm": round(potential[j], 2) if seedable[j] or ensemble[j] else 0,
+            "precipitation_probability": (_capped(probability[j], 100 if ensemble[j] else 95, 1)
+                                          if seedable[j] or ensemble[j] else 0),
+        })
+    return entries
@@ -0,0 +1,107 @@
+import numpy as np
+
+from regions import REGION_IDS
+from seedability_engine import HOURLY_COLUMNS
+
+# Reproducible synthetic Open-Meteo data for benchmarks and offline experiments. Values are
+# drawn so every scoring branch is reached: saturated to very dry air, clear to overcast
+# layers on both sides of the cloud rule cutoffs, cold/cool/warm temperatures, calm to strong
+# winds, and start dates spread over the year so monsoon months are covered.
+
+# One representative farm per climate zone
+REGION_SITES = {
+    "tropical_humid": (10.5, 76.0),
+    "arid": (26.9, 75.8),
+    "semi_arid": (19.0, 75.0),
+    "temperate": (31.5, 75.0),
+    "high_rainfall": (25.0, 92.0),
+}
+
+DEFAULT_START = np.datetime64("2025-01-01T00:00")
+
+# Dewpoint depression and cloud layer levels that sit on or near the region thresholds
+SPREAD_LEVELS = [0, 0.5, 1, 2, 3, 5, 10, 16, 19, 25]
+LOW_LEVELS = [0, 30, 41, 46, 51, 61, 80, 100]
+MID_LEVELS = [0, 41, 46, 51, 61, 90]
+HIGH_LEVELS = [0, 61, 66, 71, 76, 100]
+WIND_LEVELS = [0.0, 0.5, 1.2, 2.0, 3.0, 9.9, 10.0, 14.2]
+PRECIPITATION_LEVELS = [0.0, 0.0, 0.2, 0.6, 3.1]
+
+
+def _levels(rng, levels, size, low, high, noise=0.2, digits=0):
+    # Mostly threshold-adjacent levels, with some uniformly random values in between
+    values = rng.choice(np.asarray(levels, dtype=float), size)
+    random = rng.uniform(low, high, size).round(digits)
+    return np.where(rng.random(size) < noise, random, values)
+
+
+def synthetic_columns(size, seed=0):
+    """`size` hours of engine input columns (see HOURLY_COLUMNS), without time"""
+    rng = np.random.default_rng(seed)
+    temps = rng.uniform(-5, 42, size).round(1)
+    low = _levels(rng, LOW_LEVELS, size, 0, 100)
+    mid = _levels(rng, MID_LEVELS, size, 0, 100)
+    high = _levels(rng, HIGH_LEVELS, size, 0, 100)
+    return {
+        "temps": temps,
+        "humidity": rng.integers(10, 101, size).astype(float),
+        "dewpoints": (temps - _levels(rng, SPREAD_LEVELS, size, -1, 30, digits=1)).round(1),
+        "clouds": np.maximum(np.maximum(low, mid), high),
+        "clouds_low": low,
+        "clouds_mid": mid,
+        "clouds_high": high,
+        "pressure": rng.uniform(990, 1020, size).round(1),
+        "wind": _levels(rng, WIND_LEVELS, size, 0, 20, digits=1),
+        "precipitation": rng.choice(PRECIPITATION_LEVELS, size),
+    }
+
+
+def synthetic_hourly(start=DEFAULT_START, hours=168, seed=0):
+    """An Open-Meteo `hourly` dict of `hours` hours starting at `start`"""
+    times = np.datetime64(start, "m") + np.arange(hours) * np.timedelta64(60, "m")
+    columns = synthetic_columns(hours, seed)
+    hourly = {"time": np.datetime_as_string(times, unit="m").tolist()}
+    for key, name in HOURLY_COLUMNS.items():
+        values = columns[name]
+        hourly[key] = values.astype(int).tolist() if name == "humidity" else values.tolist()
+    return hourly
+
+
+def synthetic_payload(lat, lon, start=DEFAULT_START, hours=168, seed=0):
+    """A single-location Open-Meteo forecast payload"""
+    return {"latitude": lat, "longitude": lon, "hourly": synthetic_hourly(start, hours, seed)}
+
+
+def location_start(index, start=DEFAULT_START):
+    """Start time of location `index` (or an index array): successive locations step through the months"""
+    return np.datetime64(start, "m") + ((np.asarray(index) * 31) % 365).astype("timedelta64[D]")
+
+
+def synthetic_arrays(n_locations, hours=48, seed=0, first_location=0):
+    """Engine input arrays for many locations back to back, plus per-hour region ids.
+
+    Location i covers `hours` hours from location_start(i) in region i % 5, so any batch of
+    locations spreads over every region and month. Returns (arrays, region_ids).
+    """
+    locations = first_location + np.arange(n_locations)
+    starts = location_start(locations)
+    arrays = synthetic_columns(n_locations * hours, seed)
+    arrays["time"] = (np.repeat(starts, hours) +
+                      np.tile(np.arange(hours) * np.timedelta64(60, "m"), n_locations))
+    site_ids = np.array([REGION_IDS[name] for name in REGION_SITES])
+    region_ids = np.repeat(site_ids[locations % len(site_ids)], hours)
+    return arrays, region_ids
+
+
+def synthetic_observed(columns, seed=0):
+    """Observed hourly rain in mm for synthetic_columns() output.
+
+    Rain is likelier and heavier under humid, cloudy skies, so backtests against it have
+    some signal to find; about a tenth of all hours are wet.
+    """
+    rng = np.random.default_rng(seed + 1)
+    size = len(columns["temps"])
+    moisture = (columns["humidity"] / 100) * np.maximum(columns["clouds_low"], columns["clouds_mid"]) / 100
+    chance = 0.02 + 0.3 * moisture ** 2
+    amount = rng.gamma(0.8, 0.2 + 2 * moisture)
+    return np.where(rng.random(size) < chance, amount, 0.0).round(1)
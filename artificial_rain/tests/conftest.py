@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# The scripts import each other by plain module name, as when run from artificial_rain/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import forecast_fetch  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+
+
+@pytest.fixture
+def stub_api(monkeypatch):
+    """Local forecast API that every forecast fetch in the test talks to"""
+    stub = StubServer()
+    monkeypatch.setattr(forecast_fetch, "FORECAST_URL", stub.url)
+    yield stub
+    stub.close()
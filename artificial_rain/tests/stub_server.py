@@ -0,0 +1,70 @@
+import json
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from synthetic_forecast import synthetic_payload
+
+# A local stand-in for the Open-Meteo API. By default every request is answered with one
+# synthetic forecast per requested coordinate, starting a day before the current hour;
+# tests replace `respond` to script statuses, headers and bodies.
+
+
+def current_payload(lat, lon, hours=7 * 24, seed=0):
+    """Synthetic payload whose hours cover the last day and the coming week"""
+    start = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%dT%H:00")
+    return synthetic_payload(lat, lon, np.datetime64(start), hours + 24, seed)
+
+
+def forecast_response(query):
+    """(status, headers, body) with a forecast for each coordinate of an Open-Meteo query"""
+    lats = [float(v) for v in query["latitude"][0].split(",")]
+    lons = [float(v) for v in query["longitude"][0].split(",")]
+    payloads = [current_payload(lat, lon) for lat, lon in zip(lats, lons)]
+    return 200, {}, payloads[0] if len(payloads) == 1 else payloads
+
+
+class StubServer:
+    """ThreadingHTTPServer on a free local port; `requests` records (query, headers) per call"""
+
+    def __init__(self):
+        self.requests = []
+        self.respond = lambda query, headers: forecast_response(query)
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                headers = dict(self.headers)
+                with stub.lock:
+                    stub.requests.append((query, headers))
+                status, extra, body = stub.respond(query, headers)
+                data = body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in extra.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}/v1/forecast"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
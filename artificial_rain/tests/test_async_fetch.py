@@ -0,0 +1,131 @@
+import asyncio
+import random
+import time
+
+import pytest
+import requests
+
+from async_fetch import AsyncForecastFetcher, HostRateLimiter
+from forecast_cache import ForecastCache
+from stub_server import forecast_response
+
+LOCATIONS = [(26.91, 75.81), (10.5, 76.0), (19.0, 75.0)]
+
+
+def scripted(*statuses):
+    """respond() answering with `statuses` in turn, then with forecasts"""
+    pending = list(statuses)
+
+    def respond(query, headers):
+        if pending:
+            return pending.pop(0), {}, b""
+        return forecast_response(query)
+    return respond
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff delays asked for, with jitter fixed at its midpoint and no real waiting"""
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay):
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    monkeypatch.setattr(random, "random", lambda: 0.5)
+    return delays
+
+
+def fetch_all(fetcher, locations):
+    return asyncio.run(fetcher.fetch_all(locations))
+
+
+def test_fetches_every_location_in_order(stub_api):
+    with AsyncForecastFetcher(concurrency=4) as fetcher:
+        payloads = fetch_all(fetcher, LOCATIONS)
+    assert [payload["latitude"] for payload in payloads] == [lat for lat, _ in LOCATIONS]
+    assert fetcher.failures == {}
+
+
+def test_retry_statuses_back_off_exponentially(stub_api, sleeps):
+    stub_api.respond = scripted(503, 429, 500)
+    with AsyncForecastFetcher(concurrency=1, retries=3, backoff=0.5) as fetcher:
+        payloads = fetch_all(fetcher, LOCATIONS[:1])
+    assert payloads[0]["hourly"]
+    assert len(stub_api.requests) == 4
+    assert sleeps == [0.5, 1.0, 2.0]
+
+
+def test_gives_up_after_the_last_retry(stub_api, sleeps):
+    stub_api.respond = scripted(503, 503, 503)
+    with AsyncForecastFetcher(concurrency=1, retries=2) as fetcher:
+        payloads = fetch_all(fetcher, LOCATIONS[:1])
+    assert payloads == [None]
+    assert isinstance(fetcher.failures[0], requests.HTTPError)
+    assert len(stub_api.requests) == 3
+
+
+def test_client_errors_are_not_retried(stub_api, sleeps):
+    stub_api.respond = scripted(400)
+    with AsyncForecastFetcher(concurrency=1, retries=3) as fetcher:
+        payloads = fetch_all(fetcher, LOCATIONS[:1])
+    assert payloads == [None]
+    assert fetcher.failures[0].response.status_code == 400
+    assert len(stub_api.requests) == 1
+    assert sleeps == []
+
+
+def test_payloads_without_hourly_data_are_not_retried(stub_api, sleeps):
+    stub_api.respond = lambda query, headers: (200, {}, {"error": True, "reason": "bad"})
+    with AsyncForecastFetcher(concurrency=1, retries=3) as fetcher:
+        payloads = fetch_all(fetcher, LOCATIONS[:1])
+    assert payloads == [None] and 0 in fetcher.failures
+    assert len(stub_api.requests) == 1
+
+
+def test_connection_errors_are_retried(stub_api, sleeps):
+    with AsyncForecastFetcher(concurrency=1, retries=2) as fetcher:
+        real_get = fetcher.session.get
+        calls = []
+
+        def get(url, **kwargs):
+            calls.append(url)
+            if len(calls) == 1:
+                raise requests.ConnectionError("connection reset")
+            return real_get(url, **kwargs)
+
+        fetcher.session.get = get
+        payloads = fetch_all(fetcher, LOCATIONS[:1])
+    assert payloads[0]["hourly"]
+    assert len(calls) == 2 and len(sleeps) == 1
+
+
+def test_offline_misses_are_reported_per_farm(stub_api, tmp_path):
+    ForecastCache(str(tmp_path)).fetch(*LOCATIONS[0])
+    cache = ForecastCache(str(tmp_path), offline=True)
+    with AsyncForecastFetcher(concurrency=2, cache=cache) as fetcher:
+        payloads = fetch_all(fetcher, LOCATIONS)
+    assert payloads[0]["hourly"] and payloads[1:] == [None, None]
+    assert set(fetcher.failures) == {1, 2}
+    assert all(isinstance(exc, LookupError) for exc in fetcher.failures.values())
+    assert len(stub_api.requests) == 1
+
+
+def test_rate_limiter_spaces_requests_per_host():
+    limiter = HostRateLimiter(rate=50.0, burst=2)
+
+    async def acquire(host, n):
+        for _ in range(n):
+            await limiter.acquire(host)
+
+    start = time.monotonic()
+    asyncio.run(acquire("api.example", 7))
+    elapsed = time.monotonic() - start
+    # two requests ride the burst, the other five wait 1/50 s each
+    assert 0.09 <= elapsed < 1.0
+
+    start = time.monotonic()
+    asyncio.run(acquire("other.example", 2))
+    assert time.monotonic() - start < 0.02
@@ -0,0 +1,117 @@
+import calendar
+
+import numpy as np
+import pytest
+
+from backtest_seedability import (COUNTS, HOURS_PER_YEAR, OBSERVED, HourlyArchive, backtest, backtest_records,
+                                  create_archive, year_hours)
+from regions import REGION_PROFILES, region_id
+from seedability_engine import HOURLY_COLUMNS, score_hours
+from synthetic_forecast import synthetic_columns
+
+YEARS = [2023, 2024]                      # 8,760 hours, then a leap year's 8,784
+SITES = {"arid": (26.9, 75.8), "semi_arid": (19.0, 75.0)}
+# Clear, dry air: never seedable, never monsoon
+DRY = {"temps": 30.0, "humidity": 10.0, "dewpoints": 0.0, "clouds": 0.0, "clouds_low": 0.0,
+       "clouds_mid": 0.0, "clouds_high": 0.0, "pressure": 1010.0, "wind": 3.0, "precipitation": 0.0}
+
+
+def hour_of_year(year, month, day, hour):
+    return int((np.datetime64(f"{year}-{month:02d}-{day:02d}T{hour:02d}:00") -
+                np.datetime64(f"{year}-01-01T00:00")) // np.timedelta64(1, "h"))
+
+
+def seedable_inputs(region, time):
+    """Inputs of a synthetic hour that is seedable in `region` at `time`, and its expected mm"""
+    pool = synthetic_columns(2000, seed=11)
+    pool["time"] = np.full(2000, np.datetime64(time, "m"))
+    columns = score_hours(pool, region)
+    i = int(np.flatnonzero(columns["is_seedable"])[0])
+    expected = columns["precipitation_potential_mm"][i] * columns["precipitation_probability"][i] / 100
+    return {name: float(pool[name][i]) for name in HOURLY_COLUMNS.values()}, float(expected)
+
+
+# (site, year, month, day, hour, seedable, observed mm): hits, false alarms and misses on
+# both sides of month and year ends, and on February 29th
+EVENTS = [
+    ("arid", 2023, 1, 31, 23, True, 0.5),       # hit, January
+    ("arid", 2023, 2, 1, 0, True, 0.0),         # false alarm, February
+    ("arid", 2023, 12, 31, 23, False, 1.0),     # miss, December: last real hour of a common year
+    ("arid", 2024, 1, 1, 0, False, 0.05),       # below the rain threshold: nothing
+    ("arid", 2024, 2, 29, 12, True, 2.0),       # hit, February of the leap year
+    ("arid", 2024, 3, 1, 0, False, 0.3),        # miss, March
+    ("arid", 2024, 12, 31, 23, True, 0.0),      # false alarm: hour 8,783 of the leap year
+    ("semi_arid", 2024, 7, 15, 14, True, 3.0),  # hit, July, other region
+]
+
+
+@pytest.fixture
+def archive(tmp_path):
+    path = str(tmp_path / "archive")
+    arrays = create_archive(path, YEARS, [lat for lat, _ in SITES.values()], [lon for _, lon in SITES.values()])
+    for y, year in enumerate(YEARS):
+        hours = 366 * 24 if calendar.isleap(year) else 365 * 24
+        for name, value in DRY.items():
+            arrays[name][y, :, :hours] = value
+        arrays[OBSERVED][y, :, :hours] = 0.0
+    expected_mm = 0.0
+    for site, year, month, day, hour, seedable, observed in EVENTS:
+        location, y, h = list(SITES).index(site), YEARS.index(year), hour_of_year(year, month, day, hour)
+        if seedable:
+            inputs, mm = seedable_inputs(site, year_hours(year)[h])
+            for name, value in inputs.items():
+                arrays[name][y, location, h] = value
+            expected_mm += mm
+        arrays[OBSERVED][y, location, h] = observed
+    # Missing input: the hour does not count, even with rain observed
+    arrays["temps"][1, 1, hour_of_year(2024, 1, 10, 6)] = np.nan
+    arrays[OBSERVED][1, 1, hour_of_year(2024, 1, 10, 6)] = 5.0
+    for values in arrays.values():
+        values.flush()
+    return path, expected_mm
+
+
+def expected_counts():
+    counts = {name: np.zeros((len(REGION_PROFILES), 12)) for name in COUNTS}
+    for site in SITES:
+        for year in YEARS:
+            for month in range(12):
+                counts["hours"][region_id(site), month] += calendar.monthrange(year, month + 1)[1] * 24
+    counts["hours"][region_id("semi_arid"), 0] -= 1
+    arid, semi_arid = region_id("arid"), region_id("semi_arid")
+    counts["hits"][arid, [0, 1]] = 1
+    counts["hits"][semi_arid, 6] = 1
+    counts["false_alarms"][arid, [1, 11]] = 1
+    counts["misses"][arid, [11, 2]] = 1
+    counts["observed_mm"][arid, 0] = 0.5
+    counts["observed_mm"][arid, 1] = 2.0
+    counts["observed_mm"][semi_arid, 6] = 3.0
+    return counts
+
+
+@pytest.mark.parametrize("chunk_hours", [1, HOURS_PER_YEAR * 2])
+def test_monthly_counts_by_hand(archive, chunk_hours):
+    path, expected_mm = archive
+    result = backtest(HourlyArchive(path), chunk_hours=chunk_hours)
+    expected = expected_counts()
+    for name in ("hours", "hits", "false_alarms", "misses"):
+        assert result[name].tolist() == expected[name].tolist(), name
+    np.testing.assert_allclose(result["observed_mm"], expected["observed_mm"], rtol=1e-6)
+    assert result["expected_mm"].sum() == pytest.approx(expected_mm, rel=1e-6)
+    # 2023 covers 8,760 real hours, 2024 all 8,784
+    assert result["hours"][region_id("arid")].sum() == 8760 + 8784
+
+
+def test_records_per_region_and_month(archive):
+    path, _ = archive
+    records = backtest_records(backtest(HourlyArchive(path)))
+    arid = {record["month"]: record for record in records
+            if record["record"] == "backtest_month" and record["region_type"] == "arid"}
+    assert sorted(arid) == list(range(1, 13))
+    assert arid[2]["hours"] == 672 + 696
+    assert (arid[2]["hits"], arid[2]["false_alarms"], arid[2]["hit_rate"], arid[2]["false_alarm_ratio"]) == \
+        (1, 1, 1.0, 0.5)
+    assert (arid[12]["hit_rate"], arid[12]["false_alarm_ratio"], arid[12]["rainfall_bias"]) == (0.0, 1.0, None)
+    total, = [record for record in records
+              if record["record"] == "backtest_region" and record["region_type"] == "arid"]
+    assert total["hits"] == 2 and total["misses"] == 2 and total["hit_rate"] == 0.5
@@ -0,0 +1,106 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from batch_forecast import PLANS_FILE, run_batch, score_farm, state_path
+from cell_memo import CellScoreMemo
+from forecast_cache import ForecastCache
+from instrumentation import METRICS
+from plan_rendering import read_plan_records, record_chart_values, render_plans
+from regions import region_id
+from stub_server import current_payload
+
+NOW = datetime.now()
+REGION = region_id("semi_arid")
+CELL = [(26.912, 75.812), (26.914, 75.809), (26.908, 75.811)]
+
+
+@pytest.fixture
+def hours_scored():
+    """Hours scored since the last call"""
+    METRICS.enable()
+    METRICS.reset()
+
+    def take():
+        scored = sum(value for (name, _), value in METRICS.counters.items() if name == "hours_scored")
+        METRICS.reset()
+        return scored
+
+    yield take
+    METRICS.enable(False)
+    METRICS.reset()
+
+
+def score_cell(payload, state_dir, memo):
+    return [score_farm(payload, REGION, NOW, state_path(state_dir, f"farm_{i}"), memo, farm_location)
+            for i, farm_location in enumerate(CELL)]
+
+
+@pytest.mark.parametrize("cell_size", [None, 0.01])
+def test_unchanged_incremental_rerun_scores_nothing(tmp_path, hours_scored, cell_size):
+    payload = current_payload(*CELL[0])
+    first = score_cell(payload, str(tmp_path), cell_size and CellScoreMemo(cell_size=cell_size))
+    assert hours_scored() == (48 if cell_size else 3 * 48)
+    assert all(changed for _, changed in first)
+
+    rerun = score_cell(payload, str(tmp_path), cell_size and CellScoreMemo(cell_size=cell_size))
+    assert hours_scored() == 0
+    assert not any(changed for _, changed in rerun)
+    assert [records.entries() for records, _ in rerun] == [records.entries() for records, _ in first]
+
+
+def test_memoized_rerun_rescores_only_changed_hours(tmp_path, hours_scored):
+    payload = current_payload(*CELL[0])
+    score_cell(payload, str(tmp_path), CellScoreMemo())
+    hours_scored()
+    hourly = payload["hourly"]
+    start = hourly["time"].index(NOW.strftime("%Y-%m-%dT%H:00"))
+    hourly["relativehumidity_2m"][start + 5] = 99
+    rerun = score_cell(payload, str(tmp_path), CellScoreMemo())
+    assert hours_scored() == 1
+    assert all(changed for _, changed in rerun)
+
+
+def test_batch_plans_are_named_by_farm_id(tmp_path, stub_api):
+    farms = [{"farm_id": f"plot-{i}", "location": {"latitude": CELL[i][0], "longitude": CELL[i][1]},
+              "crop": {"type": "wheat", "growth_stage": "flowering", "water_requirement_mm_per_week": 30},
+              "irrigation": {"type": "drip", "max_capacity_mm_per_day": 6}} for i in range(2)]
+    farms.append({"farm_id": "no-crop", "location": {"latitude": 20.0, "longitude": 78.0}})
+    farms_path = tmp_path / "farms.json"
+    farms_path.write_text(json.dumps(farms))
+    output_dir = tmp_path / "out"
+    run_batch(str(farms_path), str(output_dir), plans=True, machine=True)
+
+    with open(output_dir / PLANS_FILE) as f:
+        records = list(read_plan_records(f))
+    assert [farm_id for farm_id, _ in records] == ["plot-0", "plot-1"]
+
+    charts = [(farm_id, record_chart_values(record)) for farm_id, record in records]
+    render_plans(charts, str(output_dir / "charts"))
+    assert sorted(name for name in os.listdir(output_dir / "charts") if name.endswith(".png")) == [
+        "plot-0_irrigation_plan.png", "plot-1_irrigation_plan.png"]
+
+
+@pytest.mark.parametrize("processes", [None, 2])
+def test_failed_fetch_skips_only_the_farms_without_a_forecast(tmp_path, stub_api, capsys, processes):
+    farms = [{"farm_id": f"farm-{i}", "location": {"latitude": lat, "longitude": lon}}
+             for i, (lat, lon) in enumerate([(26.91, 75.81), (10.5, 76.0)])]
+    farms_path = tmp_path / "farms.json"
+    farms_path.write_text(json.dumps(farms[:1]))
+    cache = ForecastCache(str(tmp_path / "cache"), ttl_seconds=0)
+    run_batch(str(farms_path), str(tmp_path / "first"), cache, cell_size=0)
+
+    # The next multi-coordinate request fails: farm-0 has a stale forecast, farm-1 none
+    stub_api.respond = lambda query, headers: (503, {}, b"")
+    farms_path.write_text(json.dumps(farms))
+    capsys.readouterr()
+    results = run_batch(str(farms_path), str(tmp_path / "out"), cache, machine=True, processes=processes,
+                        cell_size=0)
+    assert list(results) == ["farm-0"]
+    assert (tmp_path / "out" / "farm-0_seedable_forecast.json").exists()
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    failed = [record for record in records if record["record"] == "fetch_failed"]
+    assert [record["farm_id"] for record in failed] == ["farm-1"]
+    assert records[-1]["failed"] == 1
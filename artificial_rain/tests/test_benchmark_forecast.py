@@ -0,0 +1,26 @@
+from benchmark_forecast import bench_compact, compare, median_time, sample_label
+
+
+def test_quick_functions_are_looped_to_the_minimum_duration():
+    calls = []
+    seconds = median_time(lambda: calls.append(1), repeat=3, min_seconds=0.01)
+    # every measurement after calibration lasts about min_seconds
+    assert len(calls) > 1000
+    assert 0 < seconds < 0.001
+
+
+def test_sampled_sizes_say_so():
+    assert sample_label(1000, sample=1000) == "1,000 location(s)"
+    assert sample_label(100000, sample=1000) == \
+        "100,000 locations (pipeline, JSON and memory metrics on a 1,000-farm sample)"
+
+
+def test_compare_flags_slower_and_larger_metrics():
+    baseline = {"results": {"1": {"scoring_hours_per_s": 100.0, "scoring_peak_mb": 10.0}}}
+    current = {"results": {"1": {"scoring_hours_per_s": 70.0, "scoring_peak_mb": 11.0}}}
+    assert compare(current, baseline, tolerance=0.25) == [("1", "scoring_hours_per_s", 100.0, 70.0)]
+
+
+def test_compact_records_hold_less_memory_than_entries():
+    metrics = bench_compact(6)
+    assert 0 < metrics["compact_bytes_per_hour"] < metrics["entries_bytes_per_hour"] / 3
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from compact_forecast import HourlyRecords, pack_column, unpack_column
+from regions import get_region_thresholds, limiting_factor_list
+from seedability_engine import forecast_entries, hourly_arrays, score_hours
+from stub_server import current_payload
+
+
+@pytest.mark.parametrize("values", [
+    [1, 2, 3],
+    [1.5, 2.25, -3.0],
+    [20.0, 21.0, 22.0],
+    [20.0, 21, None, 22.5],
+    [None, None],
+    [],
+])
+def test_pack_column_round_trips_values_and_types(values):
+    packed, kinds = pack_column(values)
+    unpacked = unpack_column(packed, kinds)
+    assert unpacked == values
+    assert [type(value) for value in unpacked] == [type(value) for value in values]
+
+
+@pytest.mark.parametrize("region", ["semi_arid", "tropical_humid", "temperate"])
+@pytest.mark.parametrize("index", [slice(None), slice(30, 78), [5, 6, 40, 41, 100]])
+def test_records_decode_to_forecast_entries(region, index):
+    hourly = current_payload(26.91, 75.81, seed=3)["hourly"]
+    # Ints, integral floats and nulls in the raw inputs come back as they were
+    hourly["relativehumidity_2m"] = [int(value) for value in hourly["relativehumidity_2m"]]
+    hourly["windspeed_10m"] = [float(round(value)) for value in hourly["windspeed_10m"]]
+    hourly["pressure_msl"] = [None if i % 7 == 0 else value for i, value in enumerate(hourly["pressure_msl"])]
+    columns = score_hours(hourly_arrays(hourly), region, index=index)
+    expected = forecast_entries(hourly, columns, index)
+    records = HourlyRecords(hourly, columns, index, region)
+    entries = records.entries()
+    assert entries == expected
+    for entry, value in zip(entries, expected):
+        assert [type(v) for v in entry.values()] == [type(v) for v in value.values()]
+    assert records.found == any(entry["is_seedable"] for entry in expected)
+    thresholds = get_region_thresholds(region)
+    assert all(records.limiting_factors(hour) ==
+               limiting_factor_list(entry, region, thresholds["min_cloud"], thresholds["min_humidity"],
+                                    thresholds["min_wind"])
+               for hour, entry in enumerate(expected))
+    assert records.nbytes < 200 * len(records)
@@ -0,0 +1,48 @@
+import numpy as np
+
+from daily_forecast import aggregate_daily, daily_records
+
+# 60 hours from mid-afternoon on the last day of a month: 9 + 24 + 24 + 3 hours
+DATETIMES = np.datetime_as_string(np.datetime64("2025-06-30T15:00") + np.arange(60).astype("timedelta64[h]"),
+                                  unit="m").tolist()
+
+
+def forecast():
+    seedable = [False] * 60
+    potential = [0.0] * 60
+    probability = [0.0] * 60
+    for hour, mm, pct in [(2, 1.0, 50.0), (5, 2.0, 25.0),      # June 30: a tie at 0.5 mm, earliest wins
+                          (20, 0.5, 60.0), (30, 4.0, 80.0),     # July 1: hour 30 is best
+                          (58, 1.0, 90.0)]:                     # July 3
+        seedable[hour], potential[hour], probability[hour] = True, mm, pct
+    # July 2 has no seedable hour; values on unseedable hours never count
+    potential[40], probability[40] = 9.0, 95.0
+    return seedable, potential, probability
+
+
+def test_days_follow_calendar_boundaries():
+    daily = aggregate_daily(DATETIMES, *forecast())
+    assert daily["day"].astype(str).tolist() == ["2025-06-30", "2025-07-01", "2025-07-02", "2025-07-03"]
+    assert daily["hours"].tolist() == [9, 24, 24, 3]
+    assert daily["seedable_hours"].tolist() == [2, 2, 0, 1]
+    assert daily["window"].tolist() == [2, 30, -1, 58]
+    assert np.allclose(daily["expected_rain_mm"], [0.5, 3.2, 0.0, 0.9])
+    assert daily["probability"].tolist() == [50.0, 80.0, 0.0, 90.0]
+    assert np.allclose(daily["total_potential_mm"], [3.0, 4.5, 0.0, 1.0])
+
+
+def test_day_without_seedable_hours_has_no_window():
+    records = daily_records(aggregate_daily(DATETIMES, *forecast()), DATETIMES)
+    assert [record["best_window"] for record in records] == \
+        ["2025-06-30T17:00", "2025-07-01T21:00", None, "2025-07-03T01:00"]
+    assert records[2] == {"date": "2025-07-02", "hours": 24, "seedable_hours": 0, "best_window": None,
+                          "expected_rain_mm": 0.0, "probability": 0.0, "total_potential_mm": 0.0}
+
+
+def test_nothing_seedable_and_empty_forecasts():
+    daily = aggregate_daily(DATETIMES, [False] * 60, [1.0] * 60, [50.0] * 60)
+    assert daily["window"].tolist() == [-1] * 4
+    assert daily["total_potential_mm"].tolist() == [0.0] * 4
+    empty = aggregate_daily([], [], [], [])
+    assert all(len(values) == 0 for values in empty.values())
+    assert daily_records(empty, []) == []
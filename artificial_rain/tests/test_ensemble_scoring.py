@@ -0,0 +1,75 @@
+from datetime import datetime
+
+import numpy as np
+
+from ensemble_scoring import member_suffixes
+from pipeline import score_forecast
+from seedability_engine import forecast_entries, hourly_arrays, score_hours
+from stub_server import current_payload
+
+NOW = datetime.now()
+
+
+def agreeing_ensemble(payload, members=4):
+    """Ensemble payload whose members all repeat the deterministic forecast"""
+    hourly = dict(payload["hourly"])
+    for key in list(hourly):
+        if key != "time":
+            for n in range(1, members):
+                hourly[f"{key}_member{n:02d}"] = hourly[key]
+    return {"hourly": hourly}
+
+
+def test_member_suffixes():
+    ensemble = agreeing_ensemble(current_payload(26.91, 75.81), members=3)
+    assert member_suffixes(ensemble["hourly"]) == ["", "_member01", "_member02"]
+
+
+def test_ensemble_probability_is_not_capped_at_95():
+    payload = current_payload(26.91, 75.81)
+    heuristic = score_forecast(payload, "semi_arid", NOW, hours=168)
+    ensemble = score_forecast(payload, "semi_arid", NOW, hours=168, ensemble=agreeing_ensemble(payload))
+    assert heuristic.found and ensemble.members == 4
+    for plain, scored in zip(heuristic.entries, ensemble.entries):
+        assert plain["precipitation_probability"] <= 95
+        if scored["is_seedable"]:
+            # Every member is seedable, so the share is 100%
+            assert scored["precipitation_probability"] == 100
+        else:
+            assert scored["precipitation_probability"] == 0 == plain["precipitation_probability"]
+
+
+def test_ensemble_outlook_covers_hours_the_deterministic_run_rejects():
+    payload = current_payload(26.91, 75.81)
+    # Three of four members repeat a forecast with seedable hours; the control and the
+    # deterministic forecast have clear skies
+    ensemble = agreeing_ensemble(payload)
+    clear = dict(payload, hourly=dict(payload["hourly"]))
+    for key in ("cloudcover", "cloudcover_low", "cloudcover_mid", "cloudcover_high"):
+        clear["hourly"][key] = [0] * len(payload["hourly"]["time"])
+        ensemble["hourly"][key] = clear["hourly"][key]
+    members = score_forecast(payload, "semi_arid", NOW, hours=168)
+    scored = score_forecast(clear, "semi_arid", NOW, hours=168, ensemble=ensemble)
+    assert members.found and not scored.found
+    for member, entry in zip(members.entries, scored.entries):
+        assert not entry["is_seedable"]
+        if member["is_seedable"]:
+            assert entry["precipitation_probability"] == 75
+            assert entry["precipitation_potential_mm"] == member["precipitation_potential_mm"]
+        else:
+            assert entry["precipitation_probability"] == 0 == entry["precipitation_potential_mm"]
+
+
+def test_probability_cap_follows_the_ensemble_column():
+    payload = current_payload(26.91, 75.81)
+    hourly = payload["hourly"]
+    columns = score_hours(hourly_arrays(hourly), "semi_arid")
+    seedable = np.flatnonzero(columns["is_seedable"])[:4]
+    columns["precipitation_probability"][seedable] = [95.0, 95.0, 97.5, 100.0]
+    columns["ensemble"] = np.zeros(len(hourly["time"]), dtype=bool)
+    columns["ensemble"][seedable[1:]] = True
+    entries = forecast_entries(hourly, columns, slice(None))
+    shown = [entries[i]["precipitation_probability"] for i in seedable]
+    # The heuristic cap shows as the int 95, as before; ensemble shares, 95% included, pass through
+    assert shown == [95, 95.0, 97.5, 100]
+    assert type(shown[0]) is int and type(shown[1]) is float
@@ -0,0 +1,103 @@
+import os
+import time
+from datetime import datetime, timezone
+
+import pytest
+import requests
+
+import forecast_cache
+from forecast_cache import ForecastCache, model_run_time
+from stub_server import forecast_response
+
+LAT, LON = 26.91, 75.81
+
+
+def with_etag(query, headers):
+    """Forecast with an ETag, answering a matching If-None-Match with 304"""
+    if headers.get("If-None-Match") == '"run-1"':
+        return 304, {"ETag": '"run-1"'}, b""
+    status, _, body = forecast_response(query)
+    return status, {"ETag": '"run-1"'}, body
+
+
+def test_model_run_time_starts_each_six_hour_cycle():
+    assert model_run_time(datetime(2024, 5, 1, 0, 0, tzinfo=timezone.utc)) == "2024-05-01T00:00Z"
+    assert model_run_time(datetime(2024, 5, 1, 11, 59, tzinfo=timezone.utc)) == "2024-05-01T06:00Z"
+    assert model_run_time(datetime(2024, 5, 1, 23, 0, tzinfo=timezone.utc)) == "2024-05-01T18:00Z"
+
+
+def test_fresh_entries_are_served_without_a_request(stub_api, tmp_path):
+    cache = ForecastCache(str(tmp_path))
+    first = cache.fetch(LAT, LON)
+    assert cache.fetch(LAT + 0.001, LON) == first    # same 0.01° cell
+    assert len(stub_api.requests) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire_after_the_ttl(stub_api, tmp_path, monkeypatch):
+    cache = ForecastCache(str(tmp_path), ttl_seconds=3600)
+    cache.fetch(LAT, LON)
+    assert cache.get(LAT, LON) is not None
+    later = time.time() + 3601
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert cache.get(LAT, LON) is None
+    cache.fetch(LAT, LON)
+    assert len(stub_api.requests) == 2
+
+
+def test_entries_expire_with_a_new_model_run(stub_api, tmp_path, monkeypatch):
+    cache = ForecastCache(str(tmp_path))
+    cache.fetch(LAT, LON)
+    monkeypatch.setattr(forecast_cache, "model_run_time", lambda: "2099-01-01T00:00Z")
+    assert cache.get(LAT, LON) is None
+    cache.fetch(LAT, LON)
+    assert len(stub_api.requests) == 2
+    assert cache.get(LAT, LON) is not None
+
+
+def test_not_modified_renews_the_stored_entry(stub_api, tmp_path):
+    stub_api.respond = with_etag
+    cache = ForecastCache(str(tmp_path), ttl_seconds=0)
+    first = cache.fetch(LAT, LON)
+    second = cache.fetch(LAT, LON)
+    assert second == first
+    assert "If-None-Match" not in stub_api.requests[0][1]
+    assert stub_api.requests[1][1]["If-None-Match"] == '"run-1"'
+    entry = cache._read(cache._path(LAT, LON, forecast_cache.HOURLY_VARIABLES))
+    assert entry["etag"] == '"run-1"' and entry["payload"] == first
+
+
+def test_failed_refresh_serves_the_stale_entry(stub_api, tmp_path):
+    cache = ForecastCache(str(tmp_path), ttl_seconds=0)
+    first = cache.fetch(LAT, LON)
+    stub_api.respond = lambda query, headers: (500, {}, b"")
+    assert cache.fetch(LAT, LON) == first
+
+
+def test_offline_mode_serves_last_good_and_never_fetches(stub_api, tmp_path):
+    ForecastCache(str(tmp_path), ttl_seconds=0).fetch(LAT, LON)
+    offline = ForecastCache(str(tmp_path), ttl_seconds=0, offline=True)
+    assert offline.fetch(LAT, LON)["hourly"]
+    with pytest.raises(LookupError):
+        offline.fetch(10.5, 76.0)
+    assert len(stub_api.requests) == 1
+
+
+def test_failed_first_fetch_raises(stub_api, tmp_path):
+    stub_api.respond = lambda query, headers: (503, {}, b"")
+    cache = ForecastCache(str(tmp_path))
+    with pytest.raises(requests.HTTPError):
+        cache.fetch(LAT, LON)
+    assert cache.last_good(LAT, LON) is None
+
+
+def test_eviction_keeps_the_newest_entries(tmp_path):
+    cache = ForecastCache(str(tmp_path), max_entries=2)
+    for i in range(3):
+        cache.put(10 + i, 70, {"hourly": {"time": []}}, evict=False)
+        path = cache._path(10 + i, 70, forecast_cache.HOURLY_VARIABLES)
+        stamp = time.time() - 100 + i
+        os.utime(path, (stamp, stamp))
+    cache.evict()
+    assert cache.last_good(10, 70) is None
+    assert cache.last_good(12, 70) is not None
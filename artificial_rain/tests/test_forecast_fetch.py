@@ -0,0 +1,97 @@
+import pytest
+import requests
+
+from forecast_cache import ForecastCache
+import forecast_fetch
+from forecast_fetch import ForecastError, fetch_ensemble, fetch_forecast, fetch_forecasts
+
+ERROR_BODY = {"error": True, "reason": "Latitude must be in range of -90 to 90°."}
+
+
+def test_single_fetch_checks_the_status(stub_api):
+    stub_api.respond = lambda query, headers: (400, {}, ERROR_BODY)
+    with pytest.raises(requests.HTTPError):
+        fetch_forecast(26.91, 75.81)
+
+
+def test_payload_without_hourly_data_is_rejected(stub_api):
+    stub_api.respond = lambda query, headers: (200, {}, ERROR_BODY)
+    with pytest.raises(ForecastError, match="Latitude must be"):
+        fetch_forecast(26.91, 75.81)
+
+
+def test_error_body_is_never_cached(stub_api, tmp_path):
+    cache = ForecastCache(str(tmp_path))
+    stub_api.respond = lambda query, headers: (400, {}, ERROR_BODY)
+    with pytest.raises(requests.HTTPError):
+        fetch_forecasts([(26.91, 75.81), (10.5, 76.0)], cache=cache)
+    assert cache.last_good(26.91, 75.81) is None
+    with pytest.raises(requests.HTTPError):
+        fetch_forecast(26.91, 75.81, cache)
+    assert cache.last_good(26.91, 75.81) is None
+    with pytest.raises(ValueError):
+        cache.put(26.91, 75.81, ERROR_BODY)
+
+
+def test_multi_coordinate_fetch_returns_one_payload_per_location(stub_api):
+    locations = [(26.91, 75.81), (10.5, 76.0), (19.0, 75.0)]
+    payloads = fetch_forecasts(locations, chunk_size=2)
+    assert [payload["latitude"] for payload in payloads] == [26.91, 10.5, 19.0]
+    assert len(stub_api.requests) == 2
+
+
+def test_failed_chunk_falls_back_to_stale_entries(stub_api, tmp_path):
+    cache = ForecastCache(str(tmp_path), ttl_seconds=0)
+    locations = [(26.91, 75.81), (10.5, 76.0)]
+    first = fetch_forecasts(locations, cache=cache)
+    stub_api.respond = lambda query, headers: (503, {}, b"")
+    assert fetch_forecasts(locations, cache=cache) == first
+
+
+def test_failed_chunk_without_stale_entries_raises(stub_api, tmp_path):
+    cache = ForecastCache(str(tmp_path))
+    stub_api.respond = lambda query, headers: (200, {}, [{"hourly": {}}])
+    with pytest.raises(ForecastError, match="Expected 2 forecasts"):
+        fetch_forecasts([(26.91, 75.81), (10.5, 76.0)], cache=cache)
+
+
+def test_failed_chunk_records_locations_without_stale_entries(stub_api, tmp_path):
+    cache = ForecastCache(str(tmp_path), ttl_seconds=0)
+    first = fetch_forecasts([(26.91, 75.81)], cache=cache)
+    stub_api.respond = lambda query, headers: (503, {}, b"")
+    failures = {}
+    payloads = fetch_forecasts([(10.5, 76.0), (26.91, 75.81), (19.0, 75.0)], cache=cache, failures=failures)
+    assert payloads == [None, first[0], None]
+    assert sorted(failures) == [0, 2]
+    assert all(isinstance(exc, requests.HTTPError) for exc in failures.values())
+
+
+def test_offline_misses_are_recorded(stub_api, tmp_path):
+    fetch_forecasts([(26.91, 75.81)], cache=ForecastCache(str(tmp_path)))
+    failures = {}
+    payloads = fetch_forecasts([(26.91, 75.81), (10.5, 76.0)], cache=ForecastCache(str(tmp_path), offline=True),
+                               failures=failures)
+    assert payloads[0] is not None and payloads[1] is None
+    assert list(failures) == [1] and isinstance(failures[1], LookupError)
+
+
+def test_requests_carry_a_timeout(stub_api, monkeypatch):
+    seen = []
+    original = requests.Session.get
+
+    def get(self, url, **kwargs):
+        seen.append(kwargs.get("timeout"))
+        return original(self, url, **kwargs)
+
+    monkeypatch.setattr(requests.Session, "get", get)
+    fetch_forecasts([(26.91, 75.81), (10.5, 76.0)])
+    fetch_forecast(26.91, 75.81)
+    assert seen and all(timeout for timeout in seen)
+
+
+def test_ensemble_payload_is_checked(stub_api, monkeypatch):
+    monkeypatch.setattr(forecast_fetch, "ENSEMBLE_URL", stub_api.url)
+    assert "hourly" in fetch_ensemble(26.91, 75.81)
+    stub_api.respond = lambda query, headers: (200, {}, {"hourly": {"temperature_2m": [20.0]}})
+    with pytest.raises(ForecastError, match="without hourly data"):
+        fetch_ensemble(26.91, 75.81)
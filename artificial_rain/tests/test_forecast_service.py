@@ -0,0 +1,136 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from forecast_cache import ForecastCache
+from forecast_service import ForecastService, make_server
+from stub_server import forecast_response
+
+FARM = {"location": {"latitude": 26.91, "longitude": 75.81},
+        "crop": {"water_requirement_mm_per_week": 35},
+        "irrigation": {"max_capacity_mm_per_day": 8}}
+
+
+@pytest.fixture
+def service(stub_api, tmp_path):
+    service = ForecastService(ForecastCache(str(tmp_path), keep_in_memory=True), FARM)
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    service.url = f"http://127.0.0.1:{server.server_port}"
+    yield service
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def get(service, path):
+    """(status, JSON body) of a GET against the service"""
+    try:
+        with urlopen(service.url + path, timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except HTTPError as exc:
+        return exc.code, json.loads(exc.read())
+
+
+def test_forecast_defaults_to_the_configured_farm(service):
+    status, body = get(service, "/forecast")
+    assert status == 200
+    assert body["region_type"] and len(body["entries"]) == 48
+
+
+def test_forecast_days_adds_the_daily_outlook(service):
+    status, body = get(service, "/forecast?lat=10.5&lon=76.0&days=3")
+    assert status == 200
+    assert len(body["entries"]) == 72
+    assert sum(day["hours"] for day in body["daily"]) == 72
+
+
+def test_calendar_and_plan(service):
+    _, forecast = get(service, "/forecast")
+    status, calendar = get(service, "/calendar?min_score=0")
+    assert status == 200
+    assert [entry["datetime"] for entry in calendar] == [
+        entry["datetime"] for entry in forecast["entries"] if entry["is_seedable"]]
+    status, plan = get(service, "/plan?requirement=20&capacity=4&max_seeding_days=2")
+    assert status == 200
+    assert len(plan["days"]) == 7 and sum(plan["seeding"]) <= 2
+
+
+def test_health_counts_requests(service):
+    get(service, "/forecast")
+    status, body = get(service, "/health")
+    assert status == 200
+    assert body["status"] == "ok" and body["requests"] == 1 and body["cache_misses"] == 1
+
+
+@pytest.mark.parametrize("path", ["/forecast?lat=north", "/forecast?lat=95&lon=0", "/forecast?days=0",
+                                  "/forecast?days=many", "/calendar?start=tomorrow", "/plan?capacity=x"])
+def test_invalid_parameters_are_bad_requests(service, stub_api, path):
+    status, body = get(service, path)
+    assert status == 400 and body["error"].startswith("Bad request")
+    assert stub_api.requests == []
+
+
+def test_missing_location_is_a_bad_request(service):
+    service.default_config = {}
+    assert get(service, "/forecast")[0] == 400
+
+
+def test_unknown_path(service):
+    assert get(service, "/radar")[0] == 404
+
+
+def test_upstream_failures_are_bad_gateway(service, stub_api):
+    stub_api.respond = lambda query, headers: (500, {}, b"")
+    assert get(service, "/forecast")[0] == 502
+    # An error object instead of a forecast is an upstream failure, not a bad request
+    stub_api.respond = lambda query, headers: (200, {}, {"error": True, "reason": "Parameter missing"})
+    status, body = get(service, "/forecast")
+    assert status == 502 and "Parameter missing" in body["error"]
+
+
+def test_processing_failures_are_server_errors(service, monkeypatch):
+    def broken(*args, **kwargs):
+        raise KeyError("hourly")
+
+    monkeypatch.setattr(service, "forecast", broken)
+    assert get(service, "/forecast")[0] == 500
+
+
+def test_offline_miss_is_unavailable(service):
+    service.cache.offline = True
+    assert get(service, "/forecast")[0] == 503
+
+
+def test_concurrent_requests_share_one_fetch(service, stub_api):
+    def slow(query, headers):
+        time.sleep(0.5)
+        return forecast_response(query)
+
+    stub_api.respond = slow
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: get(service, "/forecast"), range(8)))
+    assert all(status == 200 for status, _ in results)
+    assert all(body == results[0][1] for _, body in results)
+    assert len(stub_api.requests) == 1
+    assert service.coalesced == service.requests - 1
+
+    # Later requests for the cell reuse the scored forecast
+    get(service, "/forecast?lat=26.912&lon=75.814")
+    stats = service.stats()
+    assert len(stub_api.requests) == 1 and stats["memo_hits"] >= 1
+
+
+def test_concurrent_eviction_tolerates_removed_entries(tmp_path):
+    cache = ForecastCache(str(tmp_path), max_entries=1, max_age_seconds=0)
+    for i in range(20):
+        cache.put(10 + i, 70, {"hourly": {"time": []}}, evict=False)
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda _: cache.evict(), range(8)))
+    assert not [name for name in tmp_path.iterdir() if name.suffix == ".json"]
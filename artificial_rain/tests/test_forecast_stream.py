@@ -0,0 +1,86 @@
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from forecast_stream import (NDJSONWriter, StreamingJSONWriter, calendar_predicate, filter_stream,
+                             iter_forecast_records, iter_json_array, join_record_texts, record_text,
+                             split_record_texts)
+from pipeline import score_forecast
+from stub_server import current_payload
+
+RECORDS = [
+    {"datetime": "2025-06-01T00:00", "is_seedable": True, "note": "brackets ] [ and braces } {, commas"},
+    {"datetime": "2025-06-01T01:00", "is_seedable": False, "nested": {"values": [1, 2.5, None, [3]]}},
+    {"datetime": "2025-06-01T02:00", "is_seedable": True, "text": "quote \" and escapes \\ \n", "ü": "☁️"},
+    123456789,
+    "a string element",
+    [],
+]
+
+
+def forecast_entries():
+    payload = current_payload(26.91, 75.81)
+    return score_forecast(payload, "semi_arid", datetime.fromisoformat(payload["hourly"]["time"][30]),
+                          hours=168).entries
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 1 << 16])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_records_split_across_reads(chunk_size, indent):
+    text = json.dumps(RECORDS, indent=indent)
+    assert list(iter_json_array(io.StringIO(text), chunk_size)) == json.loads(text)
+
+
+@pytest.mark.parametrize("text", ["[]", "  [ ]\n", "[\n]"])
+def test_empty_arrays(text):
+    assert list(iter_json_array(io.StringIO(text), chunk_size=1)) == []
+
+
+@pytest.mark.parametrize("text", ["", "   ", '{"a": 1}', '[{"a": 1}, {"b": ', "[1, 2", '[{"a": 1}', '[{"a": 1}, ?]'])
+@pytest.mark.parametrize("chunk_size", [1, 4, 1 << 16])
+def test_malformed_input_raises(text, chunk_size):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(text), chunk_size))
+
+
+def test_stream_filter_matches_json_load_and_the_list_filter(tmp_path):
+    entries = forecast_entries()
+    path = tmp_path / "seedable_forecast.json"
+    with open(path, "w") as f:
+        json.dump(entries, f, indent=2)
+    assert list(iter_forecast_records(str(path))) == json.loads(path.read_text())
+
+    # The calendar the list comprehension of the original filter script wrote
+    expected = [{"datetime": entry["datetime"],
+                 "precipitation_potential_mm": entry["precipitation_potential_mm"],
+                 "precipitation_probability": entry["precipitation_probability"]}
+                for entry in json.loads(path.read_text()) if entry.get("is_seedable")]
+    assert expected
+    out = io.StringIO()
+    assert filter_stream(iter_forecast_records(str(path)), calendar_predicate(), StreamingJSONWriter(out)) == \
+        len(expected)
+    assert out.getvalue() == json.dumps(expected, indent=2)
+
+    ndjson = tmp_path / "fleet.ndjson"
+    with open(ndjson, "w") as f:
+        filter_stream(entries, lambda record: True, NDJSONWriter(f), transform=lambda record: record)
+    out = io.StringIO()
+    filter_stream(iter_forecast_records(str(ndjson)), calendar_predicate(), StreamingJSONWriter(out))
+    assert out.getvalue() == json.dumps(expected, indent=2)
+
+
+def test_empty_calendar_matches_json_dump():
+    out = io.StringIO()
+    assert filter_stream([{"is_seedable": False}], calendar_predicate(), StreamingJSONWriter(out)) == 0
+    assert out.getvalue() == json.dumps([], indent=2)
+
+
+def test_record_texts_round_trip():
+    entries = forecast_entries()
+    text = json.dumps(entries, indent=2)
+    texts = split_record_texts(text)
+    assert texts == [record_text(entry) for entry in entries]
+    assert join_record_texts(texts) == text
+    assert split_record_texts("[]") == [] and join_record_texts([]) == "[]"
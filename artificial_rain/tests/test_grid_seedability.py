@@ -0,0 +1,89 @@
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from grid_seedability import TILE_FIELDS, Grid, build_grid, encode_tile, read_hour, read_tile, synthetic_inputs
+from regions import classify_climate_zones
+from seedability_engine import score_hours
+
+NOW = datetime(2025, 7, 1, 6)
+HOURS = 5
+
+
+def stored(values, scale):
+    """What a packed field reads back as: rounded to its scale"""
+    return np.round(values / scale) * scale
+
+
+@pytest.fixture
+def tiles():
+    """Inputs of every tile build_grid() scores, keyed by tile origin; some cells lack data"""
+    seen = {}
+
+    def source(lats, lons, hours, now):
+        rows = synthetic_inputs(lats, lons, hours, now)
+        rows["temps"][::5, 1] = np.nan
+        seen[(lats[0], lons[0])] = (lats, lons, rows)
+        return rows
+
+    return seen, source
+
+
+def expected_raster(grid, seen, field, hour):
+    raster = np.full((grid.rows, grid.cols), np.nan)
+    scale = {name: scale for name, _, scale, _ in TILE_FIELDS}[field]
+    for lats, lons, rows in seen.values():
+        columns = score_hours(rows, classify_climate_zones(lats, lons)[:, None])
+        valid = np.isfinite(rows["temps"][:, hour])
+        values = np.where(valid, stored(np.asarray(columns[field][:, hour], dtype=float), scale), np.nan)
+        r = np.round((grid.north - lats) / grid.step).astype(int)
+        c = np.round((lons - grid.west) / grid.step).astype(int)
+        raster[r, c] = values
+    return raster
+
+
+def test_tiles_read_back_as_the_scores(tmp_path, tiles):
+    seen, source = tiles
+    # 7 x 10 cells in 4 x 4 tiles, so the last tile row and column are partial; the box
+    # straddles two climate zones
+    grid = Grid(22.7, 23.3, 72.0, 72.9, step=0.1, tile_size=4)
+    output_dir = str(tmp_path / "grid")
+    manifest = build_grid(grid, output_dir, HOURS, NOW, source=source)
+    assert (grid.rows, grid.cols, grid.tile_rows, grid.tile_cols) == (7, 10, 2, 3)
+    assert len(manifest["hours"]) == HOURS and manifest["hours"][0] == "2025-07-01T06:00"
+    with open(os.path.join(output_dir, "manifest.json")) as f:
+        assert json.load(f) == manifest
+    for hour in range(HOURS):
+        for field, _, _, _ in TILE_FIELDS:
+            np.testing.assert_allclose(read_hour(output_dir, field, hour),
+                                       expected_raster(grid, seen, field, hour), atol=1e-9)
+    assert manifest["seedable_cells"] == [
+        int(np.nansum(read_hour(output_dir, "is_seedable", hour))) for hour in range(HOURS)]
+
+
+def test_encode_tile_pads_partial_tiles_with_nodata(tmp_path):
+    shape, size = (2, 3), 4
+    lats, lons = np.meshgrid([23.1, 23.0], [72.0, 72.1, 72.2], indexing="ij")
+    rows = synthetic_inputs(lats.ravel(), lons.ravel(), 2, NOW)
+    columns = score_hours(rows, classify_climate_zones(lats.ravel(), lons.ravel())[:, None])
+    valid = np.ones(columns["seedability_score"].shape, dtype=bool)
+    valid[4, 1] = False
+    encoded = encode_tile(columns, valid, shape, size)
+    bytes_per_cell = sum(np.dtype(dtype).itemsize for _, dtype, _, _ in TILE_FIELDS)
+    assert [len(data) for data in encoded] == [size * size * bytes_per_cell] * 2
+
+    manifest = {"tile_size": size, "tile_path": "h{hour:03d}/{tile_row}_{tile_col}.bin",
+                "fields": [{"field": field, "dtype": dtype, "scale": scale, "nodata": nodata}
+                           for field, dtype, scale, nodata in TILE_FIELDS]}
+    for hour, data in enumerate(encoded):
+        os.makedirs(tmp_path / f"h{hour:03d}")
+        (tmp_path / f"h{hour:03d}" / "0_0.bin").write_bytes(data)
+        tile = read_tile(str(tmp_path), manifest, hour, 0, 0)
+        for field, _, scale, _ in TILE_FIELDS:
+            values = stored(np.asarray(columns[field][:, hour], dtype=float), scale)
+            expected = np.full((size, size), np.nan)
+            expected[:shape[0], :shape[1]] = np.where(valid[:, hour], values, np.nan).reshape(shape)
+            np.testing.assert_allclose(tile[field], expected, atol=1e-9)
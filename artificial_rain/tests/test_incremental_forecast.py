@@ -0,0 +1,126 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import pipeline
+from forecast_columns import ForecastColumns, columnar_path_for
+from incremental_forecast import load_state, state_path_for
+from pipeline import save_forecast, score_forecast
+from stub_server import current_payload
+
+NOW = datetime.now().replace(minute=0, second=0, microsecond=0)
+HOURS = 48
+
+
+@pytest.fixture
+def paths(tmp_path):
+    json_path = str(tmp_path / "seedable_forecast.json")
+    return json_path, state_path_for(json_path)
+
+
+@pytest.fixture
+def encoded(monkeypatch):
+    """Entries encoded to JSON text by save_forecast()"""
+    encoded = []
+    record_text = pipeline.record_text
+
+    def counting(entry):
+        encoded.append(entry["datetime"])
+        return record_text(entry)
+
+    monkeypatch.setattr(pipeline, "record_text", counting)
+    return encoded
+
+
+def run(payload, paths, now=NOW, previous_entries=None, ensemble=None):
+    json_path, state_path = paths
+    forecast = score_forecast(payload, "semi_arid", now, load_state(state_path), incremental=True,
+                              hours=HOURS, previous_entries=previous_entries, ensemble=ensemble)
+    return forecast, save_forecast(forecast, json_path, state_path)
+
+
+def edit(payload, hour, humidity):
+    hourly = payload["hourly"]
+    hourly["relativehumidity_2m"][hourly["time"].index(hour.strftime("%Y-%m-%dT%H:00"))] = humidity
+
+
+def mtimes(paths):
+    json_path, state_path = paths
+    files = [json_path, state_path] + [os.path.join(columnar_path_for(json_path), name)
+                                       for name in os.listdir(columnar_path_for(json_path))]
+    return {path: os.stat(path).st_mtime_ns for path in files}
+
+
+def test_unchanged_rerun_writes_nothing(paths, encoded):
+    payload = current_payload(26.91, 75.81)
+    _, saved = run(payload, paths)
+    assert saved and len(encoded) == HOURS
+    before = mtimes(paths)
+    forecast, saved = run(payload, paths)
+    assert not saved and forecast.rescored == 0
+    assert mtimes(paths) == before
+
+
+def test_changed_hour_is_the_only_one_rebuilt_and_encoded(paths, encoded, monkeypatch):
+    payload = current_payload(26.91, 75.81)
+    first, _ = run(payload, paths)
+    encoded.clear()
+    before = mtimes(paths)
+
+    built = []
+    forecast_entries = pipeline.forecast_entries
+
+    def counting(hourly, columns, index):
+        entries = forecast_entries(hourly, columns, index)
+        built.extend(entries)
+        return entries
+
+    monkeypatch.setattr(pipeline, "forecast_entries", counting)
+    edit(payload, NOW + timedelta(hours=5), 99)
+    forecast, saved = run(payload, paths, previous_entries=first.entries)
+    assert saved and forecast.rescored == 1
+    assert len(built) == 1 and encoded == [(NOW + timedelta(hours=5)).strftime("%Y-%m-%dT%H:00")]
+    full = score_forecast(payload, "semi_arid", NOW, hours=HOURS)
+    assert forecast.entries == full.entries
+    with open(paths[0]) as f:
+        assert f.read() == json.dumps(full.entries, indent=2)
+
+    # Only the columns the edit touched are rewritten; datetime and the inputs left alone are not
+    after = mtimes(paths)
+    store = columnar_path_for(paths[0])
+    rewritten = {os.path.basename(path) for path in after
+                 if path.startswith(store) and after[path] != before[path]}
+    assert "humidity.npy" in rewritten and "manifest.json" in rewritten
+    assert not rewritten & {"datetime.npy", "temperature.npy", "pressure.npy"}
+    assert ForecastColumns(store)["humidity"].tolist() == [entry["humidity"] for entry in full.entries]
+
+
+def test_shifted_window_encodes_only_the_new_hour(paths, encoded):
+    payload = current_payload(26.91, 75.81)
+    run(payload, paths)
+    encoded.clear()
+    later = NOW + timedelta(hours=1)
+    forecast, saved = run(payload, paths, now=later)
+    assert saved and forecast.rescored == 1 and len(encoded) == 1
+    full = score_forecast(payload, "semi_arid", later, hours=HOURS)
+    with open(paths[0]) as f:
+        assert f.read() == json.dumps(full.entries, indent=2)
+    store = ForecastColumns(columnar_path_for(paths[0]))
+    assert len(store) == HOURS
+    assert store["seedability_score"].tolist() == [entry["seedability_score"] for entry in full.entries]
+
+
+def test_json_written_by_another_run_is_not_copied(paths, encoded):
+    payload = current_payload(26.91, 75.81)
+    run(payload, paths)
+    # A non-incremental run of other inputs leaves the stored state behind its JSON
+    other = current_payload(26.91, 75.81, seed=7)
+    save_forecast(score_forecast(other, "semi_arid", NOW, hours=HOURS), paths[0])
+    encoded.clear()
+    edit(payload, NOW + timedelta(hours=5), 99)
+    forecast, _ = run(payload, paths)
+    assert len(encoded) == HOURS
+    with open(paths[0]) as f:
+        assert f.read() == json.dumps(forecast.entries, indent=2)
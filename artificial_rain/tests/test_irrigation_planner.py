@@ -0,0 +1,44 @@
+import numpy as np
+
+from irrigation_planner import plan_forecast_week, plan_irrigation
+
+
+def test_seeded_day_still_irrigates_when_capacity_binds():
+    # Default farm: 50 mm/week on a 4 mm/day drip line, seedable windows every day
+    expected_rain = [0.2, 0.3, 0.1, 0.25, 0.15, 0.2, 0.1]
+    plan = plan_irrigation(expected_rain, 50, 4.0)
+    assert plan["seeding"].all()
+    assert np.allclose(plan["irrigation"], 4.0)
+    assert plan["pumped"] == 28.0
+    assert np.isclose(plan["shortfall"], 50 - 28 - sum(expected_rain))
+
+
+def test_rain_is_a_credit_and_unseeded_days_pump_first():
+    plan = plan_irrigation([5, 0, 0, 0, 0, 0, 0], 10, 4.0)
+    assert plan["seeding"].tolist() == [True] + [False] * 6
+    assert plan["irrigation"].tolist() == [0, 4, 1, 0, 0, 0, 0]
+    assert plan["shortfall"] == 0
+
+
+def test_seeded_day_irrigates_once_unseeded_capacity_is_used():
+    plan = plan_irrigation([1, 1, 1, 1, 1, 1, 0], 20, 4.0)
+    assert plan["seeding"].tolist() == [True] * 6 + [False]
+    # 14 mm to pump: Sunday (unseeded) first, then the seeded days in week order
+    assert plan["irrigation"].tolist() == [4, 4, 2, 0, 0, 0, 4]
+    assert plan["shortfall"] == 0
+
+
+def test_max_seeding_days_keeps_the_best_days():
+    plan = plan_irrigation([0.1, 0.5, 0.2, 0.4, 0, 0, 0], 50, 4.0, max_seeding_days=2)
+    assert np.flatnonzero(plan["seeding"]).tolist() == [1, 3]
+
+
+def test_plan_forecast_week_from_entries():
+    hours = np.arange("2024-07-01T00", "2024-07-08T00", dtype="datetime64[h]")
+    entries = [{"datetime": str(hour)[:13] + ":00", "is_seedable": hour.astype(int) % 24 == 14,
+                "precipitation_potential_mm": 0.5, "precipitation_probability": 40}
+               for hour in hours]
+    plan = plan_forecast_week(entries, 50, 4.0)
+    assert plan["seeding"].all()
+    assert np.allclose(plan["irrigation"], 4.0)
+    assert np.isclose(plan["rainfall"], 7 * 0.2)
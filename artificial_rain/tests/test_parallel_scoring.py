@@ -0,0 +1,91 @@
+import json
+import os
+from datetime import datetime
+from multiprocessing import shared_memory
+
+import pytest
+
+import batch_forecast
+import parallel_scoring
+from batch_forecast import run_batch
+from parallel_scoring import score_fleet_parallel
+from regions import region_id
+from stub_server import current_payload
+
+NOW = datetime.now()
+# Farms in several climate zones, so the shards mix region profiles
+FARMS = [(26.91, 75.81), (10.5, 76.0), (19.0, 75.0), (30.9, 75.85), (12.97, 77.59),
+         (22.57, 88.36), (28.61, 77.21), (9.93, 76.26), (23.02, 72.57)]
+
+
+class FixedNow(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW
+
+
+@pytest.fixture
+def farms_path(tmp_path, monkeypatch):
+    # Serial and parallel runs score the same window even across an hour boundary
+    monkeypatch.setattr(batch_forecast, "datetime", FixedNow)
+    path = tmp_path / "farms.json"
+    path.write_text(json.dumps([{"farm_id": f"farm-{i}", "location": {"latitude": lat, "longitude": lon}}
+                                for i, (lat, lon) in enumerate(FARMS)]))
+    return str(path)
+
+
+def tree(directory):
+    """relative path -> bytes of every file under `directory`"""
+    files = {}
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, directory)] = f.read()
+    return files
+
+
+@pytest.mark.parametrize("output_format", ["both", "ndjson"])
+def test_processes_match_the_serial_path(tmp_path, stub_api, farms_path, output_format):
+    serial = run_batch(farms_path, str(tmp_path / "serial"), output_format=output_format, cell_size=0)
+    parallel = run_batch(farms_path, str(tmp_path / "parallel"), output_format=output_format, processes=2,
+                         cell_size=0)
+    assert list(parallel) == list(serial)
+    assert [seedable for seedable, _, _ in parallel.values()] == [records.found for records, _ in serial.values()]
+    files = tree(tmp_path / "serial")
+    assert files == tree(tmp_path / "parallel")
+    expected = {"fleet_forecast.ndjson"} if output_format == "ndjson" else {"farm-0_seedable_forecast.json"}
+    assert expected <= set(files)
+    assert not any(".shard_" in name for name in files)
+
+
+def test_incremental_reruns_match_the_serial_path(tmp_path, stub_api, farms_path):
+    for rerun in range(2):
+        serial = run_batch(farms_path, str(tmp_path / "serial"), incremental=True, cell_size=0)
+        parallel = run_batch(farms_path, str(tmp_path / "parallel"), incremental=True, processes=2, cell_size=0)
+        # Every farm is new on the first run and unchanged on the rerun
+        assert [changed for _, changed in serial.values()] == [not rerun] * len(FARMS)
+        assert [changed for _, changed, _ in parallel.values()] == [not rerun] * len(FARMS)
+        assert tree(tmp_path / "serial") == tree(tmp_path / "parallel")
+
+
+def test_shared_memory_is_released_when_a_shard_fails(tmp_path, monkeypatch):
+    specs = []
+    original = parallel_scoring.SharedColumns.__init__
+
+    def init(self, columns=None, spec=None):
+        original(self, columns, spec)
+        specs.append(self.spec)
+
+    monkeypatch.setattr(parallel_scoring.SharedColumns, "__init__", init)
+    payloads = [current_payload(lat, lon) for lat, lon in FARMS[:3]]
+    farms = [{"farm_id": f"farm-{i}"} for i in range(3)]
+    regions = [region_id("semi_arid")] * 3
+    # Workers cannot write into a missing output directory
+    with pytest.raises(FileNotFoundError):
+        score_fleet_parallel(farms, payloads, regions, str(tmp_path / "missing"), 2, now=NOW)
+    names = [name for name, _, _ in specs[0].values()]
+    assert names
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
@@ -0,0 +1,38 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from regions import region_id
+from seedability_engine import forecast_entries, hourly_arrays, score_hours
+
+# expected_entries.json holds hours of synthetic forecasts for every climate zone and month
+# (monsoon months included), each with the fields the original per-hour forecast_seedable.py
+# loop derived from it. The engine has to reproduce them exactly, JSON number types included.
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "expected_entries.json")
+
+with open(FIXTURE, "r") as f:
+    CASES = json.load(f)
+
+
+def derived(entries, fields):
+    return {field: json.dumps([entry[field] for entry in entries]) for field in fields}
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda case: f"{case['region']}-{case['hourly']['time'][0][:7]}")
+def test_entries_match_the_per_hour_loop(case):
+    hourly = case["hourly"]
+    entries = forecast_entries(hourly, score_hours(hourly_arrays(hourly), case["region"]), slice(None))
+    expected = case["expected"]
+    assert derived(entries, expected) == {field: json.dumps(values) for field, values in expected.items()}
+
+
+def test_fleet_of_regions_scores_in_one_pass():
+    hourly = {key: [value for case in CASES for value in case["hourly"][key]] for key in CASES[0]["hourly"]}
+    regions = np.concatenate([np.full(len(case["hourly"]["time"]), region_id(case["region"])) for case in CASES])
+    entries = forecast_entries(hourly, score_hours(hourly_arrays(hourly), regions), slice(None))
+    fields = list(CASES[0]["expected"])
+    expected = {field: json.dumps([value for case in CASES for value in case["expected"][field]])
+                for field in fields}
+    assert derived(entries, fields) == expected
@@ -0,0 +1,69 @@
+import argparse
+
+import numpy as np
+import pytest
+
+from seedability_engine import hourly_arrays, score_hours
+from stub_server import current_payload
+from synthetic_forecast import synthetic_hourly
+from threshold_sweep import parameter_grid, parse_candidates, profile_parameters, sweep
+
+GRID = {
+    "seedability_threshold": [35, 50, 65],
+    "min_humidity": [30, 60],
+    "ideal_wind": [1.5, 3.0],
+    "cloud_weights": [(0.4, 0.5, 0.1), (0.2, 0.3, 0.5)],
+}
+
+
+def one_set_at_a_time(arrays, region, param_sets, index):
+    """sweep() results from one unbroadcast score_hours() call per parameter set"""
+    n_sets = len(next(iter(param_sets.values())))
+    result = {"seedable_hours": [], "expected_mm": [], "potential_mm": []}
+    for s in range(n_sets):
+        columns = score_hours(arrays, region, {field: values[s] for field, values in param_sets.items()}, index)
+        potential = columns["precipitation_potential_mm"]
+        result["seedable_hours"].append(int(columns["is_seedable"].sum()))
+        result["expected_mm"].append(float((potential * columns["precipitation_probability"] / 100).sum()))
+        result["potential_mm"].append(float(potential.sum()))
+    return result
+
+
+@pytest.mark.parametrize("region", ["semi_arid", "arid", "tropical_humid", "high_rainfall"])
+@pytest.mark.parametrize("chunk_cells", [1, 500, 10 ** 7])
+def test_chunked_sweep_matches_scoring_each_set(region, chunk_cells):
+    arrays = hourly_arrays(synthetic_hourly(np.datetime64("2025-07-01T00:00"), hours=240, seed=5))
+    param_sets = parameter_grid(GRID)
+    index = slice(12, 200)
+    result = sweep(arrays, region, param_sets, index, chunk_cells=chunk_cells)
+    expected = one_set_at_a_time(arrays, region, param_sets, index)
+    assert result["seedable_hours"].tolist() == expected["seedable_hours"]
+    assert np.allclose(result["expected_mm"], expected["expected_mm"])
+    assert np.allclose(result["potential_mm"], expected["potential_mm"])
+    # The sweep is not flat: the candidates change the answer
+    assert len(set(expected["seedable_hours"])) > 1
+
+
+def test_profile_values_reproduce_the_forecast():
+    arrays = hourly_arrays(current_payload(19.0, 75.0)["hourly"])
+    own = profile_parameters("semi_arid", GRID)
+    result = sweep(arrays, "semi_arid", own)
+    assert result["seedable_hours"].tolist() == [int(score_hours(arrays, "semi_arid")["is_seedable"].sum())]
+
+
+def test_parameter_grid_combines_every_candidate():
+    param_sets = parameter_grid(GRID)
+    assert {field: values.shape for field, values in param_sets.items()} == {
+        "seedability_threshold": (24,), "min_humidity": (24,), "ideal_wind": (24,), "cloud_weights": (24, 3)}
+    assert len(set(map(tuple, np.column_stack([param_sets["seedability_threshold"], param_sets["min_humidity"],
+                                                param_sets["ideal_wind"], param_sets["cloud_weights"]])))) == 24
+
+
+def test_min_cloud_is_rejected():
+    with pytest.raises(KeyError, match="does not change scores"):
+        parameter_grid({"min_cloud": [30, 40]})
+    with pytest.raises(KeyError):
+        parameter_grid({"lwc_floor": [0.1]})
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_candidates("min_cloud=30:60:10")
+    assert parse_candidates("seedability_threshold=40:50:5") == ("seedability_threshold", [40.0, 45.0, 50.0])
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from window_ranking import TopWindows, best_contiguous_window, best_per_day, top_entries, top_k
+
+# Few distinct values, so most ranks are decided by ties
+SCORES = np.random.default_rng(7).integers(0, 6, 40).astype(float).tolist()
+MASK = [score % 2 == 0 or i % 3 == 0 for i, score in enumerate(SCORES)]
+
+
+def sorted_top(scores, k, mask=None):
+    """The original ranking: a stable descending sort, cut to k"""
+    candidates = [i for i in range(len(scores)) if mask is None or mask[i]]
+    return sorted(candidates, key=lambda i: scores[i], reverse=True)[:k]
+
+
+@pytest.mark.parametrize("k", [0, 1, 3, 5, 17, 39, 40, 41, 100])
+@pytest.mark.parametrize("mask", [None, MASK])
+def test_top_k_breaks_ties_like_the_sort(k, mask):
+    assert top_k(SCORES, k, mask).tolist() == sorted_top(SCORES, k, mask)
+
+
+@pytest.mark.parametrize("k", [0, 1, 5, 40, 100])
+def test_top_windows_match_the_sort_pushed_or_in_batches(k):
+    pushed = TopWindows(k)
+    for i, score in enumerate(SCORES):
+        pushed.push(score, i)
+    batched = TopWindows(k)
+    for start in range(0, len(SCORES), 7):
+        batched.extend(np.array(SCORES[start:start + 7]), list(range(start, start + 7)))
+    expected = sorted_top(SCORES, k)
+    assert [item for _, item in pushed.best()] == expected
+    assert [item for _, item in batched.best()] == expected
+    assert len(pushed) == min(k, len(SCORES))
+
+
+def test_empty_input():
+    assert top_k([], 3).tolist() == []
+    assert top_k(SCORES, 3, [False] * len(SCORES)).tolist() == []
+    assert TopWindows(3).best() == []
+    assert top_entries([], 5) == []
+    start, total = best_contiguous_window([], 3)
+    assert start == -1 and total == -np.inf
+    days, index = best_per_day([], [])
+    assert len(days) == 0 and len(index) == 0
+
+
+def test_top_entries_match_the_sort():
+    entries = [{"seedability_score": score, "is_seedable": seedable, "hour": i}
+               for i, (score, seedable) in enumerate(zip(SCORES, MASK))]
+    expected = [entry for entry in sorted(entries, key=lambda x: x["seedability_score"], reverse=True)
+                if entry["is_seedable"]][:5]
+    assert top_entries(entries, 5, seedable_only=True) == expected
+    assert top_entries(entries, 100) == sorted(entries, key=lambda x: x["seedability_score"], reverse=True)
+
+
+@pytest.mark.parametrize("hours", [1, 3, 8, 40, 41])
+@pytest.mark.parametrize("mask", [None, MASK])
+def test_best_contiguous_window_matches_brute_force(hours, mask):
+    runs = [(sum(SCORES[start:start + hours]), start) for start in range(len(SCORES) - hours + 1)
+            if mask is None or all(mask[start:start + hours])]
+    # Best total, earliest start on ties
+    expected = max(runs, key=lambda run: (run[0], -run[1]), default=(-np.inf, -1))
+    start, total = best_contiguous_window(SCORES, hours, mask)
+    assert (int(start), float(total)) == (expected[1], expected[0])
+
+    # Row by row on a (farms, hours) array
+    fleet = np.array([SCORES, SCORES[::-1]])
+    starts, totals = best_contiguous_window(fleet, hours)
+    rows = [best_contiguous_window(row, hours) for row in fleet]
+    assert starts.tolist() == [int(start) for start, _ in rows]
+    assert totals.tolist() == [float(total) for _, total in rows]
@@ -0,0 +1,178 @@
+import argparse
+import itertools
+import json
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from forecast_cache import ForecastCache
+from forecast_stream import NDJSONWriter
+from instrumentation import METRICS
+from pipeline import WEEK_HOURS, farm_region, fetch, load_config
+from regions import PROFILE_ARRAYS, THRESHOLD_FIELDS, get_region_profile
+from seedability_engine import forecast_window, hourly_arrays, score_hours
+from window_ranking import top_k
+
+# Threshold sweeps: many candidate parameter sets scored against the same hourly inputs in
+# one batched pass. The hours are laid out as a (1, hours) row and every swept parameter as
+# a (sets, 1) column, so score_hours() broadcasts them to a (sets, hours) grid and each row
+# is the forecast under one parameter set. Sets are processed in chunks to bound memory.
+#
+# Every profile threshold that scores read and the cloud layer weights can be swept.
+# min_cloud only feeds the limiting factor text of near misses and never changes a score,
+# so sweeping it is rejected rather than reporting identical sets.
+
+UNSCORED_FIELDS = ("min_cloud",)
+SWEEP_FIELDS = tuple(field for field in THRESHOLD_FIELDS if field not in UNSCORED_FIELDS) + ("cloud_weights",)
+CHUNK_CELLS = 2_000_000     # (set, hour) cells scored per batched call
+
+
+def parameter_grid(grid):
+    """Every combination of {field: candidate values} as {field: array over the sets}.
+
+    cloud_weights candidates are (low, mid, high) triples and give a (sets, 3) array.
+    """
+    for field in grid:
+        if field in UNSCORED_FIELDS:
+            raise KeyError(f"Cannot sweep {field!r}: it does not change scores")
+        if field not in SWEEP_FIELDS:
+            raise KeyError(f"Cannot sweep {field!r}")
+    fields = list(grid)
+    combinations = list(itertools.product(*(grid[field] for field in fields)))
+    return {field: np.array([combination[i] for combination in combinations], dtype=float)
+            for i, field in enumerate(fields)}
+
+
+def sweep(arrays, region, param_sets, index=None, chunk_cells=CHUNK_CELLS):
+    """Score the selected hours once per parameter set.
+
+    `arrays` come from hourly_arrays(), `region` is a region name or id whose profile
+    supplies every parameter not in `param_sets` (see parameter_grid()) and `index` selects
+    the hours. Returns per-set arrays: seedable_hours, expected_mm (potential mm x
+    probability) and potential_mm, summed over the hours.
+    """
+    index = slice(None) if index is None else index
+    rows = {name: values[index] if name == "time" else values[index][None, :]
+            for name, values in arrays.items()}
+    n_hours = len(rows["time"])
+    n_sets = len(next(iter(param_sets.values()))) if param_sets else 1
+    step = max(1, chunk_cells // max(1, n_hours))
+    result = {"seedable_hours": np.zeros(n_sets, dtype=np.int64),
+              "expected_mm": np.zeros(n_sets), "potential_mm": np.zeros(n_sets)}
+
+    with METRICS.stage("sweep"):
+        for first in range(0, n_sets, step):
+            last = min(n_sets, first + step)
+            shape = (last - first, n_hours)
+            # One column per set: (sets, 1), or (sets, 1, 3) for the cloud weights
+            thresholds = {field: values[first:last, None] for field, values in param_sets.items()}
+            columns = score_hours(rows, region, thresholds)
+            seedable = np.broadcast_to(columns["is_seedable"], shape)
+            potential = np.broadcast_to(columns["precipitation_potential_mm"], shape)
+            probability = np.broadcast_to(columns["precipitation_probability"], shape)
+            result["seedable_hours"][first:last] = seedable.sum(axis=1)
+            result["expected_mm"][first:last] = (potential * probability / 100).sum(axis=1)
+            result["potential_mm"][first:last] = potential.sum(axis=1)
+    METRICS.count("sweep_cells", n_sets * n_hours)
+    return result
+
+
+def profile_parameters(region, fields):
+    """The region profile's own values of the swept fields, as a one-set parameter_grid()"""
+    region_id = get_region_profile(region).region_id
+    return {field: np.asarray(PROFILE_ARRAYS[field][region_id], dtype=float)[None] for field in fields}
+
+
+def sweep_records(param_sets, result, sets):
+    """JSON-ready records for the parameter sets at positions `sets`"""
+    records = []
+    for s in sets:
+        params = {field: values[s].tolist() for field, values in param_sets.items()}
+        records.append({"record": "sweep", "set": int(s), **params,
+                        "seedable_hours": int(result["seedable_hours"][s]),
+                        "expected_mm": round(float(result["expected_mm"][s]), 2),
+                        "potential_mm": round(float(result["potential_mm"][s]), 2)})
+    return records
+
+
+def parse_candidates(text):
+    """FIELD=V1,V2,... or FIELD=START:STOP:STEP (stop included); cloud weights as LOW/MID/HIGH"""
+    field, _, values = text.partition("=")
+    if field not in SWEEP_FIELDS:
+        raise argparse.ArgumentTypeError(f"cannot sweep {field!r} (choose from {', '.join(SWEEP_FIELDS)})")
+    try:
+        if field == "cloud_weights":
+            candidates = [tuple(float(w) for w in triple.split("/")) for triple in values.split(",")]
+            if any(len(triple) != 3 for triple in candidates):
+                raise ValueError(values)
+        elif ":" in values:
+            start, stop, step = (float(v) for v in values.split(":"))
+            candidates = np.arange(start, stop + step / 2, step).round(6).tolist()
+        else:
+            candidates = [float(v) for v in values.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bad candidate values for {field}: {values!r}")
+    return field, candidates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep seedability thresholds over the farm's forecast")
+    parser.add_argument("--grid", metavar="FIELD=VALUES", type=parse_candidates, action="append", required=True,
+                        help="Candidate values, e.g. seedability_threshold=40:70:5, min_humidity=40,50 or "
+                             "cloud_weights=0.4/0.5/0.1,0.3/0.6/0.1; repeat to combine fields")
+    parser.add_argument("--days", type=int, default=WEEK_HOURS // 24, help="Forecast days to score")
+    parser.add_argument("--top", type=int, default=10, help="Parameter sets shown, by expected rain")
+    parser.add_argument("--offline", action="store_true", help="Use the last cached forecast without network access")
+    parser.add_argument("--no-cache", action="store_true", help="Always fetch a fresh forecast")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Record stage timings and counters to PATH (.prom for Prometheus text, else JSON)")
+    parser.add_argument("--machine", action="store_true",
+                        help="No console report: print every parameter set as an NDJSON record")
+    args = parser.parse_args()
+    if args.metrics:
+        METRICS.enable()
+
+    config = load_config()
+    region_type = farm_region(config)
+    data = fetch(config, None if args.no_cache else ForecastCache(offline=args.offline))
+    hourly = data["hourly"]
+    window = forecast_window(hourly["time"], datetime.now(), args.days * 24)
+    arrays = hourly_arrays(hourly)
+
+    grid = dict(args.grid)
+    param_sets = parameter_grid(grid)
+    start = time.perf_counter()
+    result = sweep(arrays, region_type, param_sets, window)
+    seconds = time.perf_counter() - start
+    n_sets = len(result["seedable_hours"])
+    # The same hours under the region profile's own values, for comparison
+    own = profile_parameters(region_type, grid)
+    profile = sweep_records(own, sweep(arrays, region_type, own, window), [0])[0]
+    del profile["set"]
+    profile.update(record="profile", region_type=region_type)
+
+    if args.machine:
+        writer = NDJSONWriter(sys.stdout)
+        writer.write(profile)
+        for record in sweep_records(param_sets, result, range(n_sets)):
+            writer.write(record)
+    else:
+        n_hours = window.stop - window.start
+        print(f"\n🎛️ Swept {n_sets} parameter sets over {n_hours} hours for {region_type.upper()} "
+              f"in {seconds * 1000:.1f} ms")
+        print(f"📋 Profile values: {json.dumps({field: profile[field] for field in grid})} → "
+              f"{profile['seedable_hours']} seedable hours, {profile['expected_mm']}mm expected\n")
+        for rank, record in enumerate(sweep_records(param_sets, result, top_k(result["expected_mm"], args.top)), 1):
+            params = ", ".join(f"{field}={record[field]}" for field in grid)
+            print(f"{rank:>3}. {params}: {record['seedable_hours']} seedable hours, "
+                  f"{record['expected_mm']}mm expected")
+    if args.metrics:
+        METRICS.write(args.metrics)
+        if not args.machine:
+            print(f"📈 Metrics saved to {args.metrics}")
+
+
+if __name__ == "__main__":
+    main()
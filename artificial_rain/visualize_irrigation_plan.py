@@ -1,83 +1,68 @@
 import json
-from datetime import datetime
+
 import matplotlib.pyplot as plt
 
-# Correct file paths
-with open("seedable_forecast.json", "r") as f:
-    all_forecasts = json.load(f)
+from forecast_columns import load_forecast_fields
+from irrigation_planner import DAYS, plan_forecast_week
+
 
-with open("user_input_config.json", "r") as f:
-    user_config = json.load(f)
+def chart_values(plan, config):
+    """What the plan chart shows: crop, stage, and per-day watering, rain and seeding flags"""
+    seeding = [bool(seeded) for seeded in plan["seeding"]]
+    return {
+        "crop": config["crop"]["type"].capitalize(),
+        "growth_stage": config["crop"]["growth_stage"],
+        "water": [float(mm) for mm in plan["irrigation"]],
+        "rain": [round(float(rain), 2) if seeded else 0
+                 for rain, seeded in zip(plan["expected_rain"], seeding)],
+        "seeding": seeding,
+    }
 
-# Extract crop & irrigation config
-crop = user_config["crop"]["type"].capitalize()
-growth_stage = user_config["crop"]["growth_stage"]
-weekly_requirement = user_config["crop"]["water_requirement_mm_per_week"]
-max_per_day = user_config["irrigation"]["max_capacity_mm_per_day"]
 
-days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-plan = {day: 0 for day in days}
+def plot_irrigation_plan(plan, config):
+    """Bar chart of a plan from plan_forecast_week(); returns the matplotlib figure"""
+    chart = chart_values(plan, config)
+    crop, growth_stage = chart["crop"], chart["growth_stage"]
+    water_values, rain_values = chart["water"], chart["rain"]
+    colors = ["deepskyblue" if seeded else "skyblue" for seeded in chart["seeding"]]
 
-# Filter seedable options
-seedable_options = [
-    {
-        "datetime": item["datetime"],
-        "day": datetime.strptime(item["datetime"], "%Y-%m-%dT%H:%M").strftime("%A"),
-        "rainfall_mm": item["precipitation_potential_mm"]
-    }
-    for item in all_forecasts if item.get("is_seedable", False)
-]
-
-# Calculate irrigation plan
-if not seedable_options:
-    remaining = weekly_requirement
-    i = 0
-    while remaining > 0:
-        day = days[i % 7]
-        water = min(remaining, max_per_day)
-        plan[day] += water
-        remaining -= water
-        i += 1
-    rain_day = None
-    rainfall_mm = 0
-else:
-    selected = seedable_options[0]  # simulate first seedable cloud
-    rain_day = selected["day"]
-    rainfall_mm = selected["rainfall_mm"]
-    plan[rain_day] = 0
-    remaining = max(0, weekly_requirement - rainfall_mm)
-    irrigation_days = [d for d in days if d != rain_day]
-    i = 0
-    while remaining > 0:
-        day = irrigation_days[i % len(irrigation_days)]
-        water = min(remaining, max_per_day)
-        plan[day] += water
-        remaining -= water
-        i += 1
-
-# Visualization
-water_values = list(plan.values())
-colors = ["skyblue" if day != rain_day else "deepskyblue" for day in days]
-
-plt.figure(figsize=(10, 6))
-bars = plt.bar(days, water_values, color=colors)
-
-# Annotate rainfall
-for i, day in enumerate(days):
-    if day == rain_day:
-        plt.text(i, water_values[i] + 1, f"Rain: {rainfall_mm}mm", ha='center', color='navy')
-
-# Title and labels
-plt.title(f"🌾 AI Irrigation Plan for {crop} ({growth_stage} Stage)", fontsize=14)
-plt.xlabel("Day of the Week")
-plt.ylabel("Watering (mm)")
-plt.ylim(0, max(water_values + [rainfall_mm]) + 10)
-plt.grid(axis='y', linestyle='--', alpha=0.7)
-
-# Add water values on bars
-for i, val in enumerate(water_values):
-    if val > 0:
-        plt.text(i, val + 0.5, f"{val}mm", ha='center', fontsize=9)
-
-plt.tight_layout()
-plt.show()
+    fig = plt.figure(figsize=(10, 6))
+    plt.bar(DAYS, water_values, color=colors)
+
+    # Annotate rainfall
+    for i, rainfall_mm in enumerate(rain_values):
+        if chart["seeding"][i]:
+            plt.text(i, water_values[i] + 1, f"Rain: {rainfall_mm}mm", ha='center', color='navy')
+
+    # Title and labels
+    plt.title(f"🌾 AI Irrigation Plan for {crop} ({growth_stage} Stage)", fontsize=14)
+    plt.xlabel("Day of the Week")
+    plt.ylabel("Watering (mm)")
+    plt.ylim(0, max(water_values + rain_values) + 10)
+    plt.grid(axis='y', linestyle='--', alpha=0.7)
+
+    # Add water values on bars
+    for i, val in enumerate(water_values):
+        if val > 0:
+            plt.text(i, val + 0.5, f"{round(val, 2)}mm", ha='center', fontsize=9)
+
+    plt.tight_layout()
+    return fig
+
+
+def main():
+    forecast = load_forecast_fields(["datetime", "is_seedable", "precipitation_potential_mm",
+                                     "precipitation_probability"])
+
+    with open("user_input_config.json", "r") as f:
+        user_config = json.load(f)
+
+    # Same plan as ai_irrigation_optimizer.py
+    plan = plan_forecast_week(forecast, user_config["crop"]["water_requirement_mm_per_week"],
+                              user_config["irrigation"]["max_capacity_mm_per_day"])
+    plot_irrigation_plan(plan, user_config)
+    plt.show()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import heapq
+
+import numpy as np
+
+# Ranking of seedable windows without sorting whole forecasts. Every query runs in linear
+# time in the number of hours (plus k log k to order the winners) and breaks ties like a
+# stable descending sort: of two equal scores, the earlier hour ranks first.
+
+
+def top_k(scores, k, mask=None):
+    """Indices of the k highest scores (only where `mask` is true), best first"""
+    scores = np.asarray(scores, dtype=float)
+    candidates = np.arange(len(scores)) if mask is None else np.flatnonzero(mask)
+    if k <= 0:
+        return candidates[:0]
+    if len(candidates) <= k:
+        chosen = candidates
+    else:
+        values = scores[candidates]
+        # k-th best value: everything above it is in, ties at it are taken earliest first
+        threshold = np.partition(values, len(values) - k)[len(values) - k]
+        above = candidates[values > threshold]
+        tied = candidates[values == threshold][:k - len(above)]
+        chosen = np.concatenate([above, tied])
+    order = np.lexsort((chosen, -scores[chosen]))
+    return chosen[order]
+
+
+class TopWindows:
+    """Bounded min-heap keeping the k best (score, item) pairs pushed so far.
+
+    Items can be pushed one at a time as hours or farms are scored; memory stays at k.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self._heap = []       # (score, -arrival, item): the root is the weakest kept window
+        self._arrivals = 0
+
+    def push(self, score, item):
+        key = (score, -self._arrivals, item)
+        self._arrivals += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, key)
+        elif self._heap and key[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, key)
+
+    def extend(self, scores, items, mask=None):
+        """Push a batch; only its own top k can make it into the heap"""
+        for i in top_k(scores, self.k, mask).tolist():
+            self.push(float(scores[i]), items[i])
+
+    def __len__(self):
+        return len(self._heap)
+
+    def best(self):
+        """[(score, item)] best first"""
+        return [(score, item) for score, _, item in sorted(self._heap, key=lambda key: key[:2], reverse=True)]
+
+
+def best_contiguous_window(scores, hours, mask=None):
+    """Best run of `hours` consecutive hours by total score, over the last axis.
+
+    With `mask`, every hour of the run must be set. Returns (start, total); start is -1
+    (total -inf) where no run qualifies. Works on one forecast or a (farms, hours) array.
+    """
+    scores = np.asarray(scores, dtype=float)
+    n = scores.shape[-1]
+    if hours > n:
+        shape = scores.shape[:-1]
+        return np.full(shape, -1), np.full(shape, -np.inf)
+    zero = np.zeros(scores.shape[:-1] + (1,))
+    sums = np.concatenate([zero, np.cumsum(scores, axis=-1)], axis=-1)
+    totals = sums[..., hours:] - sums[..., :-hours]
+    if mask is not None:
+        counts = np.concatenate([zero, np.cumsum(np.asarray(mask, dtype=float), axis=-1)], axis=-1)
+        totals = np.where(counts[..., hours:] - counts[..., :-hours] == hours, totals, -np.inf)
+    start = np.argmax(totals, axis=-1)
+    total = np.take_along_axis(totals, np.expand_dims(start, -1), axis=-1)[..., 0]
+    return np.where(np.isfinite(total), start, -1), total
+
+
+def day_starts(datetimes):
+    """Position of the first hour of each calendar day in a chronological forecast"""
+    days = np.asarray(datetimes, dtype="datetime64[D]")
+    if len(days) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate([[0], np.flatnonzero(days[1:] != days[:-1]) + 1])
+
+
+def best_in_groups(scores, starts):
+    """Position of the best score in each run of a grouped array (first on ties).
+
+    `starts` are the group start positions, e.g. from day_starts(); -1 marks a group
+    whose scores are all -inf.
+    """
+    best = np.maximum.reduceat(scores, starts)
+    per_hour = np.repeat(best, np.diff(np.append(starts, len(scores))))
+    positions = np.where(scores == per_hour, np.arange(len(scores)), len(scores))
+    index = np.minimum.reduceat(positions, starts)
+    return np.where(np.isfinite(best), index, -1)
+
+
+def best_per_day(datetimes, scores, mask=None):
+    """Best hour of each calendar day in a chronological forecast.
+
+    Returns (days, index) where days are the datetime64[D] days present and index[d] is
+    the position of that day's best hour (-1 when `mask` leaves the day without hours).
+    """
+    days = np.asarray(datetimes, dtype="datetime64[D]")
+    scores = np.asarray(scores, dtype=float)
+    if mask is not None:
+        scores = np.where(mask, scores, -np.inf)
+    if len(days) == 0:
+        return days, np.zeros(0, dtype=np.int64)
+    starts = day_starts(days)
+    return days[starts], best_in_groups(scores, starts)
+
+
+def top_entries(entries, k, seedable_only=False):
+    """The k best forecast entries by seedability_score, best first"""
+    scores = [entry["seedability_score"] for entry in entries]
+    mask = [entry["is_seedable"] for entry in entries] if seedable_only else None
+    return [entries[i] for i in top_k(scores, k, mask).tolist()]